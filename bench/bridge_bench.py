@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""OpenClaw Bridge 离线回放基准。
+
+不需要 QQ 账号和真实 OpenClaw：
+- 用记录发送内容的假 OneBot Bot 代替 NapCat
+- 用 bench/fake_openclaw.py 代替 openclaw 可执行文件（按语料返回工具调用/文本，可配置延迟）
+- 直接驱动 handle_bridge 端到端执行
+
+输出端到端延迟分位数、每个请求的模型轮次、N 个群并发下的吞吐、峰值 RSS。
+--check 与 bench/baselines/bridge_bench.json 对比（该基线用默认参数 --groups 4 --repeat 1 --delay-scale 1.0 录制）：
+轮次和发送条数必须与基线完全一致，延迟/吞吐/RSS 超出 --tolerance 时以非零退出码结束。
+
+示例：
+    python bench/bridge_bench.py --groups 4 --repeat 2
+    python bench/bridge_bench.py --check
+    python bench/bridge_bench.py --update-baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+DEFAULT_CORPUS = BENCH_DIR / "corpus" / "prompts.jsonl"
+DEFAULT_BASELINE = BENCH_DIR / "baselines" / "bridge_bench.json"
+SELF_ID = "10000"
+
+
+def _load_corpus(path: Path) -> List[Dict[str, Any]]:
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                items.append(json.loads(line))
+    return items
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round((pct / 100.0) * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def _prepare_sandbox(workdir: Path, corpus_path: Path, delay_scale: float) -> Dict[str, str]:
+    """准备假 openclaw、隔离数据目录与环境变量；必须在导入插件前调用。"""
+    bin_dir = workdir / "bin"
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    wrapper = bin_dir / "openclaw"
+    wrapper.write_text(
+        f"#!/bin/sh\nexec {sys.executable} {BENCH_DIR / 'fake_openclaw.py'} \"$@\"\n",
+        encoding="utf-8",
+    )
+    wrapper.chmod(0o755)
+
+    scenario = workdir / "scenario.jsonl"
+    shutil.copyfile(corpus_path, scenario)
+    log_file = workdir / "openclaw_calls.jsonl"
+    log_file.write_text("", encoding="utf-8")
+
+    # eat 列表为空时工具输出“列表是空的”，会被当成工具错误多走一轮 retry，所以预置一份数据
+    data_dir = workdir / "data"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    (data_dir / "eat_data.json").write_text(
+        json.dumps({"android": ["黄焖鸡", "兰州拉面", "麻辣烫"], "apple": ["寿司", "披萨", "火锅"]}, ensure_ascii=False),
+        encoding="utf-8",
+    )
+
+    env = {
+        "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+        "QQ_DATA_DIR": str(workdir / "data"),
+        "FAKE_OPENCLAW_SCENARIO": str(scenario),
+        "FAKE_OPENCLAW_LOG": str(log_file),
+        "FAKE_OPENCLAW_DELAY_SCALE": str(delay_scale),
+        "OPENCLAW_IMAGE_MODE": "false",
+        "OPENCLAW_AUDIO_MODE": "false",
+        "OPENCLAW_SESSION_MODE": "ephemeral",
+        "OPENCLAW_BRIDGE_USE_LOCAL": "true",
+        "OPS_ALERT_ENABLED": "false",
+    }
+    os.environ.update(env)
+    return env
+
+
+def _init_nonebot():
+    sys.path.insert(0, str(REPO_ROOT))
+
+    import nonebot
+    from nonebot.adapters.onebot.v11 import Adapter as OneBotV11Adapter
+
+    nonebot.init(driver="~none", command_start=["/"], command_sep=["."], superusers=set())
+    driver = nonebot.get_driver()
+    driver.register_adapter(OneBotV11Adapter)
+
+    try:
+        nonebot.load_plugin("nonebot_plugin_apscheduler")
+    except Exception:
+        pass
+    for name in ["help", "ping", "todo", "countdown", "schedule", "eat", "remind", "openclaw_bridge"]:
+        nonebot.load_plugin(f"src.plugins.{name}")
+
+    return nonebot.get_adapter(OneBotV11Adapter)
+
+
+def _make_fake_bot(adapter):
+    from nonebot.adapters.onebot.v11 import Bot
+
+    class RecordingBot(Bot):
+        """记录所有发送动作的假 OneBot Bot。"""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.sent: List[Dict[str, Any]] = []
+            self._next_id = 1
+
+        async def call_api(self, api: str, **data: Any) -> Any:
+            if api in {"send_msg", "send_group_msg", "send_private_msg", "send_group_forward_msg", "send_private_forward_msg"}:
+                self.sent.append({"api": api, "data": data, "at": time.perf_counter()})
+                self._next_id += 1
+                return {"message_id": self._next_id}
+            if api == "get_group_member_info":
+                return {"role": "member"}
+            return {}
+
+    return RecordingBot(adapter, SELF_ID)
+
+
+def _make_event(group_id: int, user_id: int, message_id: int, text: str):
+    from nonebot.adapters.onebot.v11 import GroupMessageEvent, Message, MessageSegment
+
+    msg = Message(MessageSegment.at(SELF_ID)) + Message(" " + text)
+    return GroupMessageEvent.model_validate(
+        {
+            "time": int(time.time()),
+            "self_id": int(SELF_ID),
+            "post_type": "message",
+            "sub_type": "normal",
+            "user_id": user_id,
+            "message_type": "group",
+            "message_id": message_id,
+            "message": msg,
+            "original_message": msg,
+            "raw_message": str(msg),
+            "font": 0,
+            "sender": {"user_id": user_id, "nickname": f"bench{user_id}", "card": ""},
+            "to_me": True,
+            "group_id": group_id,
+        }
+    )
+
+
+def _count_rounds(log_file: Path) -> Dict[str, int]:
+    rounds: Dict[str, int] = {}
+    if not log_file.exists():
+        return rounds
+    for line in log_file.read_text(encoding="utf-8").splitlines():
+        try:
+            rec = json.loads(line)
+        except Exception:
+            continue
+        sid = str(rec.get("session_id", ""))
+        # ephemeral 会话 id 以 message_id 结尾；rewrite 会话带 :rewrite 后缀
+        base = sid.split(":rewrite", 1)[0]
+        msg_id = base.rsplit(":", 1)[-1]
+        rounds[msg_id] = rounds.get(msg_id, 0) + 1
+    return rounds
+
+
+async def _run(corpus: List[Dict[str, Any]], groups: int, repeat: int, log_file: Path) -> Dict[str, Any]:
+    from nonebot.exception import FinishedException
+    from src.plugins import openclaw_bridge
+
+    adapter = _ADAPTER
+    bot = _make_fake_bot(adapter)
+
+    latencies: List[float] = []
+    per_item: Dict[str, List[float]] = {}
+    msg_to_item: Dict[str, str] = {}
+    errors: List[str] = []
+    counter = {"msg_id": 1000}
+
+    async def _one_group(gidx: int) -> None:
+        group_id = 900000 + gidx
+        for _ in range(repeat):
+            for item in corpus:
+                counter["msg_id"] += 1
+                mid = counter["msg_id"]
+                msg_to_item[str(mid)] = item["id"]
+                event = _make_event(group_id, 20000 + gidx, mid, item["text"])
+                t0 = time.perf_counter()
+                try:
+                    await openclaw_bridge.handle_bridge(bot, event)
+                except FinishedException:
+                    pass
+                except Exception as exc:
+                    errors.append(f"{item['id']}: {exc!r}")
+                dt = time.perf_counter() - t0
+                latencies.append(dt)
+                per_item.setdefault(item["id"], []).append(dt)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[_one_group(i) for i in range(groups)])
+    wall = time.perf_counter() - started
+
+    rounds_by_msg = _count_rounds(log_file)
+    rounds_by_item: Dict[str, List[int]] = {}
+    for mid, item_id in msg_to_item.items():
+        rounds_by_item.setdefault(item_id, []).append(rounds_by_msg.get(mid, 0))
+    all_rounds = [r for rs in rounds_by_item.values() for r in rs]
+
+    over_budget = []
+    for item in corpus:
+        limit = item.get("max_rounds")
+        got = max(rounds_by_item.get(item["id"], [0]) or [0])
+        if isinstance(limit, int) and got > limit:
+            over_budget.append(f"{item['id']}: {got} > {limit}")
+
+    self_usage = resource.getrusage(resource.RUSAGE_SELF)
+    child_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    requests = len(latencies)
+    return {
+        "requests": requests,
+        "groups": groups,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(requests / wall, 3) if wall > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 50) * 1000, 1),
+            "p90": round(_percentile(latencies, 90) * 1000, 1),
+            "p95": round(_percentile(latencies, 95) * 1000, 1),
+            "p99": round(_percentile(latencies, 99) * 1000, 1),
+            "max": round(max(latencies) * 1000, 1) if latencies else 0.0,
+        },
+        "rounds_per_request": {
+            "mean": round(sum(all_rounds) / len(all_rounds), 3) if all_rounds else 0.0,
+            "max": max(all_rounds) if all_rounds else 0,
+            "by_item": {k: max(v) for k, v in sorted(rounds_by_item.items())},
+        },
+        "item_p50_ms": {k: round(_percentile(v, 50) * 1000, 1) for k, v in sorted(per_item.items())},
+        "peak_rss_kb": {"self": int(self_usage.ru_maxrss), "children": int(child_usage.ru_maxrss)},
+        "sends": len(bot.sent),
+        "errors": errors,
+        "rounds_over_limit": over_budget,
+    }
+
+
+def _compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    problems: List[str] = []
+    b_lat = baseline.get("latency_ms", {})
+    for key in ("p50", "p95"):
+        base = float(b_lat.get(key, 0) or 0)
+        cur = float(report["latency_ms"].get(key, 0) or 0)
+        if base > 0 and cur > base * (1 + tolerance):
+            problems.append(f"latency {key}: {cur}ms > baseline {base}ms (+{int(tolerance * 100)}%)")
+
+    # 假 openclaw 按语料固定回复，轮次和发送条数是确定的，按原值精确比较（变少也要更新基线）
+    b_rounds = baseline.get("rounds_per_request", {})
+    cur_rounds = report["rounds_per_request"]
+    if cur_rounds["mean"] != b_rounds.get("mean"):
+        problems.append(f"rounds/request: {cur_rounds['mean']} != baseline {b_rounds.get('mean')}")
+    b_by_item = b_rounds.get("by_item", {})
+    for item_id in sorted(set(b_by_item) | set(cur_rounds["by_item"])):
+        if cur_rounds["by_item"].get(item_id) != b_by_item.get(item_id):
+            problems.append(
+                f"rounds for {item_id}: {cur_rounds['by_item'].get(item_id)} != baseline {b_by_item.get(item_id)}"
+            )
+    if "sends" in baseline and report["sends"] != baseline["sends"]:
+        problems.append(f"sends: {report['sends']} != baseline {baseline['sends']}")
+
+    b_tp = float(baseline.get("throughput_rps", 0) or 0)
+    if b_tp > 0 and report["throughput_rps"] < b_tp * (1 - tolerance):
+        problems.append(f"throughput: {report['throughput_rps']} rps < baseline {b_tp} rps (-{int(tolerance * 100)}%)")
+
+    b_rss = int(baseline.get("peak_rss_kb", {}).get("self", 0) or 0)
+    cur_rss = int(report["peak_rss_kb"]["self"])
+    if b_rss > 0 and cur_rss > b_rss * (1 + tolerance):
+        problems.append(f"peak RSS: {cur_rss}KB > baseline {b_rss}KB (+{int(tolerance * 100)}%)")
+
+    if report["errors"]:
+        problems.append(f"{len(report['errors'])} request(s) raised errors")
+    if report["rounds_over_limit"]:
+        problems.append("rounds over corpus limit: " + "; ".join(report["rounds_over_limit"]))
+    return problems
+
+
+_ADAPTER = None
+
+
+def main() -> int:
+    global _ADAPTER
+    parser = argparse.ArgumentParser(description="OpenClaw Bridge offline replay benchmark")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--groups", type=int, default=4, help="并发群数量")
+    parser.add_argument("--repeat", type=int, default=1, help="每个群重复回放语料的次数")
+    parser.add_argument("--delay-scale", type=float, default=1.0, help="假 openclaw 延迟缩放")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果覆盖基线")
+    parser.add_argument("--check", action="store_true", help="与基线对比，回归时返回非零")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="延迟/吞吐/RSS 允许的相对波动")
+    args = parser.parse_args()
+
+    corpus_path = args.corpus.resolve()
+    corpus = _load_corpus(corpus_path)
+    workdir = Path(tempfile.mkdtemp(prefix="bridge_bench_"))
+    try:
+        _prepare_sandbox(workdir, corpus_path, args.delay_scale)
+        # schedule 插件使用相对路径 data/，切到沙箱目录避免写入仓库
+        os.chdir(workdir)
+        _ADAPTER = _init_nonebot()
+        report = asyncio.run(_run(corpus, max(1, args.groups), max(1, args.repeat), workdir / "openclaw_calls.jsonl"))
+    finally:
+        os.chdir(REPO_ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report["config"] = {"groups": args.groups, "repeat": args.repeat, "delay_scale": args.delay_scale, "corpus": corpus_path.name}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"baseline updated: {args.baseline}", file=sys.stderr)
+        return 0
+
+    if args.check:
+        if not args.baseline.exists():
+            print(f"baseline not found: {args.baseline} (run with --update-baseline first)", file=sys.stderr)
+            return 2
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        b_config = baseline.get("config", {})
+        mismatched = [k for k in ("groups", "repeat", "delay_scale", "corpus") if b_config.get(k) != report["config"][k]]
+        if mismatched:
+            print(
+                "baseline was recorded with different settings: "
+                + ", ".join(f"{k}={b_config.get(k)}" for k in mismatched)
+                + " (rerun with the same values or --update-baseline)",
+                file=sys.stderr,
+            )
+            return 2
+        problems = _compare(report, baseline, args.tolerance)
+        if problems:
+            for p in problems:
+                print(f"REGRESSION: {p}", file=sys.stderr)
+            return 1
+        print("no regression against baseline", file=sys.stderr)
+    elif report["errors"] or report["rounds_over_limit"]:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
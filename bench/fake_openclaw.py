@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""可脚本化的假 openclaw 可执行文件（仅供基准测试使用）。
+
+用法与真实命令一致：openclaw agent [--local] --agent X --session-id S --message M --thinking T --json
+
+行为由环境变量控制：
+- FAKE_OPENCLAW_SCENARIO: 场景 JSON 文件路径，格式见 bench/corpus/prompts.jsonl
+- FAKE_OPENCLAW_LOG: 每次调用追加一行 JSON 日志（session/stage/耗时），供统计模型轮次
+- FAKE_OPENCLAW_DELAY_SCALE: 延迟缩放系数（默认 1.0）
+"""
+import json
+import os
+import sys
+import time
+
+
+STAGE_MARKERS = [
+    ("rewrite", "你现在不是执行模式"),
+    ("retry", "你正在执行多轮工具调用"),
+    ("followup", "你正在进行多步工具执行"),
+    ("exec", "你现在处于执行模式"),
+    ("placeholder", "你刚才的回复："),
+]
+
+DEFAULT_DELAY_MS = {
+    "exec": 800,
+    "followup": 600,
+    "retry": 600,
+    "rewrite": 500,
+    "placeholder": 400,
+}
+
+
+def _parse_argv(argv: list[str]) -> dict:
+    out = {}
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a.startswith("--") and i + 1 < len(argv) and not argv[i + 1].startswith("--"):
+            out[a[2:]] = argv[i + 1]
+            i += 2
+            continue
+        if a.startswith("--"):
+            out[a[2:]] = True
+        i += 1
+    return out
+
+
+def _detect_stage(message: str) -> str:
+    for stage, marker in STAGE_MARKERS:
+        if marker in message:
+            return stage
+    return "exec"
+
+
+def _load_scenario() -> list[dict]:
+    path = os.getenv("FAKE_OPENCLAW_SCENARIO", "").strip()
+    if not path or not os.path.exists(path):
+        return []
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except Exception:
+                continue
+            if isinstance(obj, dict) and obj.get("text"):
+                entries.append(obj)
+    return entries
+
+
+def _pick_entry(entries: list[dict], message: str):
+    best = None
+    for e in entries:
+        t = str(e.get("text", ""))
+        if t and t in message and (best is None or len(t) > len(str(best.get("text", "")))):
+            best = e
+    return best
+
+
+def _render_reply(spec) -> str:
+    if isinstance(spec, dict):
+        if "tool" in spec:
+            return json.dumps(spec["tool"], ensure_ascii=False)
+        return str(spec.get("text", ""))
+    return str(spec or "")
+
+
+def main() -> int:
+    started = time.time()
+    args = _parse_argv(sys.argv[1:])
+    message = str(args.get("message", "") or "")
+    session_id = str(args.get("session-id", "") or "")
+    stage = _detect_stage(message)
+
+    entry = _pick_entry(_load_scenario(), message)
+    responses = (entry or {}).get("responses", {}) if isinstance(entry, dict) else {}
+    delays = (entry or {}).get("delay_ms", {}) if isinstance(entry, dict) else {}
+
+    spec = responses.get(stage)
+    if spec is None:
+        spec = {"text": "好的，知道啦。"}
+
+    try:
+        scale = float(os.getenv("FAKE_OPENCLAW_DELAY_SCALE", "1.0"))
+    except Exception:
+        scale = 1.0
+    delay_ms = delays.get(stage, DEFAULT_DELAY_MS.get(stage, 500))
+    time.sleep(max(0.0, float(delay_ms) * scale / 1000.0))
+
+    # 输出之前先记日志：bridge 读到结果（尤其是提前识别到工具调用）后可能不再等待甚至杀掉这个进程，
+    # 基准统计轮次时不能漏掉这一次调用
+    log_path = os.getenv("FAKE_OPENCLAW_LOG", "").strip()
+    if log_path:
+        rec = {
+            "session_id": session_id,
+            "stage": stage,
+            "thinking": args.get("thinking", ""),
+            "prompt_bytes": len(message.encode("utf-8")),
+            "elapsed_ms": int((time.time() - started) * 1000),
+            "matched": bool(entry),
+        }
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    reply = _render_reply(spec)
+    payload = {"payloads": [{"text": reply}], "meta": {"fake": True, "stage": stage}}
+    sys.stdout.write(json.dumps(payload, ensure_ascii=False))
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+
+    trailing_ms = float(delays.get("teardown", 0) or 0) * scale
+    if trailing_ms > 0:
+        # 模拟 Node 进程输出完毕后的收尾耗时
+        time.sleep(trailing_ms / 1000.0)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""autopic 关键词匹配基准 + 等价性检查。
+
+在临时目录里生成一批表情文件（默认 5000 个，空文件即可），对比：
+1. legacy：改写前 autopic_handle 的做法，每条消息 listdir + is_file + 逐文件 re.split
+2. index：_pic_keyword_index.PicKeywordIndex（目录未变时只 stat 一次 + Aho-Corasick 扫描）
+
+两者对每条消息的命中集合必须完全相同，任一不同以非零退出码结束。
+
+示例：
+    python bench/pic_keyword_bench.py --files 5000 --messages 2000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.plugins._pic_keyword_index import PicKeywordIndex  # noqa: E402
+
+
+WORDS = [
+    "猫猫", "狗狗", "哈哈", "无语", "震惊", "好耶", "摸鱼", "下班", "加班", "开心", "难过", "笑死",
+    "doge", "cat", "ok", "nice", "wow", "sad", "lol", "bruh", "草", "寄", "蚌埠住了", "典",
+]
+SEPARATORS = ["_", "-", ".", ""]
+EXTENSIONS = [".jpg", ".png", ".gif", ".webp", ".mp4"]
+
+
+def legacy_match(pics_dir: Path, msg_text: str) -> list:
+    all_files = [f for f in os.listdir(pics_dir) if (pics_dir / f).is_file()]
+    if not all_files:
+        return []
+    matched_files = []
+    keywords = msg_text.split()
+    for filename in all_files:
+        name_without_ext = Path(filename).stem
+        if name_without_ext in msg_text:
+            matched_files.append(filename)
+            continue
+        name_parts = re.split(r'[._-]', name_without_ext)
+        name_parts = [part for part in name_parts if part]
+        if any(keyword in name_parts for keyword in keywords):
+            matched_files.append(filename)
+    return matched_files
+
+
+def make_stem(rng: random.Random, i: int) -> str:
+    parts = [rng.choice(WORDS) for _ in range(rng.randint(1, 3))]
+    if rng.random() < 0.7:
+        parts.append(str(i))
+    stem = parts[0]
+    for part in parts[1:]:
+        stem += rng.choice(SEPARATORS) + part
+    return stem
+
+
+def make_message(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.5:
+        # 普通聊天，大多不命中
+        return "".join(rng.choice("今天天气不错我们去吃饭吧你在干嘛啊对的没问题 ") for _ in range(rng.randint(4, 60)))
+    if kind < 0.8:
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+    return "".join(rng.choice(WORDS + ["，", "。", " "]) for _ in range(rng.randint(2, 10)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="autopic keyword matching benchmark")
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pics_dir = Path(tmp)
+        names = set()
+        i = 0
+        while len(names) < args.files:
+            names.add(make_stem(rng, i) + rng.choice(EXTENSIONS))
+            i += 1
+        for name in names:
+            (pics_dir / name).touch()
+        (pics_dir / "subdir").mkdir()
+        messages = [make_message(rng) for _ in range(args.messages)]
+
+        index = PicKeywordIndex(pics_dir)
+        t0 = time.perf_counter()
+        index.refresh()
+        build_s = time.perf_counter() - t0
+
+        mismatches = 0
+        matched = 0
+        for msg in messages:
+            old = sorted(legacy_match(pics_dir, msg))
+            index.refresh()
+            new = index.match(msg)
+            if old != new:
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"mismatch for {msg!r}: legacy {len(old)} vs index {len(new)}")
+            matched += bool(new)
+        print(f"equivalence: {len(messages)} messages over {len(names)} files, {matched} matched, {mismatches} mismatches")
+
+        t0 = time.perf_counter()
+        for msg in messages:
+            legacy_match(pics_dir, msg)
+        legacy_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for msg in messages:
+            index.refresh()
+            index.match(msg)
+        index_s = time.perf_counter() - t0
+
+    print(f"index build: {build_s * 1000:.1f} ms")
+    print(f"{'impl':<8} {'msgs/s':>12} {'us/msg':>10}")
+    for name, secs in (("legacy", legacy_s), ("index", index_s)):
+        print(f"{name:<8} {len(messages) / secs:>12,.0f} {secs / len(messages) * 1e6:>10.1f}")
+    print(f"speedup: {legacy_s / index_s:.0f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
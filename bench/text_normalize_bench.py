@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""文本规范化基准 + 等价性检查。
+
+对比 _openclaw_bridge_text 里的 clean_user_text / strip_markdown 与改写前的多轮 re.sub 实现：
+1. golden：一组边界用例，新旧输出必须逐字相同
+2. fuzz：随机拼接控制字符/空白/换行/昵称前缀/markdown 片段，新旧输出必须相同
+3. 吞吐：典型 bridge 文本上的每秒调用次数（含同一字符串重复清洗的场景）
+
+任一等价性检查失败时以非零退出码结束。
+
+示例：
+    python bench/text_normalize_bench.py --fuzz 20000 --loops 20000
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.plugins._openclaw_bridge_text import clean_user_text, strip_markdown  # noqa: E402
+
+
+def legacy_clean_user_text(text: str) -> str:
+    t = text or ""
+    t = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]", "", t)
+    t = re.sub(r"^\s*(浅浅ovo|浅浅)[:：,，\s]+", "", t, flags=re.I)
+    t = re.sub(r"[ \t]+", " ", t)
+    t = re.sub(r"\n{3,}", "\n\n", t)
+    return t.strip()
+
+
+def legacy_strip_markdown(text: str) -> str:
+    text = re.sub(r"```[\s\S]*?```", lambda m: m.group(0).replace("```", "").strip(), text)
+    text = re.sub(r"`([^`]+)`", r"\1", text)
+    text = re.sub(r"\*\*(.*?)\*\*", r"\1", text)
+    text = re.sub(r"__(.*?)__", r"\1", text)
+    text = re.sub(r"\[([^\]]+)\]\(([^)]+)\)", r"\1", text)
+    text = re.sub(r"^\s{0,3}#{1,6}\s*", "", text, flags=re.MULTILINE)
+    text = re.sub(r"^\s*>\s?", "", text, flags=re.MULTILINE)
+    text = re.sub(r"\n{3,}", "\n\n", text).strip()
+    return text
+
+
+GOLDEN = [
+    "",
+    "   ",
+    "浅浅",
+    "浅浅ovo",
+    "浅浅 帮我看看课表",
+    "浅浅OVO：今天周几",
+    "  浅浅，，浅浅 hi",
+    "浅浅 浅浅 hi",
+    "浅\x01浅 hi",
+    "浅浅\t\t\n\n\n\nX",
+    "a\x00b\x7fc",
+    "a \x01 b",
+    "a\n\n\x01\nb",
+    "a\n\r\n\n\nb",
+    "a\t\tb    c \t d",
+    "line1\n\n\n\n\nline2\n\n\nline3",
+    "/todo work add  复习线代\x0b",
+    "　全角空格　 保留",
+    "尾部空白 \t\n\n\n",
+]
+
+MD_GOLDEN = [
+    "",
+    "普通回复，没有 markdown。",
+    "```python\nprint(1)\n```",
+    "用 `pip install` 安装，**注意** 版本，__下划线__",
+    "[链接](https://example.com) 和 [坏链接](",
+    "# 标题\n## 二级\n   ### 三级\n    #### 四个空格",
+    "> 引用\n>> 嵌套\n正文 > 不是引用",
+    "a\n\n\n\nb",
+    "```\n```\n``` 未闭合",
+    "**跨\n行** 与 *单星*",
+]
+
+ALPHABET = [
+    "a", "b", "中", "文", " ", "  ", "\t", "\n", "\n\n\n", "\r", "\x00", "\x01", "\x0b", "\x0c", "\x1f", "\x7f",
+    "浅浅", "浅浅ovo", "OVO", "：", ":", "，", ",", "`", "```", "**", "__", "[", "]", "(", ")", "#", ">", "　",
+]
+
+
+def _fuzz_case(rng: random.Random) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40)))
+
+
+def check_equivalence(fuzz: int, seed: int) -> int:
+    failures = 0
+    for s in GOLDEN + MD_GOLDEN:
+        if clean_user_text(s) != legacy_clean_user_text(s):
+            failures += 1
+            print(f"clean_user_text mismatch: {s!r}: {clean_user_text(s)!r} != {legacy_clean_user_text(s)!r}")
+        # 再清洗一次也必须一致（CleanText 快路径）
+        once = clean_user_text(s)
+        if clean_user_text(once) != legacy_clean_user_text(legacy_clean_user_text(s)):
+            failures += 1
+            print(f"clean_user_text re-clean mismatch: {s!r}")
+        if strip_markdown(s) != legacy_strip_markdown(s):
+            failures += 1
+            print(f"strip_markdown mismatch: {s!r}: {strip_markdown(s)!r} != {legacy_strip_markdown(s)!r}")
+
+    rng = random.Random(seed)
+    for _ in range(fuzz):
+        s = _fuzz_case(rng)
+        if clean_user_text(s) != legacy_clean_user_text(s):
+            failures += 1
+            if failures < 20:
+                print(f"fuzz clean mismatch: {s!r}")
+        if clean_user_text(clean_user_text(s)) != legacy_clean_user_text(legacy_clean_user_text(s)):
+            failures += 1
+            if failures < 20:
+                print(f"fuzz re-clean mismatch: {s!r}")
+        if strip_markdown(s) != legacy_strip_markdown(s):
+            failures += 1
+            if failures < 20:
+                print(f"fuzz markdown mismatch: {s!r}")
+    return failures
+
+
+def _rate(fn, inputs, loops: int) -> float:
+    t0 = time.perf_counter()
+    n = 0
+    while n < loops:
+        for s in inputs:
+            fn(s)
+            n += 1
+    return n / (time.perf_counter() - t0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="text normalization benchmark")
+    parser.add_argument("--fuzz", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--loops", type=int, default=20000)
+    args = parser.parse_args()
+
+    failures = check_equivalence(args.fuzz, args.seed)
+    print(f"equivalence: {len(GOLDEN) + len(MD_GOLDEN)} golden + {args.fuzz} fuzz cases, {failures} mismatches")
+
+    typical = [
+        "浅浅 帮我加个 work 待办 复习线代 然后看看待办列表",
+        "/todo work add 复习线代",
+        "今天的课表是什么？",
+        "好的，我先帮你看一下。\n\n明天上午有两节课：高等数学（8:00-9:35，教一101）和线性代数（10:00-11:35）。",
+        "x" * 800 + "\n\n\n" + "y" * 800,
+    ]
+    markdown = [
+        "好的，我先帮你看一下。明天上午有两节课。",
+        "**明天**有 `2` 节课：\n\n\n- 高等数学\n- [线代](https://example.com)",
+        "# 总结\n> 记得带书\n```\ncode\n```",
+    ]
+    # 同一请求里反复清洗同一段文本（bridge 的真实用法）
+    repeated = [clean_user_text(typical[0])] * 5 + [typical[1]] * 5
+
+    rows = [
+        ("clean_user_text typical", legacy_clean_user_text, clean_user_text, typical),
+        ("clean_user_text repeated", legacy_clean_user_text, clean_user_text, repeated),
+        ("strip_markdown", legacy_strip_markdown, strip_markdown, markdown),
+    ]
+    print(f"{'case':<28} {'legacy ops/s':>14} {'new ops/s':>14} {'speedup':>8}")
+    for name, old_fn, new_fn, inputs in rows:
+        old_rate = _rate(old_fn, inputs, args.loops)
+        new_rate = _rate(new_fn, inputs, args.loops)
+        print(f"{name:<28} {old_rate:>14,.0f} {new_rate:>14,.0f} {new_rate / old_rate:>7.1f}x")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""工具调用识别基准：旧的整段正则路径 vs 流式扫描器。
+
+旧路径：等 stdout 全部读完 -> find/rfind 截取 envelope -> json.loads -> 贪婪正则取 {...}。
+新路径：按 4KB 分块喂给 ToolCallStreamScanner，右括号一到就返回。
+
+输出每种回复规模下两条路径的耗时，以及流式路径识别时已读取的字节比例
+（比例越小，越早可以开始执行工具）。
+
+示例：
+    python bench/tool_call_scan_bench.py --sizes 1000 20000 200000 --loops 50
+"""
+import argparse
+import codecs
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.plugins._openclaw_bridge_text import ToolCallStreamScanner, parse_tool_call  # noqa: E402
+
+
+TOOL = {"tool": "plugin_command", "args": {"command": "/todo add work 复习线代 \"第三章\""}}
+
+
+def _legacy_parse(stdout: str):
+    json_text = stdout
+    start = json_text.find("{")
+    end = json_text.rfind("}")
+    if start != -1 and end != -1 and end > start:
+        json_text = json_text[start:end + 1]
+    payload = json.loads(json_text)
+    texts = [p.get("text", "") for p in payload.get("payloads", []) if isinstance(p, dict) and p.get("text")]
+    answer = "\n".join(texts).strip()
+
+    m = re.search(r"\{[\s\S]*\}", answer)
+    if not m:
+        return None
+    try:
+        obj = json.loads(m.group(0))
+    except Exception:
+        return None
+    return obj if isinstance(obj, dict) and obj.get("tool") else None
+
+
+def _make_stdout(trailing_chars: int) -> str:
+    trailing = ("好的，我先帮你加上这个待办，然后再看看别的安排。{备注} " * (trailing_chars // 28 + 1))[:trailing_chars]
+    text = json.dumps(TOOL, ensure_ascii=False) + "\n" + trailing
+    meta = {"durationMs": 1234, "usage": {"input": 5000, "output": len(text)}}
+    return json.dumps({"payloads": [{"text": text}], "meta": meta}, ensure_ascii=False, indent=2)
+
+
+def _stream_detect(stdout_bytes: bytes, chunk: int = 4096):
+    scanner = ToolCallStreamScanner()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    read = 0
+    for i in range(0, len(stdout_bytes), chunk):
+        part = stdout_bytes[i:i + chunk]
+        read += len(part)
+        if scanner.feed(decoder.decode(part)):
+            return scanner.result, read
+    return None, read
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="tool call detection benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 5000, 50000, 500000], help="工具 JSON 之后的正文长度（字符）")
+    parser.add_argument("--loops", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'trailing':>10} {'stdout_KB':>10} {'legacy_ms':>10} {'stream_ms':>10} {'read_at_detect':>15}")
+    for size in args.sizes:
+        stdout = _make_stdout(size)
+        stdout_bytes = stdout.encode("utf-8")
+
+        legacy = _legacy_parse(stdout)
+        streamed, read = _stream_detect(stdout_bytes)
+        # 新旧路径必须识别出同一个工具调用
+        assert streamed == parse_tool_call(json.dumps(TOOL, ensure_ascii=False)), streamed
+        assert legacy is None or legacy.get("tool") == streamed["tool"]
+
+        t0 = time.perf_counter()
+        for _ in range(args.loops):
+            _legacy_parse(stdout)
+        legacy_ms = (time.perf_counter() - t0) * 1000 / args.loops
+
+        t0 = time.perf_counter()
+        for _ in range(args.loops):
+            _stream_detect(stdout_bytes)
+        stream_ms = (time.perf_counter() - t0) * 1000 / args.loops
+
+        ratio = read / max(1, len(stdout_bytes))
+        print(f"{size:>10} {len(stdout_bytes) / 1024:>10.1f} {legacy_ms:>10.3f} {stream_ms:>10.3f} {ratio:>14.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
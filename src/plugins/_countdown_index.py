@@ -0,0 +1,83 @@
+import heapq
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+
+class DeadlineIndex:
+    """倒计时事件的截止时间索引。
+
+    每个用户一个按截止时间排序的小根堆，另有一个全局的“待归档”堆给清理任务用；
+    插入 O(log n)，删除是惰性的（只作废条目，弹出时跳过，作废太多时重建堆）。
+    """
+
+    def __init__(self):
+        self._seq = itertools.count()
+        # user_id -> name -> (ts, seq)，seq 用来识别堆里哪个条目仍然有效
+        self._live: Dict[str, Dict[str, Tuple[float, int]]] = {}
+        self._heaps: Dict[str, List[Tuple[float, int, str]]] = {}
+        self._sweep_heap: List[Tuple[float, int, str, str]] = []
+        self._ordered: Dict[str, List[Tuple[str, float]]] = {}
+
+    def clear(self) -> None:
+        self._live.clear()
+        self._heaps.clear()
+        self._sweep_heap.clear()
+        self._ordered.clear()
+
+    def add(self, user_id: str, name: str, ts: float, archivable: bool = True) -> None:
+        """加入或覆盖一个事件；archivable=False 的事件（例如本来就是过去时间的纪念日）不会被清理任务归档。"""
+        seq = next(self._seq)
+        self._live.setdefault(user_id, {})[name] = (ts, seq)
+        heapq.heappush(self._heaps.setdefault(user_id, []), (ts, seq, name))
+        if archivable:
+            heapq.heappush(self._sweep_heap, (ts, seq, user_id, name))
+        self._touch(user_id)
+
+    def remove(self, user_id: str, name: str) -> bool:
+        entry = self._live.get(user_id, {}).pop(name, None)
+        if entry is None:
+            return False
+        heap = self._heaps.get(user_id, [])
+        # 作废条目超过一半时重建，避免堆无限增长
+        if len(heap) > 2 * len(self._live[user_id]) + 8:
+            live = self._live[user_id]
+            self._heaps[user_id] = [e for e in heap if live.get(e[2], (None, None))[1] == e[1]]
+            heapq.heapify(self._heaps[user_id])
+        self._touch(user_id)
+        return True
+
+    def _touch(self, user_id: str) -> None:
+        self._ordered.pop(user_id, None)
+
+    def _is_live(self, user_id: str, name: str, seq: int) -> bool:
+        entry = self._live.get(user_id, {}).get(name)
+        return entry is not None and entry[1] == seq
+
+    def ordered(self, user_id: str) -> List[Tuple[str, float]]:
+        """按截止时间从早到晚排列的 [(事件名, 时间戳)]，结果缓存到下一次修改。"""
+        cached = self._ordered.get(user_id)
+        if cached is not None:
+            return cached
+        heap = self._heaps.get(user_id, [])
+        result = [(name, ts) for ts, seq, name in sorted(heap) if self._is_live(user_id, name, seq)]
+        self._ordered[user_id] = result
+        return result
+
+    def next_deadline(self, user_id: str) -> Optional[Tuple[str, float]]:
+        heap = self._heaps.get(user_id, [])
+        while heap and not self._is_live(user_id, heap[0][2], heap[0][1]):
+            heapq.heappop(heap)
+        return (heap[0][2], heap[0][0]) if heap else None
+
+    def pop_expired(self, before_ts: float) -> List[Tuple[str, str]]:
+        """弹出截止时间早于 before_ts 的可归档事件 [(user_id, 事件名)]，并从索引中移除。"""
+        expired: List[Tuple[str, str]] = []
+        while self._sweep_heap and self._sweep_heap[0][0] < before_ts:
+            ts, seq, user_id, name = heapq.heappop(self._sweep_heap)
+            if self._is_live(user_id, name, seq):
+                self.remove(user_id, name)
+                expired.append((user_id, name))
+        return expired
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self._live.values())
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 
@@ -9,7 +10,10 @@ APP_DATA_DIR = APP_ROOT / "data"
 
 def resolve_data_dir() -> Path:
     """Resolve the shared data directory for local and container environments."""
-    if APP_ROOT.exists():
+    override = os.getenv("QQ_DATA_DIR", "").strip()
+    if override:
+        data_dir = Path(override).expanduser()
+    elif APP_ROOT.exists():
         data_dir = APP_DATA_DIR
     else:
         data_dir = PROJECT_ROOT / "data"
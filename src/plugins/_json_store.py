@@ -0,0 +1,255 @@
+import asyncio
+import atexit
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from nonebot.log import logger
+
+from ._ops_metrics import register_ops_section
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # 可选依赖，没有就用标准库 json
+    orjson = None
+
+
+try:
+    JSON_STORE_FLUSH_DELAY_SECONDS = float(os.getenv("JSON_STORE_FLUSH_DELAY_SECONDS", "1.0"))
+except ValueError:
+    JSON_STORE_FLUSH_DELAY_SECONDS = 1.0
+# 写盘失败后的重试间隔：从 1 秒起每次翻倍，最长 60 秒
+_RETRY_MIN_DELAY = 1.0
+_RETRY_MAX_DELAY = 60.0
+
+
+def dumps_compact(data: Any) -> bytes:
+    """紧凑序列化（UTF-8，不转义中文）；装了 orjson 就用 orjson。"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            # orjson 不支持非字符串 key 等情况，退回标准库
+            pass
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+_file_locks: Dict[str, threading.Lock] = {}
+_file_locks_guard = threading.Lock()
+_stores: List["JsonStore"] = []
+_shutdown_hook_registered = False
+
+
+def _file_lock(path: Path) -> threading.Lock:
+    key = str(path.resolve())
+    with _file_locks_guard:
+        lock = _file_locks.get(key)
+        if lock is None:
+            lock = _file_locks[key] = threading.Lock()
+        return lock
+
+
+def _atomic_write(path: Path, payload: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class JsonStore:
+    """单个 JSON 文件的写回缓存：内存里的 data 是权威副本，改完调用 mark_dirty()，
+    由事件循环在 flush_delay 秒后合并写一次盘（线程里原子写入 + rename）。
+
+    文件格式保持插件原来的结构，只是改成紧凑写法；进程退出时会把没写完的数据刷盘。
+    写盘失败时数据留在内存里并按退避间隔自动重试，last_error 记录最近一次失败（成功后清空）。
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        default_factory: Callable[[], Any] = dict,
+        flush_delay: Optional[float] = None,
+    ):
+        self.path = Path(path)
+        self.default_factory = default_factory
+        self.flush_delay = max(0.0, JSON_STORE_FLUSH_DELAY_SECONDS if flush_delay is None else float(flush_delay))
+        self.data: Any = default_factory()
+        self._lock = _file_lock(self.path)
+        self._dirty = False
+        self._disk_mtime_ns: Optional[int] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._retry_delay = 0.0
+        self.last_error: Optional[str] = None
+        self._tasks: set = set()
+        self.counters: Dict[str, int] = {"marks": 0, "flushes": 0, "failed": 0}
+        _stores.append(self)
+        _register_shutdown_hook()
+
+    def load(self) -> Any:
+        """从磁盘读入；文件不存在或损坏时用 default_factory()，并返回 data。"""
+        with self._lock:
+            try:
+                raw = self.path.read_bytes()
+            except FileNotFoundError:
+                raw = None
+            except OSError as e:
+                logger.error(f"读取 {self.path} 失败: {e}")
+                raw = None
+        if raw is None:
+            self.data = self.default_factory()
+        else:
+            try:
+                self.data = loads(raw)
+            except ValueError as e:
+                logger.error(f"解析 {self.path} 失败，使用默认数据: {e}")
+                self.data = self.default_factory()
+        self._dirty = False
+        self._disk_mtime_ns = self._stat_mtime_ns()
+        return self.data
+
+    def _stat_mtime_ns(self) -> Optional[int]:
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def changed_on_disk(self) -> bool:
+        """文件在上次读写之后被外部改过（且内存里没有待写的改动）。"""
+        return not self._dirty and self._stat_mtime_ns() != self._disk_mtime_ns
+
+    def replace(self, data: Any) -> None:
+        self.data = data
+        self.mark_dirty()
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def mark_dirty(self) -> None:
+        """标记有改动。事件循环里调用时延迟合并写盘，没有运行中的循环时直接同步写。"""
+        self._dirty = True
+        self.counters["marks"] += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_delay, self._spawn_flush)
+
+    def _spawn_flush(self) -> None:
+        self._flush_handle = None
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _take_snapshot(self) -> Optional[bytes]:
+        # 在事件循环线程里序列化，避免写盘线程读到正在被修改的 dict
+        if not self._dirty:
+            return None
+        self._dirty = False
+        return dumps_compact(self.data)
+
+    def _write(self, payload: bytes) -> bool:
+        try:
+            with self._lock:
+                _atomic_write(self.path, payload)
+                self._disk_mtime_ns = self._stat_mtime_ns()
+            self.counters["flushes"] += 1
+            self.last_error = None
+            self._retry_delay = 0.0
+            return True
+        except OSError as e:
+            self.counters["failed"] += 1
+            self._dirty = True
+            self.last_error = str(e)
+            logger.error(f"写入 {self.path} 失败: {e}")
+            return False
+
+    def _schedule_retry(self) -> None:
+        # 在事件循环线程里调用；已有待执行的写盘（比如期间又有新改动）就不重复排
+        if self._flush_handle is not None or not self._dirty:
+            return
+        self._retry_delay = min(_RETRY_MAX_DELAY, max(_RETRY_MIN_DELAY, self._retry_delay * 2))
+        logger.warning(f"{self.path.name} 将在 {self._retry_delay:.0f} 秒后重试写盘")
+        self._flush_handle = asyncio.get_running_loop().call_later(self._retry_delay, self._spawn_flush)
+
+    async def flush(self) -> bool:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        payload = self._take_snapshot()
+        if payload is None:
+            return True
+        ok = await asyncio.to_thread(self._write, payload)
+        if not ok:
+            self._schedule_retry()
+        return ok
+
+    def flush_sync(self) -> bool:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        payload = self._take_snapshot()
+        if payload is None:
+            return True
+        return self._write(payload)
+
+    def summary_line(self) -> str:
+        c = self.counters
+        line = f"{self.path.name}: 改动 {c['marks']}，写盘 {c['flushes']}，失败 {c['failed']}{'，待写' if self._dirty else ''}"
+        if self.last_error:
+            line += f"（最近一次失败：{self.last_error}）"
+        return line
+
+
+async def flush_all() -> None:
+    for store in list(_stores):
+        await store.flush()
+
+
+def flush_all_sync() -> None:
+    for store in list(_stores):
+        store.flush_sync()
+
+
+def _register_shutdown_hook() -> None:
+    global _shutdown_hook_registered
+    if _shutdown_hook_registered:
+        return
+    _shutdown_hook_registered = True
+    atexit.register(flush_all_sync)
+    try:
+        from nonebot import get_driver
+
+        get_driver().on_shutdown(flush_all)
+    except Exception:
+        # 没有初始化 nonebot（脚本里单独使用）时只靠 atexit
+        pass
+
+
+def find_store(path: Path) -> Optional[JsonStore]:
+    """已登记的同一文件的 JsonStore（别的插件想读内存里的最新数据时用），没有返回 None。"""
+    key = os.path.abspath(path)
+    for store in _stores:
+        if os.path.abspath(store.path) == key:
+            return store
+    return None
+
+
+def json_store_ops_lines() -> List[str]:
+    return [f"- {s.summary_line()}" for s in _stores]
+
+
+register_ops_section("JSON 存储", json_store_ops_lines)
@@ -0,0 +1,91 @@
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class BridgeBudget:
+    """单条消息的模型调用预算：总耗时 / 调用次数 / 累计 prompt 字节，任一项为 0 表示不限。"""
+
+    def __init__(
+        self,
+        max_seconds: float,
+        max_calls: int,
+        max_prompt_bytes: int,
+        on_exhausted: Optional[Callable[[str], None]] = None,
+    ):
+        self.max_seconds = max(0.0, float(max_seconds))
+        self.max_calls = max(0, int(max_calls))
+        self.max_prompt_bytes = max(0, int(max_prompt_bytes))
+        self.started = time.monotonic()
+        self.calls = 0
+        self.prompt_bytes = 0
+        self.exhausted_reason = ""
+        self._on_exhausted = on_exhausted
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining_seconds(self) -> Optional[float]:
+        if not self.max_seconds:
+            return None
+        return max(0.0, self.max_seconds - self.elapsed())
+
+    def _exhaust(self, reason: str) -> bool:
+        if not self.exhausted_reason:
+            self.exhausted_reason = reason
+            if self._on_exhausted is not None:
+                self._on_exhausted(reason)
+        return False
+
+    def try_charge(self, prompt: str, min_seconds: float = 1.0) -> bool:
+        """预算够就记一次调用并返回 True；不够返回 False 并记下原因。"""
+        if self.exhausted_reason:
+            return False
+        if self.max_calls and self.calls >= self.max_calls:
+            return self._exhaust("calls")
+        size = len((prompt or "").encode("utf-8"))
+        if self.max_prompt_bytes and self.prompt_bytes + size > self.max_prompt_bytes:
+            return self._exhaust("prompt_bytes")
+        remaining = self.remaining_seconds()
+        if remaining is not None and remaining < min_seconds:
+            return self._exhaust("wall_clock")
+
+        self.calls += 1
+        self.prompt_bytes += size
+        return True
+
+    def call_timeout(self, default_timeout: float) -> float:
+        """单次调用的超时不超过剩余预算。"""
+        remaining = self.remaining_seconds()
+        if remaining is None:
+            return default_timeout
+        return max(1.0, min(float(default_timeout), remaining))
+
+    def describe(self) -> str:
+        return (
+            f"calls={self.calls}/{self.max_calls or '∞'} "
+            f"prompt_kb={self.prompt_bytes // 1024}/{(self.max_prompt_bytes // 1024) or '∞'} "
+            f"elapsed={self.elapsed():.1f}s/{self.max_seconds or '∞'}"
+        )
+
+
+class BudgetStats:
+    def __init__(self, max_seconds: float, max_calls: int, max_prompt_bytes: int):
+        self.max_seconds = max_seconds
+        self.max_calls = max_calls
+        self.max_prompt_bytes = max_prompt_bytes
+        self.requests = 0
+        self.exhausted: Dict[str, int] = {}
+
+    def open(self) -> BridgeBudget:
+        self.requests += 1
+        return BridgeBudget(self.max_seconds, self.max_calls, self.max_prompt_bytes, on_exhausted=self._record)
+
+    def _record(self, reason: str) -> None:
+        self.exhausted[reason] = self.exhausted.get(reason, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "exhausted": dict(self.exhausted),
+            "exhausted_total": sum(self.exhausted.values()),
+        }
@@ -0,0 +1,155 @@
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ._openclaw_bridge_registry import normalize_plugin_command
+
+
+# 只读类别：这些命令/工具的结果在短时间内对同群同角色的人都一样
+READONLY_COMMAND_CATEGORIES: Dict[str, str] = {
+    "课表": "schedule",
+    "本周课表": "schedule",
+    "weather": "weather",
+    "help": "help",
+}
+READONLY_TOOL_CATEGORIES: Dict[str, str] = {
+    "weather_now": "weather",
+    "eat_list": "eat_list",
+}
+
+# 会改动只读类别数据的命令：命令头 -> (类别, 需要匹配的子命令；None 表示任意)
+# 插件里 on_command 的别名不经过 normalize_plugin_command 映射，要和正式命令名一起列出
+MUTATING_COMMANDS: Dict[str, Tuple[str, Optional[Tuple[str, ...]]]] = {
+    "添加课程": ("schedule", None),
+    "新增课程": ("schedule", None),
+    "删除课程": ("schedule", None),
+    "移除课程": ("schedule", None),
+    "清空课表": ("schedule", None),
+    "设置开学日期": ("schedule", None),
+    "开学日期": ("schedule", None),
+    "android": ("eat_list", ("add", "del")),
+    "apple": ("eat_list", ("add", "del")),
+}
+
+_PUNCT_RE = re.compile(r"[\s,，.。!！?？~～、;；:：\"'“”‘’()（）【】\[\]]+")
+
+
+def normalize_query(text: str) -> str:
+    t = (text or "").strip().lower()
+    t = re.sub(r"^\s*(浅浅ovo|浅浅)", "", t)
+    return _PUNCT_RE.sub("", t)
+
+
+def hash_files(paths: Iterable[str], max_bytes: int = 16 * 1024 * 1024) -> List[str]:
+    out: List[str] = []
+    for p in paths:
+        try:
+            h = hashlib.sha256()
+            with open(Path(p), "rb") as f:
+                h.update(f.read(max_bytes))
+            out.append(h.hexdigest()[:16])
+        except Exception:
+            out.append(f"path:{p}")
+    return sorted(out)
+
+
+def classify_command(command: str) -> Optional[str]:
+    parts = (command or "").strip().split()
+    if not parts:
+        return None
+    head = normalize_plugin_command(parts[0])
+    return READONLY_COMMAND_CATEGORIES.get(head)
+
+
+def mutated_category(command: str) -> Optional[str]:
+    parts = (command or "").strip().split()
+    if not parts or not parts[0].startswith("/"):
+        return None
+    head = normalize_plugin_command(parts[0])
+    rule = MUTATING_COMMANDS.get(head)
+    if rule is None:
+        return None
+    category, subs = rule
+    if subs is None:
+        return category
+    if len(parts) > 1 and parts[1].lower() in subs:
+        return category
+    return None
+
+
+class BridgeResponseCache:
+    """按（规范化文本、附件哈希、发言角色、群）缓存最终回复，短 TTL。"""
+
+    def __init__(self, ttl_seconds: int, categories: Iterable[str], max_entries: int = 256):
+        self.ttl_seconds = max(0, int(ttl_seconds))
+        self.categories = {c.strip() for c in categories if c and c.strip()}
+        self.max_entries = max(16, int(max_entries))
+        self._items: "OrderedDict[str, Tuple[float, str, Tuple[str, ...]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    @staticmethod
+    def make_key(text: str, attachment_hashes: List[str], role: str, group_id: Any) -> str:
+        raw = "\x1f".join([normalize_query(text), ",".join(attachment_hashes), role or "", str(group_id)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, reply, _ = item
+        if expires_at < time.time():
+            self._items.pop(key, None)
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return reply
+
+    def cacheable_categories(self, used: List[Optional[str]]) -> Optional[Tuple[str, ...]]:
+        """used 为本次执行过的工具类别（None 表示不可缓存的工具）；没执行工具视为 chat。"""
+        if any(c is None for c in used):
+            return None
+        cats = tuple(sorted(set(used))) if used else ("chat",)
+        if not all(c in self.categories for c in cats):
+            return None
+        return cats
+
+    def put(self, key: str, reply: str, categories: Tuple[str, ...]) -> None:
+        if not self.enabled or not reply:
+            return
+        self._items[key] = (time.time() + self.ttl_seconds, reply, categories)
+        self._items.move_to_end(key)
+        self.stores += 1
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def invalidate_category(self, category: str) -> int:
+        keys = [k for k, (_, _, cats) in self._items.items() if category in cats]
+        for k in keys:
+            self._items.pop(k, None)
+        if keys:
+            self.invalidations += 1
+        return len(keys)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl_seconds,
+            "entries": len(self._items),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "invalidations": self.invalidations,
+            "categories": sorted(self.categories),
+        }
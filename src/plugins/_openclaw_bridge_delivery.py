@@ -0,0 +1,186 @@
+import asyncio
+import random
+import re
+from typing import Any, Callable, Dict, List
+
+from nonebot.adapters.onebot.v11 import Bot, Message, MessageEvent
+
+
+_AT_TOKEN_RE = re.compile(r"\[CQ:at,qq=\d+\]")
+# NapCat / go-cqhttp 在发送过快时返回的错误特征
+_RATE_LIMIT_HINTS = ("rate", "too many", "频繁", "过快", "风控", "frequency")
+
+
+def _safe_cut(text: str, limit: int) -> int:
+    """在 limit 附近找切点：优先换行，其次句末标点，且不切断 [CQ:at,...]。"""
+    window = text[:limit]
+    cut = -1
+    for sep in ("\n", "。", "！", "？", "!", "?", "；", ";", "，", ",", " "):
+        idx = window.rfind(sep)
+        if idx >= limit // 2:
+            cut = idx + 1
+            break
+    if cut <= 0:
+        cut = limit
+    for m in _AT_TOKEN_RE.finditer(text, max(0, cut - 32), cut + 32):
+        if m.start() < cut < m.end():
+            cut = m.start() if m.start() > 0 else m.end()
+            break
+    return cut
+
+
+def split_reply(text: str, max_chars: int) -> List[str]:
+    """按段落（空行）拆分长回复，单段超长时再按行/句切，保证每块不超过 max_chars。"""
+    txt = str(text or "").strip()
+    if max_chars <= 0 or len(txt) <= max_chars:
+        return [txt] if txt else []
+
+    chunks: List[str] = []
+    buf = ""
+    for para in re.split(r"\n{2,}", txt):
+        para = para.strip()
+        if not para:
+            continue
+        candidate = f"{buf}\n\n{para}" if buf else para
+        if len(candidate) <= max_chars:
+            buf = candidate
+            continue
+        if buf:
+            chunks.append(buf)
+            buf = ""
+        while len(para) > max_chars:
+            cut = _safe_cut(para, max_chars)
+            head = para[:cut].strip()
+            if head:
+                chunks.append(head)
+            para = para[cut:].strip()
+        buf = para
+    if buf:
+        chunks.append(buf)
+    return chunks
+
+
+def is_rate_limited_error(exc: BaseException) -> bool:
+    """只对限流类错误重试；超时等错误可能已经发出去了，重试会重复发送。"""
+    info = getattr(exc, "info", None)
+    if isinstance(info, dict):
+        blob = f"{info.get('message', '')} {info.get('wording', '')} {info.get('msg', '')}".lower()
+    else:
+        blob = str(exc).lower()
+    return any(h in blob for h in _RATE_LIMIT_HINTS)
+
+
+class ReplyDelivery:
+    """bridge 最终回复的发送阶段：拆块、超阈值打包成合并转发、限流重试。
+
+    同一会话内按顺序发（会话锁），不同会话之间共享一个全局并发上限。
+    """
+
+    def __init__(
+        self,
+        chunk_chars: int = 1500,
+        forward_threshold: int = 3000,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        retry_base_delay: float = 1.0,
+        logger: Any = None,
+    ):
+        self.chunk_chars = max(200, int(chunk_chars))
+        self.forward_threshold = max(0, int(forward_threshold))
+        self.max_retries = max(0, int(max_retries))
+        self.retry_base_delay = max(0.0, float(retry_base_delay))
+        self._global = asyncio.Semaphore(max(1, int(max_concurrency)))
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._logger = logger
+        self.counters: Dict[str, int] = {
+            "single": 0,
+            "chunked": 0,
+            "forward": 0,
+            "forward_fallback": 0,
+            "retries": 0,
+            "failed": 0,
+        }
+
+    def _log(self, level: str, msg: str) -> None:
+        if self._logger is not None:
+            getattr(self._logger, level)(msg)
+
+    def _session_lock(self, event: MessageEvent) -> asyncio.Lock:
+        key = f"g{event.group_id}" if getattr(event, "group_id", None) else f"u{event.user_id}"
+        lock = self._session_locks.get(key)
+        if lock is None:
+            if len(self._session_locks) > 512:
+                for k in [k for k, v in self._session_locks.items() if not v.locked()]:
+                    self._session_locks.pop(k, None)
+            lock = asyncio.Lock()
+            self._session_locks[key] = lock
+        return lock
+
+    async def _with_retry(self, label: str, send: Callable[[], Any]) -> Any:
+        attempt = 0
+        while True:
+            try:
+                async with self._global:
+                    return await send()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_rate_limited_error(e):
+                    raise
+                attempt += 1
+                self.counters["retries"] += 1
+                delay = self.retry_base_delay * (2 ** (attempt - 1)) * (1 + random.random() * 0.5)
+                self._log("warning", f"openclaw_bridge {label} rate limited, retry {attempt}/{self.max_retries} in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def _send_forward(self, bot: Bot, event: MessageEvent, chunks: List[str], render: Callable[[str], Message]) -> None:
+        nodes = [
+            {"type": "node", "data": {"uin": str(bot.self_id), "content": render(chunk)}}
+            for chunk in chunks
+        ]
+        if getattr(event, "message_type", "") == "group":
+            await self._with_retry(
+                "forward",
+                lambda: bot.call_api("send_group_forward_msg", group_id=event.group_id, messages=nodes),
+            )
+        else:
+            await self._with_retry(
+                "forward",
+                lambda: bot.call_api("send_private_forward_msg", user_id=event.user_id, messages=nodes),
+            )
+
+    async def _send_chunks(self, bot: Bot, event: MessageEvent, chunks: List[str], render: Callable[[str], Message]) -> None:
+        # 同一会话内逐块顺序发送（保证顺序）；会话锁之外的其它会话在全局并发上限内照常并行
+        for chunk in chunks:
+            await self._with_retry("send", lambda m=render(chunk): bot.send(event, m))
+
+    async def deliver(self, bot: Bot, event: MessageEvent, text: str, render: Callable[[str], Message]) -> None:
+        txt = str(text or "").strip()
+        if not txt:
+            return
+        async with self._session_lock(event):
+            chunks = split_reply(txt, self.chunk_chars)
+            try:
+                if len(chunks) <= 1:
+                    self.counters["single"] += 1
+                    await self._with_retry("send", lambda: bot.send(event, render(txt)))
+                    return
+                if self.forward_threshold and len(txt) > self.forward_threshold:
+                    try:
+                        await self._send_forward(bot, event, chunks, render)
+                        self.counters["forward"] += 1
+                        return
+                    except Exception as e:
+                        # 合并转发失败时退回逐块发送，和 pic.py 的降级思路一致
+                        self.counters["forward_fallback"] += 1
+                        self._log("warning", f"openclaw_bridge forward delivery failed, falling back to chunks: {e}")
+                self.counters["chunked"] += 1
+                await self._send_chunks(bot, event, chunks, render)
+            except Exception:
+                self.counters["failed"] += 1
+                raise
+
+    def summary_line(self) -> str:
+        c = self.counters
+        return (
+            f"单条 {c['single']}，分段 {c['chunked']}，合并转发 {c['forward']}（降级 {c['forward_fallback']}），"
+            f"限流重试 {c['retries']}，失败 {c['failed']}"
+        )
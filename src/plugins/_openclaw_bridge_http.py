@@ -0,0 +1,38 @@
+from typing import Optional
+
+import httpx
+
+
+# bridge 共用一个 AsyncClient：TLS 上下文只建一次，同域名的连接可以复用
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=20.0,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+        )
+    return _client
+
+
+async def prewarm_hosts(urls: list[str], timeout: float = 5.0) -> int:
+    """对常用域名发一个 HEAD，提前完成 DNS/TCP/TLS 握手；返回成功连上的数量（状态码不重要）。"""
+    client = get_http_client()
+    ok = 0
+    for u in urls:
+        try:
+            await client.head(u, timeout=timeout)
+            ok += 1
+        except Exception:
+            continue
+    return ok
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
@@ -4,7 +4,7 @@ from pathlib import Path
 from typing import Optional
 from urllib.parse import urlparse
 
-import httpx
+from ._openclaw_bridge_http import get_http_client
 
 
 def extract_image_urls_from_segments(segments) -> list[str]:
@@ -84,22 +84,22 @@ async def download_image_to_local(url: str, image_dir: Path, max_bytes: int, log
     image_dir.mkdir(parents=True, exist_ok=True)
 
     try:
-        async with httpx.AsyncClient(timeout=20.0, follow_redirects=True) as client:
-            resp = await client.get(u)
-            resp.raise_for_status()
-            blob = resp.content
-            if not blob:
-                return None
-            if len(blob) > max_bytes:
-                logger.warning(f"image too large: {len(blob)} bytes > {max_bytes}")
-                return None
-
-            ext = guess_image_ext(u, resp.headers.get("content-type", ""))
-            digest = hashlib.md5(blob[:8192]).hexdigest()[:12]
-            ts = int(datetime.utcnow().timestamp() * 1000)
-            out = image_dir / f"qq_{ts}_{digest}{ext}"
-            out.write_bytes(blob)
-            return str(out)
+        client = get_http_client()
+        resp = await client.get(u, timeout=20.0)
+        resp.raise_for_status()
+        blob = resp.content
+        if not blob:
+            return None
+        if len(blob) > max_bytes:
+            logger.warning(f"image too large: {len(blob)} bytes > {max_bytes}")
+            return None
+
+        ext = guess_image_ext(u, resp.headers.get("content-type", ""))
+        digest = hashlib.md5(blob[:8192]).hexdigest()[:12]
+        ts = int(datetime.utcnow().timestamp() * 1000)
+        out = image_dir / f"qq_{ts}_{digest}{ext}"
+        out.write_bytes(blob)
+        return str(out)
     except Exception as exc:
         logger.warning(f"download image failed: {exc}")
         return None
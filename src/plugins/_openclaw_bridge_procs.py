@@ -0,0 +1,208 @@
+import asyncio
+import os
+import signal
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+try:
+    import psutil
+except Exception:  # pragma: no cover
+    psutil = None
+
+
+class _ChildRecord:
+    __slots__ = ("proc", "label", "started_at", "rss_bytes", "kill_reason", "watcher")
+
+    def __init__(self, proc: asyncio.subprocess.Process, label: str):
+        self.proc = proc
+        self.label = label
+        self.started_at = time.time()
+        self.rss_bytes = 0
+        self.kill_reason = ""
+        self.watcher: Optional[asyncio.Task] = None
+
+
+class ProcessSupervisor:
+    """bridge 子进程（OpenClaw / ASR）的统一托管。
+
+    - 每个子进程单独一个进程组（start_new_session），超时/取消时整组杀掉，
+      Node 派生的孙进程不会被遗留
+    - 后台 watcher 负责 wait() 回收，避免僵尸进程
+    - 可选按 RSS 上限采样（需要 psutil），超限整组杀掉
+    """
+
+    def __init__(self, rss_limit_mb: int = 0, sample_interval: float = 2.0, kill_grace: float = 3.0, logger=None):
+        self.rss_limit_bytes = max(0, int(rss_limit_mb)) * 1024 * 1024
+        self.sample_interval = max(0.2, float(sample_interval))
+        self.kill_grace = max(0.0, float(kill_grace))
+        self.logger = logger
+        self._children: Dict[int, _ChildRecord] = {}
+        # 已回收进程的终止原因，供调用方在 wait() 之后查询
+        self._exit_reasons: Dict[int, str] = {}
+        self._counters: Dict[str, int] = {"spawned": 0, "killed_timeout": 0, "killed_cancel": 0, "killed_rss": 0}
+
+    def _log(self, level: str, msg: str) -> None:
+        if self.logger is not None:
+            getattr(self.logger, level)(msg)
+
+    async def spawn(
+        self,
+        label: str,
+        *cmd: str,
+        env: Optional[Dict[str, str]] = None,
+        stdout: Any = asyncio.subprocess.PIPE,
+        stderr: Any = asyncio.subprocess.PIPE,
+        stdin: Any = None,
+    ) -> asyncio.subprocess.Process:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=stdin,
+            stdout=stdout,
+            stderr=stderr,
+            env=env,
+            start_new_session=True,
+        )
+        rec = _ChildRecord(proc, label)
+        self._children[proc.pid] = rec
+        self._counters["spawned"] += 1
+        rec.watcher = asyncio.create_task(self._watch(rec))
+        return proc
+
+    async def _watch(self, rec: _ChildRecord) -> None:
+        proc = rec.proc
+        try:
+            while proc.returncode is None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(proc.wait()), timeout=self.sample_interval)
+                except asyncio.TimeoutError:
+                    rec.rss_bytes = self._sample_rss(proc.pid)
+                    if self.rss_limit_bytes and rec.rss_bytes > self.rss_limit_bytes and not rec.kill_reason:
+                        self._log(
+                            "warning",
+                            f"bridge subprocess {rec.label} pid={proc.pid} rss={rec.rss_bytes // (1024 * 1024)}MB "
+                            f"over limit {self.rss_limit_bytes // (1024 * 1024)}MB, killing group",
+                        )
+                        self._counters["killed_rss"] += 1
+                        await self.terminate(proc, "rss")
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._children.pop(proc.pid, None)
+            if rec.kill_reason:
+                self._exit_reasons[proc.pid] = rec.kill_reason
+                if len(self._exit_reasons) > 64:
+                    self._exit_reasons.pop(next(iter(self._exit_reasons)))
+
+    @staticmethod
+    def _sample_rss(pid: int) -> int:
+        if psutil is None:
+            return 0
+        try:
+            root = psutil.Process(pid)
+            total = root.memory_info().rss
+            for child in root.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except Exception:
+                    continue
+            return int(total)
+        except Exception:
+            return 0
+
+    @staticmethod
+    def _signal_group(pid: int, sig: int) -> None:
+        try:
+            os.killpg(pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+        except Exception:
+            try:
+                os.kill(pid, sig)
+            except Exception:
+                pass
+
+    async def terminate(self, proc: asyncio.subprocess.Process, reason: str = "") -> None:
+        """整组 SIGTERM，宽限期后 SIGKILL，并等待回收。"""
+        rec = self._children.get(proc.pid)
+        if rec is not None and reason and not rec.kill_reason:
+            rec.kill_reason = reason
+        if proc.returncode is None:
+            self._signal_group(proc.pid, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(asyncio.shield(proc.wait()), timeout=self.kill_grace)
+            except asyncio.TimeoutError:
+                pass
+        # 主进程已退出时组内可能还有孙进程，统一补一刀
+        self._signal_group(proc.pid, signal.SIGKILL)
+        if proc.returncode is None:
+            try:
+                await asyncio.wait_for(asyncio.shield(proc.wait()), timeout=5)
+            except asyncio.TimeoutError:
+                self._log("warning", f"bridge subprocess pid={proc.pid} did not exit after SIGKILL")
+
+    def kill_reason(self, proc: asyncio.subprocess.Process) -> str:
+        rec = self._children.get(proc.pid)
+        if rec is not None:
+            return rec.kill_reason
+        return self._exit_reasons.pop(proc.pid, "")
+
+    async def run(
+        self,
+        label: str,
+        cmd: Sequence[str],
+        timeout: float,
+        env: Optional[Dict[str, str]] = None,
+    ) -> Tuple[Optional[int], bytes, bytes, str]:
+        """一次性执行并收集输出，返回 (returncode, stdout, stderr, status)。
+
+        status: ok / timeout / rss / error
+        """
+        try:
+            proc = await self.spawn(label, *cmd, env=env)
+        except Exception as exc:
+            self._log("warning", f"bridge subprocess {label} start failed: {exc}")
+            return None, b"", str(exc).encode("utf-8", errors="ignore"), "error"
+
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._counters["killed_timeout"] += 1
+            await self.terminate(proc, "timeout")
+            return proc.returncode, b"", b"", "timeout"
+        except asyncio.CancelledError:
+            self._counters["killed_cancel"] += 1
+            await self.terminate(proc, "cancel")
+            raise
+
+        reason = self.kill_reason(proc)
+        # 主进程退出后把组里残留的孙进程也清掉
+        self._signal_group(proc.pid, signal.SIGKILL)
+        return proc.returncode, stdout, stderr, (reason or "ok")
+
+    async def shutdown(self) -> None:
+        """退出时整组清理所有仍存活的子进程。"""
+        for rec in list(self._children.values()):
+            await self.terminate(rec.proc, "shutdown")
+
+    def count_kill(self, reason: str) -> None:
+        key = f"killed_{reason}"
+        self._counters[key] = self._counters.get(key, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        by_label: Dict[str, int] = {}
+        rss_total = 0
+        oldest = 0.0
+        now = time.time()
+        for rec in self._children.values():
+            by_label[rec.label] = by_label.get(rec.label, 0) + 1
+            rss_total += rec.rss_bytes
+            oldest = max(oldest, now - rec.started_at)
+        return {
+            "live": len(self._children),
+            "by_label": by_label,
+            "rss_mb": round(rss_total / (1024 * 1024), 1),
+            "oldest_seconds": int(oldest),
+            "rss_limit_mb": self.rss_limit_bytes // (1024 * 1024),
+            "psutil": psutil is not None,
+            **self._counters,
+        }
@@ -81,7 +81,18 @@ def build_tool_followup_prompt(
     )
 
 
-def build_exec_prompt(role_prompt: str, user_text: str, attachment_context: str = "", plugin_catalog: str = "") -> str:
+def build_exec_prompt(
+    role_prompt: str,
+    user_text: str,
+    attachment_context: str = "",
+    plugin_catalog: str = "",
+    history_summary: str = "",
+) -> str:
+    history_block = (
+        "此前对话摘要（旧会话已归档，仅供参考，不要逐条复述）：\n"
+        f"{history_summary}\n\n"
+        if history_summary else ""
+    )
     return (
         f"{role_prompt}\n\n"
         "你现在处于执行模式。目标是：先判断是否需要工具，再给最终结果。\n"
@@ -99,7 +110,7 @@ def build_exec_prompt(role_prompt: str, user_text: str, attachment_context: str
         "   {\"tool\":\"plugin_command\",\"args\":{\"command\":\"/todo list\"}}\n"
         "3) plugin_batch（批量命令）:\n"
         "   {\"tool\":\"plugin_batch\",\"args\":{\"commands\":[\"/添加课程 课程A|老师|地点|1|1|2|1-16\",\"/添加课程 课程B|老师|地点|2|3|4|1-16\"]}}\n\n"
-        f"{plugin_catalog + chr(10) if plugin_catalog else ""}"
+        f"{plugin_catalog + chr(10) if plugin_catalog else ''}"
         "输出规则：\n"
         "- 若需要本地插件：输出一行 JSON（不要 markdown，不要解释）。\n"
         "- 若只需 OpenClaw 原生工具即可完成任务（不限于联网），直接调用并返回最终答案，不要说‘没有接口’。\n"
@@ -112,6 +123,7 @@ def build_exec_prompt(role_prompt: str, user_text: str, attachment_context: str
         "- 插件执行成功后，先理解插件输出，再用自然话术整理回复，不要原样粘贴。\n"
         "- 如果不需要任何工具，直接自然回复。\n"
         f"{attachment_context + chr(10) if attachment_context else ''}"
+        f"{history_block}"
         f"用户消息：{user_text}"
     )
 
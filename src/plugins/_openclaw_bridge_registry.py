@@ -29,6 +29,7 @@ FALLBACK_PLUGIN_COMMANDS: Dict[str, str] = {
     "mvpic": "重命名索引项",
     "listpic": "列出图片索引",
     "randpic": "随机图片",
+    "picdups": "相似图片报告",
     "android": "今天吃啥（android）",
     "apple": "今天吃啥（apple）",
     "ping": "连通性检测",
@@ -44,6 +45,7 @@ FALLBACK_PLUGIN_ALIASES: Dict[str, str] = {
     "天气": "weather",
     "tex": "latex",
     "随机表情": "randpic",
+    "相似表情": "picdups",
     "帮助": "help",
 }
 
@@ -119,6 +121,12 @@ def _refresh_cache_if_needed(force: bool = False) -> None:
         _cache_at = now
 
 
+def warm_plugin_catalog() -> int:
+    """强制加载一次 help 目录（bot 连上后预热用），返回命令数。"""
+    _refresh_cache_if_needed(force=True)
+    return len(_cache_commands)
+
+
 def normalize_plugin_command(command: str) -> str:
     _refresh_cache_if_needed()
     c = (command or "").strip().lstrip("/")
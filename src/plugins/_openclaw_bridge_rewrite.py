@@ -0,0 +1,427 @@
+import random
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ._openclaw_bridge_registry import normalize_plugin_command
+
+
+# 常见插件输出的本地改写：解析插件原文 -> 套一段口语化模板。
+# 解析不了的输出返回 None，由调用方退回 OpenClaw 改写。
+
+_EMOJI_RE = re.compile("[\U0001F300-\U0001FAFF☀-➿⬜⬛️‍]")
+
+
+def _strip_emoji(text: str) -> str:
+    return _EMOJI_RE.sub("", text or "").strip()
+
+
+def _join(items: List[str], limit: int = 8) -> str:
+    items = [x for x in items if x]
+    if not items:
+        return ""
+    more = ""
+    if len(items) > limit:
+        more = f"等 {len(items)} 项"
+        items = items[:limit]
+    if len(items) == 1:
+        return items[0] + more
+    return "、".join(items[:-1]) + "和" + items[-1] + more
+
+
+def _pick(rng: random.Random, options: List[str]) -> str:
+    return options[rng.randrange(len(options))]
+
+
+# ---------- todo ----------
+
+_TODO_ITEM_RE = re.compile(r"^\s*(\d+)\.\s*(✅|⬜️|⬜)\s*(.+?)\s*$")
+_TODO_SECTION_RE = re.compile(r"^(?:💼|🎮)\s*(工作|娱乐)\s*\((\d+)/(\d+)\s*未完成\)")
+_TODO_CAT_LIST_RE = re.compile(r"你的(工作|娱乐)待办事项列表")
+
+
+def _todo_items(lines: List[str]) -> Tuple[List[str], List[str]]:
+    pending: List[str] = []
+    done: List[str] = []
+    for ln in lines:
+        m = _TODO_ITEM_RE.match(ln)
+        if not m:
+            continue
+        task = m.group(3).strip()
+        if m.group(2) == "✅":
+            done.append(task.strip("~"))
+        else:
+            pending.append(task)
+    return pending, done
+
+
+def _render_todo(text: str, rng: random.Random) -> Optional[str]:
+    lines = text.splitlines()
+    first = lines[0] if lines else ""
+
+    m = re.match(r"^(?:💼|🎮)\s*已添加(工作|娱乐)待办事项：", first)
+    if m and len(lines) >= 2:
+        task = lines[1].lstrip("- ").strip()
+        return _pick(rng, [
+            f"好嘞，已经把「{task}」记进{m.group(1)}待办啦。",
+            f"记下了～「{task}」加到{m.group(1)}待办里了。",
+            f"搞定，{m.group(1)}待办里多了一条「{task}」。",
+        ])
+
+    m = re.match(r"^🎉\s*已完成\s*(\d+)\s*项任务", first)
+    if m:
+        extra = ""
+        if "小问题" in text:
+            issues = [ln.strip() for ln in lines if ln.strip() and not ln.startswith("🎉") and "小问题" not in ln]
+            extra = "不过" + "；".join(issues) if issues else ""
+        base = _pick(rng, [
+            f"好耶，{m.group(1)} 项已经勾掉啦！",
+            f"完成 {m.group(1)} 项，干得漂亮～",
+            f"已经帮你把 {m.group(1)} 项标成完成了。",
+        ])
+        return base + extra
+
+    m = re.match(r"^✨\s*已为你清除\s*(\d+)\s*项", first)
+    if m:
+        return _pick(rng, [
+            f"清理好了，{m.group(1)} 条已完成的待办都删掉啦。",
+            f"已完成的 {m.group(1)} 条待办已经清掉了，列表清爽多了。",
+        ])
+
+    if first.startswith("你还没有任何") and "待办事项" in first:
+        cat = "工作" if "工作" in first else ("娱乐" if "娱乐" in first else "")
+        return _pick(rng, [
+            f"你现在还没有{cat}待办哦，要加的话直接跟我说就行。",
+            f"{cat}待办目前是空的～想记点什么随时告诉我。",
+        ])
+
+    if first.startswith("📋") and "你的待办事项" in first:
+        sections: List[Tuple[str, List[str], List[str]]] = []
+        current: Optional[str] = None
+        buf: List[str] = []
+        for ln in lines[1:]:
+            sm = _TODO_SECTION_RE.match(ln.strip())
+            if sm:
+                if current is not None:
+                    sections.append((current, *_todo_items(buf)))
+                current, buf = sm.group(1), []
+                continue
+            buf.append(ln)
+        if current is not None:
+            sections.append((current, *_todo_items(buf)))
+        if not sections:
+            return None
+        parts = []
+        done_total = 0
+        for cat, pending, done in sections:
+            done_total += len(done)
+            if pending:
+                parts.append(f"{cat}还有 {len(pending)} 件没做：{_join(pending)}")
+            else:
+                parts.append(f"{cat}的都做完了")
+        body = "；".join(parts)
+        tail = f"，另外已经完成了 {done_total} 件" if done_total else ""
+        return _pick(rng, ["帮你看了下待办，", "你的待办情况：", ""]) + body + tail + "。"
+
+    if _TODO_CAT_LIST_RE.search(first):
+        cat = _TODO_CAT_LIST_RE.search(first).group(1)
+        pending, done = _todo_items(lines[1:])
+        if not pending and not done:
+            return None
+        if not pending:
+            return f"{cat}待办已经全部完成啦，一共 {len(done)} 件，辛苦了～"
+        tail = f"，已完成 {len(done)} 件" if done else ""
+        return _pick(rng, [
+            f"{cat}待办还剩 {len(pending)} 件：{_join(pending)}{tail}。",
+            f"你的{cat}待办里还有 {_join(pending)} 没做{tail}。",
+        ])
+    return None
+
+
+# ---------- countdown ----------
+
+def _relative_phrase(rel: str) -> str:
+    rel = rel.strip()
+    if rel.startswith("剩余："):
+        return "还有 " + rel[len("剩余："):]
+    if rel.startswith("已过去："):
+        return "已经过去 " + rel[len("已过去："):]
+    return rel
+
+
+def _short_time(raw: str) -> str:
+    # 2025-12-31T18:00:00+08:00 / 2025-12-31 18:00:00 -> 2025-12-31 18:00
+    t = raw.strip().replace("T", " ")
+    t = re.sub(r"[+-]\d{2}:\d{2}$", "", t)
+    t = re.sub(r":00$", "", t) if re.search(r"\d{2}:\d{2}:00$", t) else t
+    return t.replace(" 00:00", "")
+
+
+def _render_countdown(text: str, rng: random.Random) -> Optional[str]:
+    lines = [ln.rstrip() for ln in text.splitlines()]
+    first = lines[0] if lines else ""
+
+    if first.startswith("✅ 已添加倒计时事件"):
+        name = deadline = rel = ""
+        for ln in lines:
+            s = ln.strip()
+            if s.startswith("📌 事件："):
+                name = s[len("📌 事件："):]
+            elif s.startswith("⏰ 截止："):
+                deadline = s[len("⏰ 截止："):]
+            elif s.startswith("⏳"):
+                rel = s.lstrip("⏳ ").strip()
+        if not name:
+            return None
+        return _pick(rng, [
+            f"记下啦，「{name}」定在 {_short_time(deadline)}，现在{_relative_phrase(rel)}。",
+            f"好的，已经加上「{name}」的倒计时（{_short_time(deadline)}），{_relative_phrase(rel)}。",
+        ])
+
+    if first.startswith("🗑️ 已删除事件："):
+        name = first[len("🗑️ 已删除事件："):].strip()
+        return _pick(rng, [f"「{name}」这个倒计时已经删掉了。", f"好的，「{name}」的倒计时移除了。"])
+
+    if first.startswith("📌 事件："):
+        name = first[len("📌 事件："):].strip()
+        deadline = rel = ""
+        for ln in lines[1:]:
+            s = ln.strip()
+            if s.startswith("⏰ 截止时间："):
+                deadline = s[len("⏰ 截止时间："):]
+            elif s.startswith("⏳"):
+                rel = s.lstrip("⏳ ").strip()
+        if not rel:
+            return None
+        return _pick(rng, [
+            f"距离「{name}」（{_short_time(deadline)}）{_relative_phrase(rel)}。",
+            f"「{name}」在 {_short_time(deadline)}，{_relative_phrase(rel)}。",
+        ])
+
+    if first.startswith("⏰ 你的所有倒计时事件"):
+        events: List[str] = []
+        name = deadline = ""
+        for ln in lines[1:]:
+            s = ln.strip()
+            if s.startswith("📌"):
+                name = s.lstrip("📌 ").strip()
+            elif s.startswith("截止："):
+                deadline = s[len("截止："):]
+            elif (s.startswith("剩余：") or s.startswith("已过去：")) and name:
+                events.append(f"「{name}」{_relative_phrase(s)}")
+                name = deadline = ""
+        if not events:
+            return None
+        return _pick(rng, ["帮你看了下：", "你的倒计时：", ""]) + "；".join(events) + "。"
+
+    if first.startswith("你还没有添加任何倒计时事件"):
+        return "你还没有倒计时哦，想记什么日子告诉我名字和时间就行。"
+    return None
+
+
+# ---------- schedule ----------
+
+_COURSE_NAME_RE = re.compile(r"^📕\s*(.+)$")
+_COURSE_TIME_RE = re.compile(r"^🕒\s*第(\S+?)节\s*\(([^)]*)\)")
+_COURSE_LOC_RE = re.compile(r"^📍\s*(.+)$")
+
+
+def _parse_courses(lines: List[str]) -> List[Dict[str, str]]:
+    courses: List[Dict[str, str]] = []
+    cur: Dict[str, str] = {}
+    for ln in lines:
+        s = ln.strip()
+        m = _COURSE_NAME_RE.match(s)
+        if m:
+            if cur:
+                courses.append(cur)
+            cur = {"name": m.group(1).strip()}
+            continue
+        m = _COURSE_TIME_RE.match(s)
+        if m and cur:
+            cur["sections"] = m.group(1)
+            cur["time"] = m.group(2).strip()
+            continue
+        m = _COURSE_LOC_RE.match(s)
+        if m and cur:
+            cur["location"] = m.group(1).strip()
+    if cur:
+        courses.append(cur)
+    return courses
+
+
+def _course_phrase(c: Dict[str, str]) -> str:
+    when = c.get("time") or (f"第{c['sections']}节" if c.get("sections") else "")
+    where = c.get("location", "")
+    where = "" if where in {"", "未知地点"} else f"在{where}"
+    return f"{when} {where}上{c['name']}".strip() if (when or where) else c["name"]
+
+
+def _render_schedule(text: str, rng: random.Random) -> Optional[str]:
+    lines = text.splitlines()
+    first = lines[0].strip() if lines else ""
+
+    if "没有课" in first and len(lines) <= 2:
+        # 插件原文已经是口语了
+        return first
+
+    m = re.match(r"^📅\s*(星期.)（第(\d+)周）的课表", first)
+    if m:
+        courses = _parse_courses(lines[1:])
+        if not courses:
+            return None
+        body = "；".join(_course_phrase(c) for c in courses)
+        return _pick(rng, [
+            f"{m.group(1)}（第{m.group(2)}周）一共 {len(courses)} 节课：{body}。",
+            f"第{m.group(2)}周{m.group(1)}有 {len(courses)} 节课，{body}。",
+        ])
+
+    m = re.match(r"^📅\s*本周（第(\d+)周）课表", first)
+    if m:
+        day = ""
+        per_day: List[Tuple[str, List[str]]] = []
+        buf: List[str] = []
+        for ln in lines[1:]:
+            dm = re.match(r"^---\s*(星期.)\s*---$", ln.strip())
+            if dm:
+                if day:
+                    per_day.append((day, buf))
+                day, buf = dm.group(1), []
+                continue
+            buf.append(ln)
+        if day:
+            per_day.append((day, buf))
+        if not per_day:
+            return None
+        parts = []
+        for d, buf in per_day:
+            names = [c["name"] for c in _parse_courses(buf)]
+            if names:
+                parts.append(f"{d}{_join(names)}")
+        if not parts:
+            return None
+        return f"第{m.group(1)}周的课：" + "；".join(parts) + "。"
+    return None
+
+
+# ---------- weather ----------
+
+def _render_weather(text: str, rng: random.Random) -> Optional[str]:
+    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    alert = ""
+    city = ""
+    now_desc = ""
+    extra = ""
+    days: List[str] = []
+    in_days = False
+    for ln in lines:
+        if ln.startswith("⚠️"):
+            alert = ln.strip("⚠️[] ").strip()
+        elif ln.startswith("🏙️") and "当前天气" in ln:
+            city = ln.lstrip("🏙️ ").split(" - ")[0].strip()
+        elif ln.startswith("└ 🌦️"):
+            m = re.match(r"└ 🌦️\s*(.+?)\s*\|\s*([-\d.]+)°C\s*\(体感\s*([-\d.]+)°C\)", ln)
+            if m:
+                now_desc = f"{m.group(1)}，{m.group(2)}°C（体感 {m.group(3)}°C）"
+        elif ln.startswith("└ 💧"):
+            m = re.match(r"└ 💧\s*(\d+)%\s*\|\s*🌬️\s*([\d.]+)\s*m/s\s*\|\s*☔\s*(\d+)%", ln)
+            if m:
+                extra = f"湿度 {m.group(1)}%，风速 {m.group(2)} m/s，降水概率 {m.group(3)}%"
+        elif ln.startswith("📅"):
+            in_days = True
+        elif in_days and ln.startswith("└"):
+            m = re.match(r"└\s*(\d{2})-(\d{2}):\s*(.+?),\s*([-\d.]+)~([-\d.]+)°C", ln)
+            if m:
+                days.append(f"{int(m.group(1))}月{int(m.group(2))}日{m.group(3)} {m.group(4)}~{m.group(5)}°C")
+    if not city or not now_desc:
+        return None
+
+    out = _pick(rng, [f"{city}现在{now_desc}", f"{city}这会儿{now_desc}"])
+    if extra:
+        out += f"，{extra}"
+    out += "。"
+    if alert:
+        out = f"注意有{alert}！" + out
+    if days:
+        out += "接下来几天：" + "；".join(days) + "。"
+    return out
+
+
+# ---------- eat ----------
+
+def _render_eat(text: str, rng: random.Random) -> Optional[str]:
+    t = text.strip()
+    m = re.match(r"^(.*?)浅浅推荐你吃：(.+?)(?:（没有找到图片）)?$", t)
+    if m:
+        greeting = m.group(1).strip()
+        food = m.group(2).strip()
+        return greeting + _pick(rng, [f"今天就吃{food}吧～", f"要不试试{food}？", f"推荐你吃{food}！"])
+    m = re.match(r"^已将“(.+?)”添加到 \[(\w+)\] 列表！$", t)
+    if m:
+        return f"好嘞，{m.group(1)}加进 {m.group(2)} 的菜单了。"
+    m = re.match(r"^已从 \[(\w+)\] 列表中删除“(.+?)”！$", t)
+    if m:
+        return f"{m.group(2)}已经从 {m.group(1)} 的菜单里删掉了。"
+    return None
+
+
+# ---------- status ----------
+
+def _render_status(text: str, rng: random.Random) -> Optional[str]:
+    fields: Dict[str, str] = {}
+    disks: List[str] = []
+    in_disk = False
+    for ln in text.splitlines():
+        s = ln.strip()
+        if s == "Disk:":
+            in_disk = True
+            continue
+        if in_disk and ":" in s:
+            mount, pct = s.rsplit(":", 1)
+            disks.append(f"{mount.strip()} {pct.strip()}")
+            continue
+        if ":" in s and not ln.startswith(" "):
+            k, v = s.split(":", 1)
+            fields[k.strip()] = v.strip()
+    if "CPU" not in fields or "Memory" not in fields:
+        return None
+    out = f"服务器现在 CPU {fields['CPU']}，内存 {fields['Memory']}"
+    if fields.get("Available"):
+        out += f"，可用 {fields['Available']}"
+    if disks:
+        out += f"，磁盘 {'、'.join(disks[:3])}"
+    out += "。"
+    if fields.get("Runtime"):
+        out += f"已经运行 {fields['Runtime']}。"
+    return _pick(rng, ["", "看了下，"]) + out
+
+
+_RENDERERS: Dict[str, Callable[[str, random.Random], Optional[str]]] = {
+    "todo": _render_todo,
+    "countdown": _render_countdown,
+    "课表": _render_schedule,
+    "本周课表": _render_schedule,
+    "weather": _render_weather,
+    "android": _render_eat,
+    "apple": _render_eat,
+    "status": _render_status,
+}
+
+
+def render_plugin_output(plugin_command: str, output_text: str, rng: Optional[random.Random] = None) -> Optional[str]:
+    """按插件命令选模板改写输出；模板覆盖不到时返回 None。"""
+    text = (output_text or "").strip()
+    cmd = (plugin_command or "").strip()
+    if not text or not cmd:
+        return None
+
+    head = normalize_plugin_command(cmd.split()[0])
+    renderer = _RENDERERS.get(head)
+    if renderer is None:
+        return None
+    try:
+        out = renderer(text, rng or random)
+    except Exception:
+        return None
+    if not out:
+        return None
+    return _strip_emoji(out) or None
@@ -0,0 +1,143 @@
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+def _clip(text: str, limit: int) -> str:
+    t = " ".join(str(text or "").split())
+    if len(t) <= limit:
+        return t
+    return t[: max(0, limit - 1)].rstrip() + "…"
+
+
+class StickySessionManager:
+    """sticky 会话的轮换管理。
+
+    每个基础会话（如 qq-group-<gid>）记录轮次与累计字节数，超过阈值时
+    切换到新的 session id（qq-group-<gid>:r<N>），并把最近几轮对话压缩成
+    一段本地摘要，在新会话的第一轮带上，从而让每轮成本保持稳定。
+    """
+
+    def __init__(
+        self,
+        state_file: Path,
+        max_turns: int,
+        max_bytes: int,
+        summary_chars: int = 800,
+        recent_keep: int = 6,
+    ):
+        self.state_file = state_file
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.summary_chars = max(200, summary_chars)
+        self.recent_keep = max(1, recent_keep)
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.state_file.exists():
+            return
+        try:
+            obj = json.loads(self.state_file.read_text(encoding="utf-8"))
+        except Exception:
+            return
+        if isinstance(obj, dict):
+            self._state = {str(k): v for k, v in obj.items() if isinstance(v, dict)}
+
+    def _save(self) -> None:
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_file.with_suffix(self.state_file.suffix + ".tmp")
+            tmp.write_text(json.dumps(self._state, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.state_file)
+        except Exception:
+            pass
+
+    def _entry(self, base_id: str) -> Dict[str, Any]:
+        self._load()
+        item = self._state.get(base_id)
+        if not isinstance(item, dict):
+            item = {
+                "generation": 0,
+                "turns": 0,
+                "bytes": 0,
+                "recent": [],
+                "summary": "",
+                "summary_pending": False,
+                "rotated_at": 0.0,
+            }
+            self._state[base_id] = item
+        return item
+
+    def current_session_id(self, base_id: str) -> str:
+        gen = int(self._entry(base_id).get("generation", 0) or 0)
+        # 第 0 代沿用旧 id，升级后已有的 sticky 历史不会丢
+        if gen <= 0:
+            return base_id
+        return f"{base_id}:r{gen}"
+
+    def pending_summary(self, base_id: str) -> str:
+        """新会话尚未带过摘要时返回摘要文本，否则返回空串。"""
+        item = self._entry(base_id)
+        if not item.get("summary_pending"):
+            return ""
+        return str(item.get("summary", "") or "")
+
+    def _build_summary(self, item: Dict[str, Any]) -> str:
+        lines: list[str] = []
+        prev = str(item.get("summary", "") or "").strip()
+        if prev:
+            lines.append(_clip(prev, self.summary_chars // 3))
+
+        for pair in item.get("recent", []) or []:
+            if not isinstance(pair, list) or len(pair) != 2:
+                continue
+            user, reply = pair
+            lines.append(f"- 用户：{_clip(user, 60)} → 回复：{_clip(reply, 80)}")
+
+        text = "\n".join(lines).strip()
+        if len(text) > self.summary_chars:
+            # 超长时保留最新的部分
+            text = "…" + text[-(self.summary_chars - 1):]
+        return text
+
+    def record_turn(self, base_id: str, user_text: str, reply: str, round_bytes: int) -> Optional[str]:
+        """记录一轮对话；若触发轮换，返回新的 session id。"""
+        item = self._entry(base_id)
+        item["turns"] = int(item.get("turns", 0) or 0) + 1
+        item["bytes"] = int(item.get("bytes", 0) or 0) + max(0, int(round_bytes))
+        # 本轮已经把摘要带进了新会话
+        item["summary_pending"] = False
+
+        recent = [p for p in (item.get("recent") or []) if isinstance(p, list)]
+        recent.append([_clip(user_text, 200), _clip(reply, 200)])
+        item["recent"] = recent[-self.recent_keep:]
+
+        rotated: Optional[str] = None
+        over_turns = self.max_turns > 0 and item["turns"] >= self.max_turns
+        over_bytes = self.max_bytes > 0 and item["bytes"] >= self.max_bytes
+        if over_turns or over_bytes:
+            item["summary"] = self._build_summary(item)
+            item["summary_pending"] = bool(item["summary"])
+            item["generation"] = int(item.get("generation", 0) or 0) + 1
+            item["turns"] = 0
+            item["bytes"] = 0
+            item["recent"] = []
+            item["rotated_at"] = time.time()
+            rotated = self.current_session_id(base_id)
+
+        self._save()
+        return rotated
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._load()
+        return {
+            "sessions": len(self._state),
+            "max_turns": self.max_turns,
+            "max_bytes": self.max_bytes,
+            "generations": sum(int(v.get("generation", 0) or 0) for v in self._state.values()),
+        }
@@ -1,36 +1,154 @@
 import json
 import re
-from typing import Any, Dict, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from nonebot.adapters.onebot.v11 import Message, MessageSegment
 
 
+# 需要处理的空白/控制字符连续段：只有含控制字符、制表符、连续空格或 3 个以上换行的段才会被改写
+_RUN_CHARS = r"\x00-\x0c\x0e-\x1f\x7f "
+_DIRTY_RUN_RE = re.compile(rf"[{_RUN_CHARS}]*(?:[\x00-\x08\x0b\x0c\x0e-\x1f\x7f\t]|  |\n\n\n)[{_RUN_CHARS}]*")
+_CTRL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+_SPACES_RE = re.compile(r"[ \t]+")
+_NEWLINES_RE = re.compile(r"\n{3,}")
+_NICKNAME_PREFIX_RE = re.compile(r"^\s*(浅浅ovo|浅浅)[:：,，\s]+", re.I)
+_CLEAN_CACHE_MAX_LEN = 4096
+
+
+class CleanText(str):
+    """已经过 clean_user_text 且再次清洗结果不变的文本；再次清洗时直接返回自身。"""
+
+    __slots__ = ()
+
+
+@lru_cache(maxsize=256)
+def _normalize_run(run: str) -> str:
+    run = _CTRL_RE.sub("", run)
+    run = _SPACES_RE.sub(" ", run)
+    return _NEWLINES_RE.sub("\n\n", run)
+
+
+def _normalize_run_match(m: "re.Match[str]") -> str:
+    return _normalize_run(m.group(0))
+
+
+def _clean_user_text_uncached(text: str) -> str:
+    t = _DIRTY_RUN_RE.sub(_normalize_run_match, text)
+    if "浅" in t:
+        t = _NICKNAME_PREFIX_RE.sub("", t, count=1)
+    t = t.strip()
+    # 去掉昵称后若又露出一个昵称前缀，再清洗一次结果会不同，这种不标记为 CleanText
+    if "浅" in t and _NICKNAME_PREFIX_RE.match(t):
+        return t
+    return CleanText(t)
+
+
+@lru_cache(maxsize=2048)
+def _clean_user_text_cached(text: str) -> str:
+    return _clean_user_text_uncached(text)
+
+
 def clean_user_text(text: str) -> str:
+    if type(text) is CleanText:
+        return text
     t = text or ""
-    t = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]", "", t)
-    t = re.sub(r"^\s*(浅浅ovo|浅浅)[:：,，\s]+", "", t, flags=re.I)
-    t = re.sub(r"[ \t]+", " ", t)
-    t = re.sub(r"\n{3,}", "\n\n", t)
-    return t.strip()
+    if len(t) > _CLEAN_CACHE_MAX_LEN:
+        return _clean_user_text_uncached(t)
+    return _clean_user_text_cached(t)
+
+
+_CODE_FENCE_RE = re.compile(r"```[\s\S]*?```")
+_INLINE_CODE_RE = re.compile(r"`([^`]+)`")
+_BOLD_RE = re.compile(r"\*\*(.*?)\*\*")
+_UNDERLINE_RE = re.compile(r"__(.*?)__")
+_LINK_RE = re.compile(r"\[([^\]]+)\]\(([^)]+)\)")
+_HEADING_RE = re.compile(r"^\s{0,3}#{1,6}\s*", re.MULTILINE)
+_QUOTE_RE = re.compile(r"^\s*>\s?", re.MULTILINE)
+
+
+def _unfence(m: "re.Match[str]") -> str:
+    return m.group(0).replace("```", "").strip()
 
 
 def strip_markdown(text: str) -> str:
-    text = re.sub(r"```[\s\S]*?```", lambda m: m.group(0).replace("```", "").strip(), text)
-    text = re.sub(r"`([^`]+)`", r"\1", text)
-    text = re.sub(r"\*\*(.*?)\*\*", r"\1", text)
-    text = re.sub(r"__(.*?)__", r"\1", text)
-    text = re.sub(r"\[([^\]]+)\]\(([^)]+)\)", r"\1", text)
-    text = re.sub(r"^\s{0,3}#{1,6}\s*", "", text, flags=re.MULTILINE)
-    text = re.sub(r"^\s*>\s?", "", text, flags=re.MULTILINE)
-    text = re.sub(r"\n{3,}", "\n\n", text).strip()
-    return text
+    # 每一步先用子串判断是否可能命中，纯文本回复基本不进正则
+    if "```" in text:
+        text = _CODE_FENCE_RE.sub(_unfence, text)
+    if "`" in text:
+        text = _INLINE_CODE_RE.sub(r"\1", text)
+    if "**" in text:
+        text = _BOLD_RE.sub(r"\1", text)
+    if "__" in text:
+        text = _UNDERLINE_RE.sub(r"\1", text)
+    if "](" in text:
+        text = _LINK_RE.sub(r"\1", text)
+    if "#" in text:
+        text = _HEADING_RE.sub("", text)
+    if ">" in text:
+        text = _QUOTE_RE.sub("", text)
+    if "\n\n\n" in text:
+        text = _NEWLINES_RE.sub("\n\n", text)
+    return text.strip()
+
+
+def _as_tool_call(obj: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(obj, dict):
+        return None
+
+    tool = obj.get("tool")
+    args = obj.get("args", {})
+    if not isinstance(tool, str) or not tool.strip() or not isinstance(args, dict):
+        return None
+
+    return {"tool": tool.strip(), "args": args}
+
+
+def iter_json_objects(text: str) -> Iterator[Tuple[int, int]]:
+    """按括号配对依次给出顶层 {...} 片段的 (start, end)，跳过字符串内的括号。"""
+    depth = 0
+    start = -1
+    in_str = False
+    esc = False
+    for i, ch in enumerate(text):
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+            continue
+        if ch == '"':
+            # 顶层的引号不是 JSON 结构的一部分（比如正文里的引号），忽略
+            if depth > 0:
+                in_str = True
+        elif ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}" and depth > 0:
+            depth -= 1
+            if depth == 0:
+                yield start, i + 1
 
 
 def parse_tool_call(text: str) -> Optional[Dict[str, Any]]:
     t = (text or "").strip()
-    if not t:
+    if not t or "{" not in t:
         return None
 
+    # 先按括号配对找第一个完整的工具调用对象，后面跟着正文也能识别
+    for start, end in iter_json_objects(t):
+        try:
+            obj = json.loads(t[start:end])
+        except Exception:
+            continue
+        call = _as_tool_call(obj)
+        if call:
+            return call
+
+    # 兼容旧行为：首个 { 到最后一个 } 整段解析
     m = re.search(r"\{[\s\S]*\}", t)
     if not m:
         return None
@@ -40,15 +158,178 @@ def parse_tool_call(text: str) -> Optional[Dict[str, Any]]:
     except Exception:
         return None
 
-    if not isinstance(obj, dict):
+    return _as_tool_call(obj)
+
+
+class ToolCallStreamScanner:
+    """增量扫描 openclaw --json 的 stdout，尽早发现完整的工具调用。
+
+    外层按 JSON 结构跟踪 payloads[].text 字符串，边读边反转义；
+    内层对反转义后的正文做括号配对，{"tool":...,"args":...} 的右括号一到就返回，
+    不必等后续正文和进程退出。
+    """
+
+    def __init__(self, tools: Optional[Iterable[str]] = None, max_object_chars: int = 64 * 1024):
+        self.tools = frozenset(tools) if tools else None
+        self.max_object_chars = max_object_chars
+        self.result: Optional[Dict[str, Any]] = None
+        self.raw_json = ""
+
+        # 外层 envelope 状态
+        self._stack: List[Optional[str]] = []
+        self._in_str = False
+        self._text_mode = False
+        self._esc = ""
+        self._key_buf: List[str] = []
+        self._pending_key: Optional[str] = None
+        self._last_key: Optional[str] = None
+        self._high_surrogate = ""
+
+        # 内层正文状态
+        self._depth = 0
+        self._obj: List[str] = []
+        self._obj_in_str = False
+        self._obj_esc = False
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        if self.result is not None:
+            return self.result
+        for ch in chunk:
+            if self._in_str:
+                if self._text_mode:
+                    self._feed_text_char(ch)
+                    if self.result is not None:
+                        return self.result
+                else:
+                    self._feed_key_char(ch)
+                continue
+
+            if ch == '"':
+                self._in_str = True
+                self._text_mode = self._last_key == "text" and "payloads" in self._stack
+                self._last_key = None
+                self._key_buf = []
+                self._esc = ""
+                self._reset_inner()
+            elif ch == ":":
+                self._last_key = self._pending_key
+                self._pending_key = None
+            elif ch in "{[":
+                self._stack.append(self._last_key)
+                self._last_key = None
+                self._pending_key = None
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                self._last_key = None
+                self._pending_key = None
+            elif ch == ",":
+                self._last_key = None
+                self._pending_key = None
         return None
 
-    tool = obj.get("tool")
-    args = obj.get("args", {})
-    if not isinstance(tool, str) or not tool.strip() or not isinstance(args, dict):
-        return None
+    def _feed_key_char(self, ch: str) -> None:
+        if self._esc:
+            self._esc += ch
+            if self._esc_complete():
+                self._key_buf.append(self._decode_escape(self._esc))
+                self._esc = ""
+            return
+        if ch == "\\":
+            self._esc = ch
+        elif ch == '"':
+            self._in_str = False
+            # 只有紧跟 ':' 的字符串才是 key，值字符串在 ',' '}' 时被清掉
+            self._pending_key = "".join(self._key_buf) if len(self._key_buf) <= 64 else None
+            self._key_buf = []
+        elif len(self._key_buf) <= 64:
+            self._key_buf.append(ch)
+
+    def _feed_text_char(self, ch: str) -> None:
+        if self._esc:
+            self._esc += ch
+            if not self._esc_complete():
+                return
+            decoded = self._decode_escape(self._esc)
+            self._esc = ""
+            if not decoded:
+                return
+            code = ord(decoded[0])
+            if 0xD800 <= code <= 0xDBFF:
+                self._high_surrogate = decoded
+                return
+            if self._high_surrogate:
+                if 0xDC00 <= code <= 0xDFFF:
+                    decoded = (self._high_surrogate + decoded).encode("utf-16", "surrogatepass").decode("utf-16")
+                self._high_surrogate = ""
+            self._scan_char(decoded)
+            return
+        if ch == "\\":
+            self._esc = ch
+        elif ch == '"':
+            self._in_str = False
+            self._text_mode = False
+            self._reset_inner()
+        else:
+            self._scan_char(ch)
+
+    def _esc_complete(self) -> bool:
+        if len(self._esc) < 2:
+            return False
+        if self._esc[1] == "u":
+            return len(self._esc) >= 6
+        return True
+
+    @staticmethod
+    def _decode_escape(seq: str) -> str:
+        try:
+            return json.loads(f'"{seq}"')
+        except Exception:
+            return ""
 
-    return {"tool": tool.strip(), "args": args}
+    def _reset_inner(self) -> None:
+        self._depth = 0
+        self._obj = []
+        self._obj_in_str = False
+        self._obj_esc = False
+
+    def _scan_char(self, ch: str) -> None:
+        if self._depth == 0:
+            if ch == "{":
+                self._depth = 1
+                self._obj = [ch]
+            return
+
+        self._obj.append(ch)
+        if len(self._obj) > self.max_object_chars:
+            self._reset_inner()
+            return
+
+        if self._obj_in_str:
+            if self._obj_esc:
+                self._obj_esc = False
+            elif ch == "\\":
+                self._obj_esc = True
+            elif ch == '"':
+                self._obj_in_str = False
+            return
+
+        if ch == '"':
+            self._obj_in_str = True
+        elif ch == "{":
+            self._depth += 1
+        elif ch == "}":
+            self._depth -= 1
+            if self._depth == 0:
+                candidate = "".join(self._obj)
+                self._reset_inner()
+                try:
+                    call = _as_tool_call(json.loads(candidate))
+                except Exception:
+                    call = None
+                if call and (self.tools is None or call["tool"] in self.tools):
+                    self.result = call
+                    self.raw_json = candidate
 
 
 def message_to_plain_text(msg: Optional[Message]) -> str:
@@ -0,0 +1,147 @@
+import json
+from typing import Any, Dict, Optional
+
+
+THINKING_LEVELS = ("off", "minimal", "low", "medium", "high")
+CALL_KINDS = ("exec", "followup", "retry", "rewrite", "placeholder")
+
+# 默认策略：改写/反占位重试只需要复述，不做推理；
+# 多步、长消息、带附件时保持较高档位，短闲聊降档。
+DEFAULT_THINKING_POLICY: Dict[str, Any] = {
+    "kinds": {
+        "exec": "medium",
+        "followup": "low",
+        "retry": "medium",
+        "rewrite": "off",
+        "placeholder": "off",
+    },
+    "short_chars": 12,
+    "short_level": "low",
+    "long_chars": 300,
+    "long_level": "high",
+    "attachment_level": "medium",
+    "multi_step_level": "medium",
+}
+
+
+def _level_index(level: str) -> int:
+    try:
+        return THINKING_LEVELS.index(level)
+    except ValueError:
+        return THINKING_LEVELS.index("medium")
+
+
+def _normalize_level(level: Any, fallback: str) -> str:
+    t = str(level or "").strip().lower()
+    return t if t in THINKING_LEVELS else fallback
+
+
+def _raise_to(level: str, floor: str) -> str:
+    return level if _level_index(level) >= _level_index(floor) else floor
+
+
+class ThinkingPolicy:
+    """按调用类型 / 消息长度 / 附件 / 多步标记挑选 --thinking 档位。"""
+
+    def __init__(self, exec_default: str = "medium", overrides: Optional[Dict[str, Any]] = None, adaptive: bool = True):
+        self.adaptive = adaptive
+        self.exec_default = _normalize_level(exec_default, "medium")
+
+        policy = json.loads(json.dumps(DEFAULT_THINKING_POLICY))
+        # OPENCLAW_BRIDGE_THINKING 仍然决定执行模式的基础档位
+        policy["kinds"]["exec"] = self.exec_default
+        if isinstance(overrides, dict):
+            kinds = overrides.get("kinds")
+            if isinstance(kinds, dict):
+                for k, v in kinds.items():
+                    if k in CALL_KINDS:
+                        policy["kinds"][k] = _normalize_level(v, policy["kinds"][k])
+            for key in ("short_level", "long_level", "attachment_level", "multi_step_level"):
+                if key in overrides:
+                    policy[key] = _normalize_level(overrides.get(key), policy[key])
+            for key in ("short_chars", "long_chars"):
+                try:
+                    policy[key] = max(0, int(overrides.get(key, policy[key])))
+                except Exception:
+                    pass
+        self.policy = policy
+
+    def choose(self, call_kind: str, text: str = "", has_attachments: bool = False, multi_step: bool = False) -> str:
+        if not self.adaptive:
+            return self.exec_default
+
+        p = self.policy
+        level = p["kinds"].get(call_kind, self.exec_default)
+        if call_kind in {"rewrite", "placeholder"}:
+            return level
+
+        length = len((text or "").strip())
+        if multi_step:
+            level = _raise_to(level, p["multi_step_level"])
+        if has_attachments:
+            level = _raise_to(level, p["attachment_level"])
+        if p["long_chars"] and length >= p["long_chars"]:
+            level = _raise_to(level, p["long_level"])
+        elif (
+            call_kind == "exec"
+            and p["short_chars"]
+            and length <= p["short_chars"]
+            and not multi_step
+            and not has_attachments
+        ):
+            level = p["short_level"]
+        return level
+
+    def describe(self) -> str:
+        if not self.adaptive:
+            return f"fixed={self.exec_default}"
+        kinds = ",".join(f"{k}={v}" for k, v in self.policy["kinds"].items())
+        return f"adaptive {kinds}"
+
+
+def load_thinking_policy(exec_default: str, raw_json: str, adaptive: bool = True) -> ThinkingPolicy:
+    overrides: Optional[Dict[str, Any]] = None
+    if raw_json:
+        try:
+            obj = json.loads(raw_json)
+            if isinstance(obj, dict):
+                overrides = obj
+        except Exception:
+            overrides = None
+    return ThinkingPolicy(exec_default=exec_default, overrides=overrides, adaptive=adaptive)
+
+
+class ThinkingStats:
+    """按 (档位, 调用类型) 统计耗时与结果，便于调策略。"""
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Any]] = {}
+        self.total = 0
+
+    def record(self, level: str, call_kind: str, elapsed_ms: int, outcome: str) -> None:
+        self.total += 1
+        key = f"{level}/{call_kind}"
+        item = self._data.setdefault(key, {"calls": 0, "total_ms": 0, "max_ms": 0, "outcomes": {}})
+        item["calls"] += 1
+        item["total_ms"] += max(0, int(elapsed_ms))
+        item["max_ms"] = max(item["max_ms"], int(elapsed_ms))
+        item["outcomes"][outcome] = item["outcomes"].get(outcome, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {}
+        for key, item in sorted(self._data.items()):
+            calls = max(1, item["calls"])
+            out[key] = {
+                "calls": item["calls"],
+                "avg_ms": int(item["total_ms"] / calls),
+                "max_ms": item["max_ms"],
+                "outcomes": dict(item["outcomes"]),
+            }
+        return out
+
+    def summary_line(self) -> str:
+        parts = []
+        for key, item in self.snapshot().items():
+            outcomes = ",".join(f"{k}:{v}" for k, v in sorted(item["outcomes"].items()))
+            parts.append(f"{key} n={item['calls']} avg={item['avg_ms']}ms max={item['max_ms']}ms [{outcomes}]")
+        return "; ".join(parts)
@@ -0,0 +1,65 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class BridgeWarmup:
+    """bot 连上后在后台并发预热 bridge 的冷启动开销，只跑一次。
+
+    每一步是一个无参协程函数，返回一段简短说明（会写进日志和 /ops）；失败不影响其他步骤。
+    """
+
+    def __init__(self, logger: Any = None):
+        self._steps: Dict[str, Callable[[], Awaitable[str]]] = {}
+        self._logger = logger
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+        self.started_at: float = 0.0
+        self.total_seconds: float = 0.0
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def add_step(self, name: str, fn: Callable[[], Awaitable[str]]) -> None:
+        self._steps[name] = fn
+
+    def _log(self, level: str, msg: str) -> None:
+        if self._logger is not None:
+            getattr(self._logger, level)(msg)
+
+    async def _run_step(self, name: str, fn: Callable[[], Awaitable[str]]) -> None:
+        t0 = time.monotonic()
+        try:
+            detail = await fn()
+            status = "ok"
+        except Exception as e:
+            detail = str(e)[:120]
+            status = "failed"
+        elapsed = time.monotonic() - t0
+        self.results[name] = {"status": status, "seconds": round(elapsed, 2), "detail": detail or ""}
+        self._log("info" if status == "ok" else "warning", f"openclaw_bridge warmup {name} {status} in {elapsed:.2f}s {detail or ''}".rstrip())
+
+    async def _run_all(self) -> None:
+        self.started_at = time.time()
+        t0 = time.monotonic()
+        await asyncio.gather(*(self._run_step(name, fn) for name, fn in self._steps.items()))
+        self.total_seconds = round(time.monotonic() - t0, 2)
+        self.ready = True
+        self._log("info", f"openclaw_bridge warmup done in {self.total_seconds:.2f}s")
+
+    def start(self) -> bool:
+        """多次 bot_connect（重连）只触发第一次；返回是否真的启动了。"""
+        if self._task is not None:
+            return False
+        self._task = asyncio.create_task(self._run_all())
+        return True
+
+    def summary_lines(self) -> List[str]:
+        if self._task is None:
+            return ["- 预热: 未开始"]
+        if not self.ready:
+            done = ", ".join(f"{k} {v['seconds']}s" for k, v in self.results.items()) or "无"
+            return [f"- 预热: 进行中（已完成 {done}）"]
+        parts = []
+        for name, r in self.results.items():
+            mark = "" if r["status"] == "ok" else "✗"
+            parts.append(f"{name} {r['seconds']}s{mark}")
+        return [f"- 预热: 完成，共 {self.total_seconds}s（{', '.join(parts)}）"]
@@ -0,0 +1,26 @@
+from typing import Callable, Dict, List
+
+from nonebot import logger
+
+
+# 其他插件往 /ops 状态里追加的运行指标：名称 -> 返回若干行文本的函数
+_sections: Dict[str, Callable[[], List[str]]] = {}
+
+
+def register_ops_section(name: str, render: Callable[[], List[str]]) -> None:
+    _sections[name] = render
+
+
+def render_ops_sections() -> List[str]:
+    lines: List[str] = []
+    for name, render in list(_sections.items()):
+        try:
+            body = [str(x) for x in (render() or [])]
+        except Exception as e:
+            logger.warning(f"ops section {name} render failed: {e}")
+            body = ["- 指标获取失败"]
+        if not body:
+            continue
+        lines.append(f"{name}：")
+        lines.extend(body)
+    return lines
@@ -0,0 +1,353 @@
+import ctypes
+import ctypes.util
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ._pic_hashes import ContentHashStore, sha256_file
+
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".mkv", ".avi", ".flv", ".webm"}
+
+
+def media_kind(name: str) -> Optional[str]:
+    ext = os.path.splitext(name)[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return "image"
+    if ext in VIDEO_EXTENSIONS:
+        return "video"
+    return None
+
+
+@dataclass(frozen=True)
+class MediaEntry:
+    name: str
+    size: int
+    mtime: float
+    kind: Optional[str]
+
+
+class _Inotify:
+    """用 ctypes 调 libc 的 inotify，非阻塞读取事件；不可用时构造抛 OSError。"""
+
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (
+        IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO
+        | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+    )
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify not supported")
+        self._libc = libc
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+
+    def add_watch(self, path: Path) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(path)), self.WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return wd
+
+    def read_events(self) -> List[tuple]:
+        """读出当前所有待处理事件 [(wd, mask)]，没有事件时立即返回空列表。"""
+        events: List[tuple] = []
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            if not buf:
+                return events
+            offset = 0
+            while offset + self._EVENT.size <= len(buf):
+                wd, mask, _cookie, name_len = self._EVENT.unpack_from(buf, offset)
+                events.append((wd, mask))
+                offset += self._EVENT.size + name_len
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class DirectoryCatalog:
+    """单个目录的文件清单（名称、大小、类型、mtime）和文件名子串索引。
+
+    内容失效时（inotify 事件、目录 mtime 变化或显式 mark_dirty）下次查询才重新扫描。
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.entries: Dict[str, MediaEntry] = {}
+        self.version = 0
+        self._names: List[str] = []
+        self._grams: Dict[str, Set[str]] = {}
+        self._dir_mtime_ns: Optional[int] = None
+        self._dirty = True
+        # 有 inotify 监听时不再轮询目录 mtime
+        self.watched = False
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+
+    def _dir_changed(self) -> bool:
+        try:
+            mtime_ns = self.directory.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        return mtime_ns != self._dir_mtime_ns
+
+    def refresh(self, poll: bool) -> bool:
+        """需要时重新扫描，返回是否重建；poll=True 时额外用目录 mtime 判断变化。"""
+        if not self._dirty and not (poll and self._dir_changed()):
+            return False
+        self.rescan()
+        return True
+
+    def rescan(self) -> None:
+        try:
+            mtime_ns = self.directory.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        entries: Dict[str, MediaEntry] = {}
+        if mtime_ns is not None:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    try:
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries[entry.name] = MediaEntry(entry.name, st.st_size, st.st_mtime, media_kind(entry.name))
+        self.entries = entries
+        self._names = sorted(entries)
+        grams: Dict[str, Set[str]] = {}
+        for name in self._names:
+            for i in range(len(name)):
+                grams.setdefault(name[i], set()).add(name)
+                if i + 1 < len(name):
+                    grams.setdefault(name[i:i + 2], set()).add(name)
+        self._grams = grams
+        self._dir_mtime_ns = mtime_ns
+        self._dirty = False
+        self.version += 1
+
+    def names(self) -> List[str]:
+        return self._names
+
+    def get(self, name: str) -> Optional[MediaEntry]:
+        return self.entries.get(name)
+
+    def search(self, keyword: str) -> List[str]:
+        """文件名包含 keyword 的文件（与原来的 `keyword in name` 一致），按文件名排序。"""
+        if not keyword:
+            return self._names
+        if len(keyword) == 1:
+            candidates = self._grams.get(keyword, set())
+        else:
+            # 先用二元组倒排取交集缩小候选，再逐个确认子串
+            postings = []
+            for i in range(len(keyword) - 1):
+                posting = self._grams.get(keyword[i:i + 2])
+                if not posting:
+                    return []
+                postings.append(posting)
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    return []
+        return sorted(name for name in candidates if keyword in name)
+
+
+class MediaCatalog:
+    """pic 插件共用的媒体目录清单：优先用 inotify 感知变化，不支持时退回目录 mtime 轮询。"""
+
+    def __init__(
+        self,
+        directories: Iterable[Path],
+        use_inotify: bool = True,
+        logger=None,
+        hash_store: Optional[ContentHashStore] = None,
+    ):
+        self._logger = logger
+        self.hash_store = hash_store
+        self._dirs: Dict[str, DirectoryCatalog] = {}
+        self._wd_to_key: Dict[int, str] = {}
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError) as e:
+                self._log("info", f"inotify 不可用，媒体目录改用 mtime 轮询: {e}")
+        for directory in directories:
+            self.add_directory(directory)
+
+    def _log(self, level: str, msg: str) -> None:
+        if self._logger is not None:
+            getattr(self._logger, level)(msg)
+
+    @staticmethod
+    def _key(directory: Path) -> str:
+        return os.path.abspath(directory)
+
+    @property
+    def mode(self) -> str:
+        watched = sum(1 for c in self._dirs.values() if c.watched)
+        if not watched:
+            return "polling"
+        return "inotify" if watched == len(self._dirs) else f"inotify {watched}/{len(self._dirs)}"
+
+    def add_directory(self, directory: Path) -> DirectoryCatalog:
+        key = self._key(directory)
+        catalog = self._dirs.get(key)
+        if catalog is not None:
+            return catalog
+        catalog = DirectoryCatalog(Path(directory))
+        self._dirs[key] = catalog
+        if self._inotify is not None:
+            try:
+                self._wd_to_key[self._inotify.add_watch(Path(directory))] = key
+                catalog.watched = True
+            except OSError as e:
+                # 单个目录监听失败（例如 watch 数量达到上限）时这个目录退回轮询
+                self._log("warning", f"inotify 监听 {directory} 失败，该目录改用 mtime 轮询: {e}")
+        return catalog
+
+    def _fallback_to_polling(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+        self._inotify = None
+        self._wd_to_key.clear()
+        for catalog in self._dirs.values():
+            catalog.watched = False
+            catalog.mark_dirty()
+
+    def _drain_events(self) -> None:
+        if self._inotify is None:
+            return
+        try:
+            events = self._inotify.read_events()
+        except OSError as e:
+            self._log("warning", f"读取 inotify 事件失败，改用 mtime 轮询: {e}")
+            self._fallback_to_polling()
+            return
+        for wd, mask in events:
+            if mask & _Inotify.IN_Q_OVERFLOW:
+                for catalog in self._dirs.values():
+                    catalog.mark_dirty()
+                continue
+            key = self._wd_to_key.get(wd)
+            if key is None:
+                continue
+            catalog = self._dirs[key]
+            catalog.mark_dirty()
+            if mask & (_Inotify.IN_IGNORED | _Inotify.IN_MOVE_SELF):
+                # 目录被删除或移走，监听已失效（或跟着旧目录走了），之后对这个路径退回轮询
+                self._wd_to_key.pop(wd, None)
+                catalog.watched = False
+
+    def directory(self, directory: Path) -> DirectoryCatalog:
+        """取某个目录的最新清单（未登记的目录会自动登记）。"""
+        catalog = self.add_directory(directory)
+        self._drain_events()
+        catalog.refresh(poll=not catalog.watched)
+        return catalog
+
+    def refresh_all(self) -> None:
+        self._drain_events()
+        for catalog in list(self._dirs.values()):
+            catalog.refresh(poll=not catalog.watched)
+
+    def iter_entries(self, kind: Optional[str] = None) -> Iterator[Tuple[Path, MediaEntry]]:
+        """遍历所有登记目录当前清单里的文件 (路径, 条目)，可按类型过滤；调用前先 refresh_all。"""
+        for catalog in list(self._dirs.values()):
+            for entry in list(catalog.entries.values()):
+                if kind is None or entry.kind == kind:
+                    yield catalog.directory / entry.name, entry
+
+    def content_hash(self, path: Path, entry: MediaEntry) -> str:
+        """文件的 sha256，优先用持久化的缓存（阻塞调用，放到线程里执行）。"""
+        key = Path(os.path.abspath(path))
+        if self.hash_store is not None:
+            cached = self.hash_store.get(key, entry.size, entry.mtime)
+            if cached:
+                return cached
+        digest = sha256_file(key)
+        if self.hash_store is not None:
+            self.hash_store.put(key, entry.size, entry.mtime, digest)
+        return digest
+
+    def record_hash(self, path: Path, sha256: str) -> None:
+        if self.hash_store is None:
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        self.hash_store.put(Path(os.path.abspath(path)), st.st_size, st.st_mtime, sha256)
+
+    def find_duplicate(self, size: int, sha256: str) -> Optional[Path]:
+        """在所有登记目录里找内容完全相同的文件（阻塞调用，放到线程里执行）。
+
+        先查哈希缓存；再只对大小相同、还没算过哈希的文件补算，算出的结果会写回缓存。
+        """
+        if self.hash_store is not None:
+            for path, cached_size, cached_mtime in self.hash_store.paths_for(sha256):
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    self.hash_store.forget(Path(path))
+                    continue
+                if st.st_size == cached_size and st.st_mtime == cached_mtime:
+                    return Path(path)
+        for catalog in list(self._dirs.values()):
+            for entry in list(catalog.entries.values()):
+                if entry.size != size:
+                    continue
+                path = catalog.directory / entry.name
+                try:
+                    if self.content_hash(path, entry) == sha256:
+                        return path
+                except OSError:
+                    continue
+        return None
+
+    def mark_dirty(self, directory: Path) -> None:
+        """本进程改动了目录（保存/删除/重命名）后调用，不必等事件或 mtime。"""
+        catalog = self._dirs.get(self._key(directory))
+        if catalog is not None:
+            catalog.mark_dirty()
+
+    def summary_line(self) -> str:
+        total = sum(len(c.entries) for c in self._dirs.values())
+        return f"{self.mode}，{len(self._dirs)} 个目录 / {total} 个文件"
@@ -0,0 +1,123 @@
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    path   TEXT PRIMARY KEY,
+    size   INTEGER NOT NULL,
+    mtime  REAL NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_file_hashes_sha256 ON file_hashes(sha256);
+CREATE TABLE IF NOT EXISTS image_features (
+    path   TEXT PRIMARY KEY,
+    size   INTEGER NOT NULL,
+    mtime  REAL NOT NULL,
+    ahash  TEXT NOT NULL,
+    dhash  TEXT NOT NULL,
+    width  INTEGER,
+    height INTEGER,
+    thumb  TEXT
+);
+"""
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ContentHashStore:
+    """表情文件内容哈希的 SQLite（WAL）缓存。
+
+    按绝对路径存 (size, mtime, sha256)，size 或 mtime 对不上就视为过期，
+    这样查重时只有新文件或改过的文件才需要重新读盘。
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, path: Path, size: int, mtime: float) -> Optional[str]:
+        """缓存的哈希；文件大小或 mtime 变了返回 None。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime, sha256 FROM file_hashes WHERE path = ?", (str(path),)
+            ).fetchone()
+        if row and row[0] == size and row[1] == mtime:
+            return row[2]
+        return None
+
+    def put(self, path: Path, size: int, mtime: float, sha256: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO file_hashes (path, size, mtime, sha256) VALUES (?, ?, ?, ?)",
+                (str(path), int(size), float(mtime), sha256),
+            )
+
+    def paths_for(self, sha256: str) -> List[Tuple[str, int, float]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime FROM file_hashes WHERE sha256 = ?", (sha256,)
+            ).fetchall()
+        return [(r[0], r[1], r[2]) for r in rows]
+
+    def forget(self, path: Path) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM file_hashes WHERE path = ?", (str(path),))
+
+    def get_features(self, path: Path, size: int, mtime: float) -> Optional[Dict[str, Any]]:
+        """缓存的感知哈希和缩略图路径；文件变了或缩略图丢了返回 None。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime, ahash, dhash, width, height, thumb FROM image_features WHERE path = ?",
+                (str(path),),
+            ).fetchone()
+        if not row or row[0] != size or row[1] != mtime:
+            return None
+        if row[6] and not Path(row[6]).exists():
+            return None
+        return {"path": str(path), "ahash": row[2], "dhash": row[3], "width": row[4], "height": row[5], "thumb": row[6]}
+
+    def put_features(self, path: Path, size: int, mtime: float, features: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO image_features (path, size, mtime, ahash, dhash, width, height, thumb) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(path), int(size), float(mtime), features["ahash"], features["dhash"],
+                    features.get("width"), features.get("height"), features.get("thumb"),
+                ),
+            )
+
+    def forget_features_except(self, paths: List[str]) -> int:
+        """删掉不在 paths 里的特征记录（文件已删除或改名），返回删除条数。"""
+        keep = set(paths)
+        with self._lock:
+            rows = self._conn.execute("SELECT path FROM image_features").fetchall()
+            stale = [(r[0],) for r in rows if r[0] not in keep]
+            if stale:
+                self._conn.executemany("DELETE FROM image_features WHERE path = ?", stale)
+        return len(stale)
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM file_hashes").fetchone()[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
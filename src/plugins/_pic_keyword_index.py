@@ -0,0 +1,147 @@
+import os
+import re
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+
+_STEM_SPLIT_RE = re.compile(r"[._-]")
+
+
+def stem_tokens(stem: str) -> List[str]:
+    """文件名（不含扩展名）按 . _ - 切出的关键词。"""
+    return [part for part in _STEM_SPLIT_RE.split(stem) if part]
+
+
+class AhoCorasick:
+    """纯 Python 的 Aho-Corasick 自动机：一次扫描找出文本中出现的所有模式串。"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                # 把后缀节点的输出并进来，扫描时不用再沿失配链找输出
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def search(self, text: str) -> Set[int]:
+        """返回在 text 中出现过的模式串下标集合。"""
+        found: Set[int] = set()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+
+class PicKeywordIndex:
+    """表情目录的关键词索引，给 autopic 用。
+
+    匹配规则与原来逐文件扫描一致：文件名（不含扩展名）整体出现在消息里，
+    或者消息按空白切出的某个词等于文件名按 . _ - 切出的某一段。
+    目录 mtime 变化（增删改名）时才重新 listdir 重建，平时每条消息只做一次 stat。
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._mtime_ns: Optional[int] = None
+        self._files: List[str] = []
+        self._stem_files: List[List[str]] = []
+        self._token_files: Dict[str, List[str]] = {}
+        self._automaton = AhoCorasick(())
+        self.counters: Dict[str, int] = {"rebuilds": 0, "queries": 0, "matched": 0}
+
+    def refresh(self, force: bool = False) -> bool:
+        """目录有变化时重建索引，返回是否重建。"""
+        try:
+            mtime_ns = self.directory.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        if not force and mtime_ns == self._mtime_ns and self._mtime_ns is not None:
+            return False
+        files: List[str] = []
+        if mtime_ns is not None:
+            with os.scandir(self.directory) as it:
+                files = [entry.name for entry in it if entry.is_file()]
+        self.rebuild(files)
+        self._mtime_ns = mtime_ns
+        return True
+
+    def rebuild(self, files: Iterable[str]) -> None:
+        self._files = sorted(files)
+        by_stem: Dict[str, List[str]] = {}
+        token_files: Dict[str, List[str]] = {}
+        for filename in self._files:
+            stem = Path(filename).stem
+            by_stem.setdefault(stem, []).append(filename)
+            for token in set(stem_tokens(stem)):
+                token_files.setdefault(token, []).append(filename)
+        stems = list(by_stem)
+        self._automaton = AhoCorasick(stems)
+        # AhoCorasick 会跳过空串，按它实际收录的模式串对齐文件列表
+        self._stem_files = [by_stem[p] for p in self._automaton.patterns]
+        self._token_files = token_files
+        self.counters["rebuilds"] += 1
+
+    @property
+    def files(self) -> List[str]:
+        return self._files
+
+    def match(self, text: str) -> List[str]:
+        """返回命中的文件名列表（按文件名排序、去重）。"""
+        self.counters["queries"] += 1
+        matched: Set[str] = set()
+        for idx in self._automaton.search(text):
+            matched.update(self._stem_files[idx])
+        for keyword in text.split():
+            files = self._token_files.get(keyword)
+            if files:
+                matched.update(files)
+        if matched:
+            self.counters["matched"] += 1
+        return sorted(matched)
+
+    def summary_line(self) -> str:
+        c = self.counters
+        return (
+            f"{len(self._files)} 个文件 / {len(self._automaton)} 个词干，"
+            f"重建 {c['rebuilds']} 次，查询 {c['queries']}（命中 {c['matched']}）"
+        )
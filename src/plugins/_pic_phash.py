@@ -0,0 +1,377 @@
+"""表情图片的感知哈希（aHash/dHash）、缩略图和近似重复索引。
+
+特征计算只依赖 Pillow 和标准库，由 PerceptualIndex 拆成几批交给并行的子进程执行
+（python 本文件，stdin 每行一个 JSON 任务，stdout 每行一个 JSON 结果），不占用事件循环。
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+HASH_SIZE = 8
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def file_inode(path: Any) -> Optional[Tuple[int, int]]:
+    """(st_dev, st_ino)，文件不存在时返回 None；用来识别硬链接。"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+def compute_features(path: str, thumb_path: Optional[str] = None, thumb_size: int = 128) -> Dict[str, Any]:
+    """算一张图的 aHash、dHash（各 64 位，十六进制）并可选地生成 JPEG 缩略图。动图只取第一帧。"""
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img.seek(0)
+        width, height = img.size
+        frame = img.convert("RGBA")
+        # 透明背景统一垫白，避免同一张图的不同透明处理被当成不同图
+        background = Image.new("RGBA", frame.size, (255, 255, 255, 255))
+        background.alpha_composite(frame)
+        rgb = background.convert("RGB")
+
+    gray = rgb.convert("L")
+    small = list(gray.resize((HASH_SIZE, HASH_SIZE), Image.LANCZOS).getdata())
+    mean = sum(small) / len(small)
+    ahash = 0
+    for px in small:
+        ahash = (ahash << 1) | (px >= mean)
+
+    wide = list(gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).getdata())
+    dhash = 0
+    for row in range(HASH_SIZE):
+        base = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            dhash = (dhash << 1) | (wide[base + col] < wide[base + col + 1])
+
+    if thumb_path:
+        thumb = rgb.copy()
+        thumb.thumbnail((thumb_size, thumb_size))
+        out = Path(thumb_path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_name(out.name + ".tmp")
+        thumb.save(tmp, format="JPEG", quality=80)
+        os.replace(tmp, out)
+
+    return {"ahash": f"{ahash:016x}", "dhash": f"{dhash:016x}", "width": width, "height": height}
+
+
+class BKTree:
+    """按汉明距离组织的 BK 树，支持“距离不超过 r 的所有条目”查询。"""
+
+    def __init__(self, distance: Callable[[int, int], int] = hamming):
+        self._distance = distance
+        self._root: Optional[list] = None  # [key, [items], {dist: child}]
+        self._size = 0
+
+    def add(self, key: int, item: Any) -> None:
+        self._size += 1
+        if self._root is None:
+            self._root = [key, [item], {}]
+            return
+        node = self._root
+        while True:
+            d = self._distance(key, node[0])
+            if d == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [key, [item], {}]
+                return
+            node = child
+
+    def query(self, key: int, radius: int) -> List[Tuple[int, Any]]:
+        results: List[Tuple[int, Any]] = []
+        if self._root is None:
+            return results
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            d = self._distance(key, node[0])
+            if d <= radius:
+                results.extend((d, item) for item in node[1])
+            for child_d, child in node[2].items():
+                if d - radius <= child_d <= d + radius:
+                    stack.append(child)
+        results.sort(key=lambda x: x[0])
+        return results
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class PerceptualIndex:
+    """近似重复图片索引：特征（哈希 + 缩略图）持久化在 ContentHashStore 里，
+    只对新增或改过的图片重新计算；内存里按 dHash 建 BK 树，aHash 作为二次确认。
+    """
+
+    def __init__(
+        self,
+        hash_store: Any,
+        thumb_dir: Path,
+        threshold: int = 6,
+        max_workers: int = 2,
+        timeout: float = 600.0,
+        logger: Any = None,
+    ):
+        self.hash_store = hash_store
+        self.thumb_dir = Path(thumb_dir)
+        self.threshold = max(0, int(threshold))
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = float(timeout)
+        self._logger = logger
+        self._tree = BKTree()
+        self._features: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        self.last_indexed_at: Optional[float] = None
+        self.counters: Dict[str, int] = {"runs": 0, "computed": 0, "cached": 0, "failed": 0}
+
+    def _log(self, level: str, msg: str) -> None:
+        if self._logger is not None:
+            getattr(self._logger, level)(msg)
+
+    @property
+    def ready(self) -> bool:
+        return self.last_indexed_at is not None
+
+    def thumb_path(self, path: str) -> Path:
+        return self.thumb_dir / f"{hashlib.sha1(path.encode('utf-8', 'surrogatepass')).hexdigest()}.jpg"
+
+    async def _run_workers(self, tasks: List[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """tasks 为 [(要读的文件, 登记用的路径)]，分成 max_workers 批交给并行的子进程计算，结果按登记路径返回。
+
+        两者通常相同；/savepic 时读的是下载的临时文件，缩略图则按最终保存路径命名。
+        """
+        if not tasks:
+            return {}
+        batches = [tasks[i::self.max_workers] for i in range(self.max_workers)]
+        results: Dict[str, Dict[str, Any]] = {}
+
+        async def run_batch(batch: List[Tuple[str, str]]) -> None:
+            if not batch:
+                return
+            payload = "".join(
+                json.dumps({"path": src, "key": key, "thumb": str(self.thumb_path(key))}, ensure_ascii=False) + "\n"
+                for src, key in batch
+            ).encode("utf-8")
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, str(Path(__file__).resolve()),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(payload), self.timeout)
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                self._log("warning", f"感知哈希子进程超时（{self.timeout:.0f}s），本批 {len(batch)} 张跳过")
+                return
+            if proc.returncode != 0:
+                self._log("warning", f"感知哈希子进程退出码 {proc.returncode}: {stderr.decode('utf-8', 'replace')[-300:]}")
+            for line in stdout.decode("utf-8", "replace").splitlines():
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(item, dict) and item.get("key"):
+                    key = item.pop("key")
+                    item["path"] = key
+                    results[key] = item
+
+        await asyncio.gather(*(run_batch(b) for b in batches))
+        return results
+
+    async def reindex(self, entries: Iterable[Tuple[Path, Any]]) -> int:
+        """entries 为 [(文件路径, MediaEntry)]（只处理图片）；返回本次新算的数量。"""
+        async with self._lock:
+            entries = [(os.path.abspath(p), e) for p, e in entries if getattr(e, "kind", None) == "image"]
+
+            def load_cached():
+                cached, missing = {}, []
+                for path, entry in entries:
+                    features = self.hash_store.get_features(Path(path), entry.size, entry.mtime)
+                    if features:
+                        cached[path] = features
+                    else:
+                        missing.append(path)
+                return cached, missing
+
+            cached, missing = await asyncio.to_thread(load_cached)
+            computed = await self._run_workers([(p, p) for p in missing])
+            stats = {path: entry for path, entry in entries}
+
+            def save_computed():
+                for path, item in computed.items():
+                    entry = stats.get(path)
+                    if entry is None or item.get("error"):
+                        continue
+                    self.hash_store.put_features(Path(path), entry.size, entry.mtime, item)
+
+                return self.hash_store.forget_features_except([path for path, _ in entries])
+
+            removed = await asyncio.to_thread(save_computed)
+
+            features = dict(cached)
+            failed = 0
+            for path, item in computed.items():
+                if item.get("error"):
+                    failed += 1
+                else:
+                    features[path] = item
+            self._rebuild(features)
+            await asyncio.to_thread(self._prune_thumbs)
+            if removed:
+                self._log("info", f"感知哈希索引清理了 {removed} 条已删除文件的记录")
+            self.counters["runs"] += 1
+            self.counters["computed"] += len(computed) - failed
+            self.counters["cached"] += len(cached)
+            self.counters["failed"] += failed
+            self.last_indexed_at = asyncio.get_running_loop().time()
+            return len(computed) - failed
+
+    def _rebuild(self, features: Dict[str, Dict[str, Any]]) -> None:
+        tree = BKTree()
+        for path, item in features.items():
+            try:
+                tree.add(int(item["dhash"], 16), path)
+            except (KeyError, TypeError, ValueError):
+                continue
+        self._features = features
+        self._tree = tree
+
+    def _prune_thumbs(self) -> None:
+        """删掉没有对应图片的缩略图。"""
+        keep = {os.path.basename(item["thumb"]) for item in self._features.values() if item.get("thumb")}
+        try:
+            names = os.listdir(self.thumb_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".jpg") and name not in keep:
+                try:
+                    os.unlink(self.thumb_dir / name)
+                except OSError:
+                    pass
+
+    def add(self, path: Path, item: Dict[str, Any]) -> None:
+        """登记一张刚保存的图（/savepic 已经算过特征时不必等下次全量索引）。"""
+        key = os.path.abspath(path)
+        self._features[key] = item
+        self._tree.add(int(item["dhash"], 16), key)
+
+    def similar(
+        self, item: Dict[str, Any], exclude: Optional[str] = None, exclude_inode: Optional[Tuple[int, int]] = None,
+    ) -> List[Tuple[int, str]]:
+        """与给定特征近似的图片 [(dHash 距离, 路径)]，aHash 距离也要在阈值两倍以内。
+
+        硬链接（同一 inode）只算一张：exclude_inode 的文件不算，同一 inode 的多个路径只保留一个。
+        """
+        dhash, ahash = int(item["dhash"], 16), int(item["ahash"], 16)
+        results = []
+        seen_inodes = {exclude_inode} if exclude_inode else set()
+        for d, path in self._tree.query(dhash, self.threshold):
+            if path == exclude:
+                continue
+            other = self._features.get(path)
+            if other is None or hamming(ahash, int(other["ahash"], 16)) > self.threshold * 2:
+                continue
+            inode = file_inode(path)
+            if inode is None or inode in seen_inodes:
+                continue
+            seen_inodes.add(inode)
+            results.append((d, path))
+        return results
+
+    def duplicate_groups(self) -> List[List[Tuple[str, List[str]]]]:
+        """把互相近似的图片并成组（并查集），按组大小从大到小返回，只含两张以上的组。
+
+        同一 inode 的硬链接（/savepic 查重时建的）先合并成一项，删掉其中一个并不省空间，
+        所以不单独算作重复；每项为 (代表路径, [与它硬链接的其他路径])。
+        """
+        by_inode: Dict[Tuple[int, int], List[str]] = {}
+        for path in self._features:
+            inode = file_inode(path)
+            if inode is not None:
+                by_inode.setdefault(inode, []).append(path)
+        links: Dict[str, List[str]] = {}
+        representative: Dict[str, str] = {}
+        for paths in by_inode.values():
+            paths.sort()
+            links[paths[0]] = paths[1:]
+            for path in paths:
+                representative[path] = paths[0]
+
+        parent: Dict[str, str] = {}
+
+        def find(x: str) -> str:
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for inode, paths in by_inode.items():
+            path = paths[0]
+            for _, other in self.similar(self._features[path], exclude=path, exclude_inode=inode):
+                other = representative.get(other)
+                if other is None:
+                    continue
+                ra, rb = find(path), find(other)
+                if ra != rb:
+                    parent[ra] = rb
+        groups: Dict[str, List[str]] = {}
+        for path in parent:
+            groups.setdefault(find(path), []).append(path)
+        result = [[(p, links[p]) for p in sorted(g)] for g in groups.values() if len(g) > 1]
+        result.sort(key=lambda g: (-len(g), g[0][0]))
+        return result
+
+    async def features_for_file(self, path: Path, key: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+        """单独算一个文件的特征（/savepic 时用），key 为登记路径（默认即 path），失败返回 None。"""
+        result = await self._run_workers([(os.path.abspath(path), os.path.abspath(key or path))])
+        item = next(iter(result.values()), None)
+        if not item or item.get("error"):
+            return None
+        return item
+
+    def summary_line(self) -> str:
+        c = self.counters
+        state = f"{len(self._features)} 张已索引" if self.ready else "尚未索引"
+        return (
+            f"{state}，阈值 {self.threshold}，运行 {c['runs']} 次，"
+            f"新算 {c['computed']} / 复用 {c['cached']} / 失败 {c['failed']}"
+        )
+
+
+def _main() -> int:
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        task = json.loads(line)
+        try:
+            item = compute_features(task["path"], task.get("thumb"), int(task.get("thumb_size", 128)))
+            item["thumb"] = task.get("thumb")
+        except Exception as e:
+            item = {"error": f"{type(e).__name__}: {e}"}
+        item["key"] = task.get("key") or task.get("path")
+        sys.stdout.write(json.dumps(item, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
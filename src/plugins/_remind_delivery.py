@@ -0,0 +1,117 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Set
+
+from nonebot.adapters.onebot.v11 import Message, MessageSegment
+
+
+@dataclass
+class PendingReminder:
+    user_id: int
+    event_text: str
+    mention_all: bool = False
+
+
+def build_reminder_message(items: List[PendingReminder], is_group: bool) -> Message:
+    """一条提醒保持原来的格式；多条合并成一条消息，每个事件一行、各自 @。"""
+    if not is_group:
+        if len(items) == 1:
+            return Message(f"该 {items[0].event_text} 啦！")
+        return Message("\n".join(f"该 {it.event_text} 啦！" for it in items))
+
+    msg = Message()
+    for i, it in enumerate(items):
+        if i:
+            msg += Message("\n")
+        msg += MessageSegment.at("all" if it.mention_all else it.user_id) + Message(f" 该 {it.event_text} 啦！")
+    return msg
+
+
+class ReminderAggregator:
+    """同一会话在 window_seconds 内触发的提醒合并成一条消息发送，并按群限速。
+
+    提醒任务只负责 submit，数据库和下一次触发的维护仍在 send_reminder 里完成，
+    所以一次性/每天/间隔/周几各类提醒的触发语义不受合并影响。
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 2.0,
+        group_min_interval: float = 1.5,
+        max_batch: int = 15,
+        logger: Any = None,
+    ):
+        self.window_seconds = max(0.0, float(window_seconds))
+        self.group_min_interval = max(0.0, float(group_min_interval))
+        self.max_batch = max(1, int(max_batch))
+        self._logger = logger
+        self._buffers: Dict[str, List[PendingReminder]] = {}
+        self._bots: Dict[str, Any] = {}
+        self._send_locks: Dict[str, asyncio.Lock] = {}
+        self._last_sent: Dict[str, float] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self.counters: Dict[str, int] = {"submitted": 0, "messages": 0, "merged": 0, "deduped": 0, "failed": 0}
+
+    def _log(self, level: str, msg: str) -> None:
+        if self._logger is not None:
+            getattr(self._logger, level)(msg)
+
+    def submit(self, bot: Any, session_id: str, is_group: bool, user_id: int, event_text: str, mention_all: bool = False) -> None:
+        key = f"{'g' if is_group else 'p'}:{session_id}"
+        item = PendingReminder(int(user_id), str(event_text), bool(mention_all))
+        self.counters["submitted"] += 1
+        self._bots[key] = bot
+        buf = self._buffers.get(key)
+        if buf is not None:
+            if any(p.user_id == item.user_id and p.event_text == item.event_text and p.mention_all == item.mention_all for p in buf):
+                self.counters["deduped"] += 1
+                return
+            buf.append(item)
+            return
+        self._buffers[key] = [item]
+        task = asyncio.get_running_loop().create_task(self._flush_later(key, str(session_id), is_group))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_later(self, key: str, session_id: str, is_group: bool) -> None:
+        if self.window_seconds:
+            await asyncio.sleep(self.window_seconds)
+        items = self._buffers.pop(key, [])
+        bot = self._bots.pop(key, None)
+        if not items or bot is None:
+            return
+        if len(items) > 1:
+            self.counters["merged"] += len(items) - 1
+        for i in range(0, len(items), self.max_batch):
+            await self._send(bot, key, session_id, is_group, items[i:i + self.max_batch])
+
+    async def _send(self, bot: Any, key: str, session_id: str, is_group: bool, items: List[PendingReminder]) -> None:
+        lock = self._send_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if is_group and self.group_min_interval:
+                wait = self._last_sent.get(key, 0.0) + self.group_min_interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            msg = build_reminder_message(items, is_group)
+            try:
+                if is_group:
+                    await bot.send_group_msg(group_id=int(session_id), message=msg)
+                else:
+                    await bot.send_private_msg(user_id=int(session_id), message=msg)
+                self.counters["messages"] += 1
+            except Exception as e:
+                self.counters["failed"] += 1
+                self._log("error", f"提醒发送失败 Session({session_id}) 共 {len(items)} 条: {e}")
+            finally:
+                self._last_sent[key] = time.monotonic()
+
+    def pending(self) -> int:
+        return sum(len(v) for v in self._buffers.values())
+
+    def summary_line(self) -> str:
+        c = self.counters
+        return (
+            f"触发 {c['submitted']}，发出 {c['messages']} 条消息（合并 {c['merged']}，去重 {c['deduped']}），"
+            f"失败 {c['failed']}，待发 {self.pending()}"
+        )
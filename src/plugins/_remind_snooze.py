@@ -0,0 +1,103 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+class SnoozeContextStore:
+    """/notready 用的“最近一次提醒”上下文：每个会话一条，带过期时间和容量上限（LRU 淘汰）。
+
+    persist_path 给出时每次变更都原子写盘，重启后恢复未过期的上下文。
+    """
+
+    def __init__(self, ttl_seconds: float = 600, max_entries: int = 1024, persist_path: Optional[Path] = None):
+        self.ttl_seconds = max(1.0, float(ttl_seconds))
+        self.max_entries = max(1, int(max_entries))
+        self.persist_path = Path(persist_path) if persist_path else None
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.counters: Dict[str, int] = {"set": 0, "hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+        self._load()
+
+    def _load(self) -> None:
+        if self.persist_path is None or not self.persist_path.exists():
+            return
+        try:
+            raw = json.loads(self.persist_path.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            return
+        if not isinstance(raw, dict):
+            return
+        now = time.time()
+        entries = [
+            (str(k), v) for k, v in raw.items()
+            if isinstance(v, dict) and now - float(v.get("timestamp", 0) or 0) <= self.ttl_seconds
+        ]
+        entries.sort(key=lambda kv: float(kv[1].get("timestamp", 0)))
+        for k, v in entries[-self.max_entries:]:
+            self._items[k] = v
+
+    def _save(self) -> None:
+        if self.persist_path is None:
+            return
+        try:
+            self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.persist_path.with_name(self.persist_path.name + ".tmp")
+            tmp.write_text(json.dumps(self._items, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.persist_path)
+        except OSError:
+            pass
+
+    def _prune_expired(self, now: float) -> None:
+        # 按写入顺序排列，最旧的在前，遇到未过期的就可以停
+        while self._items:
+            key, ctx = next(iter(self._items.items()))
+            if now - float(ctx.get("timestamp", 0)) <= self.ttl_seconds:
+                break
+            self._items.popitem(last=False)
+            self.counters["expired"] += 1
+
+    def set(self, session_id: str, event_text: str) -> None:
+        now = time.time()
+        key = str(session_id)
+        self._items.pop(key, None)
+        self._items[key] = {"event": event_text, "timestamp": now}
+        self.counters["set"] += 1
+        self._prune_expired(now)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+            self.counters["evicted"] += 1
+        self._save()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """返回未过期的上下文；过期的顺手删掉并按未命中计。"""
+        key = str(session_id)
+        ctx = self._items.get(key)
+        if ctx is None:
+            self.counters["misses"] += 1
+            return None
+        if time.time() - float(ctx.get("timestamp", 0)) > self.ttl_seconds:
+            self._items.pop(key, None)
+            self.counters["expired"] += 1
+            self.counters["misses"] += 1
+            self._save()
+            return None
+        self.counters["hits"] += 1
+        return ctx
+
+    def pop(self, session_id: str) -> Optional[Dict[str, Any]]:
+        ctx = self._items.pop(str(session_id), None)
+        if ctx is not None:
+            self._save()
+        return ctx
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def summary_line(self) -> str:
+        c = self.counters
+        return (
+            f"{len(self._items)}/{self.max_entries} 条（TTL {int(self.ttl_seconds)}s），"
+            f"命中 {c['hits']} / 未命中 {c['misses']}，过期 {c['expired']}，淘汰 {c['evicted']}"
+        )
@@ -0,0 +1,269 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, time as dtime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    job_id       TEXT PRIMARY KEY,
+    owner_id     TEXT NOT NULL,
+    event        TEXT NOT NULL,
+    session_id   TEXT NOT NULL,
+    is_group     INTEGER NOT NULL DEFAULT 0,
+    next_fire_at REAL,
+    created_at   REAL NOT NULL,
+    data         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reminders_owner_event ON reminders(owner_id, event);
+CREATE INDEX IF NOT EXISTS idx_reminders_session ON reminders(session_id);
+CREATE INDEX IF NOT EXISTS idx_reminders_next_fire ON reminders(next_fire_at);
+CREATE INDEX IF NOT EXISTS idx_reminders_owner_next_fire ON reminders(owner_id, next_fire_at);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def compute_next_fire(reminder: Dict[str, Any], now: datetime) -> Optional[datetime]:
+    """按提醒规则（周几/每天/间隔/日期）算下一次触发时间，now 需带时区。
+
+    间隔提醒真正的下一次取决于上次触发，这里按创建时的规则估算；
+    有调度器的 job.next_run_time 时应以调度器为准。
+    """
+    hour, minute = reminder.get("hour"), reminder.get("minute")
+    if not isinstance(hour, int) or not isinstance(minute, int):
+        return None
+    try:
+        start_date = datetime.strptime(reminder["date"], "%Y-%m-%d").date() if reminder.get("date") else None
+    except (TypeError, ValueError):
+        start_date = None
+
+    def at(d) -> datetime:
+        return datetime.combine(d, dtime(hour, minute), tzinfo=now.tzinfo)
+
+    weekdays = reminder.get("weekdays")
+    if weekdays:
+        for i in range(8):
+            d = now.date() + timedelta(days=i)
+            if d.weekday() in weekdays and at(d) > now:
+                return at(d)
+        return None
+    if reminder.get("is_daily"):
+        d = max(now.date(), start_date) if start_date else now.date()
+        cand = at(d)
+        return cand if cand > now else at(d + timedelta(days=1))
+    interval = reminder.get("interval_days")
+    if interval:
+        cand = at(start_date) if start_date else at(now.date())
+        return cand if cand > now else at(now.date() + timedelta(days=int(interval)))
+    return at(start_date) if start_date else at(now.date())
+
+
+class ReminderStore:
+    """提醒数据的 SQLite（WAL）存储。
+
+    owner_id 沿用旧 reminders_data.json 的顶层 key（被提醒人 / remindall 的发起人），
+    每行的 data 列保存完整的提醒 dict，对外读写的仍是和以前一样的 dict，
+    增删改都是单行事务，不再整文件重写。
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _row_values(owner_id: str, reminder: Dict[str, Any], next_fire_at: Optional[float] = None) -> Tuple[Any, ...]:
+        return (
+            str(reminder["job_id"]),
+            str(owner_id),
+            str(reminder.get("event", "")),
+            str(reminder.get("session_id", "")),
+            1 if reminder.get("is_group") else 0,
+            next_fire_at,
+            time.time(),
+            json.dumps(reminder, ensure_ascii=False),
+        )
+
+    def _insert(self, owner_id: str, reminder: Dict[str, Any], next_fire_at: Optional[float] = None) -> None:
+        self._conn.execute(
+            "INSERT INTO reminders"
+            " (job_id, owner_id, event, session_id, is_group, next_fire_at, created_at, data)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+            # 已存在时保留原来的 created_at，列表/分页按它排同一时间的提醒
+            " ON CONFLICT(job_id) DO UPDATE SET owner_id = excluded.owner_id, event = excluded.event,"
+            " session_id = excluded.session_id, is_group = excluded.is_group,"
+            " next_fire_at = excluded.next_fire_at, data = excluded.data",
+            self._row_values(owner_id, reminder, next_fire_at),
+        )
+
+    def put(
+        self,
+        owner_id: str,
+        reminder: Dict[str, Any],
+        replaces: Optional[str] = None,
+        next_fire_at: Optional[float] = None,
+    ) -> None:
+        """写入一条提醒；replaces 给出时在同一事务里删掉被替换的旧提醒。"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if replaces and replaces != reminder.get("job_id"):
+                    self._conn.execute("DELETE FROM reminders WHERE job_id = ?", (replaces,))
+                self._insert(owner_id, reminder, next_fire_at)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM reminders WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_by_event(self, owner_id: str, event: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM reminders WHERE owner_id = ? AND event = ? ORDER BY created_at LIMIT 1",
+                (str(owner_id), event),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_for_owner(self, owner_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM reminders WHERE owner_id = ? ORDER BY created_at", (str(owner_id),)
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def count_for_owner(self, owner_id: str) -> int:
+        with self._lock:
+            return int(
+                self._conn.execute("SELECT COUNT(*) FROM reminders WHERE owner_id = ?", (str(owner_id),)).fetchone()[0]
+            )
+
+    def page_for_owner(self, owner_id: str, offset: int, limit: int) -> List[Tuple[Optional[float], Dict[str, Any]]]:
+        """按下一次触发时间顺序读一页（没有触发时间的排最后），返回 [(next_fire_at, reminder)]。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT next_fire_at, data FROM reminders WHERE owner_id = ?"
+                " ORDER BY next_fire_at IS NULL, next_fire_at, created_at LIMIT ? OFFSET ?",
+                (str(owner_id), int(limit), int(offset)),
+            ).fetchall()
+        return [(r[0], json.loads(r[1])) for r in rows]
+
+    def stale_next_fire(self, before: float) -> List[Tuple[str, Dict[str, Any]]]:
+        """下一次触发时间缺失或已过去的提醒（启动对账时刷新）。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT owner_id, data FROM reminders WHERE next_fire_at IS NULL OR next_fire_at < ?", (before,)
+            ).fetchall()
+        return [(r[0], json.loads(r[1])) for r in rows]
+
+    def list_for_session(self, session_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM reminders WHERE session_id = ? ORDER BY created_at", (str(session_id),)
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def iter_all(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute("SELECT owner_id, data FROM reminders ORDER BY created_at").fetchall()
+        for owner_id, data in rows:
+            yield owner_id, json.loads(data)
+
+    def delete(self, job_id: str) -> bool:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM reminders WHERE job_id = ?", (job_id,))
+        return cur.rowcount > 0
+
+    def delete_many(self, job_ids: Iterable[str]) -> int:
+        ids = [(j,) for j in job_ids]
+        if not ids:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = self._conn.executemany("DELETE FROM reminders WHERE job_id = ?", ids)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cur.rowcount
+
+    def set_next_fire_at(self, job_id: str, ts: Optional[float]) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE reminders SET next_fire_at = ? WHERE job_id = ?", (ts, job_id))
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM reminders").fetchone()[0])
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM store_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def migrate_from_json(self, json_path: Path) -> int:
+        """一次性导入旧的 reminders_data.json（{owner_id: [reminder, ...]}），返回导入条数。
+
+        导入完成后在 store_meta 里打标记，旧文件保留不动，之后不会重复导入。
+        旧文件存在但读不出来或不是合法 JSON 时直接抛出、不打标记，修好文件后下次启动会重新导入。
+        """
+        json_path = Path(json_path)
+        with self._lock:
+            if self._get_meta("json_migrated"):
+                return 0
+            data: Any = {}
+            if json_path.exists():
+                data = json.loads(json_path.read_text(encoding="utf-8"))
+            imported = 0
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if isinstance(data, dict):
+                    for owner_id, reminders in data.items():
+                        if not isinstance(reminders, list):
+                            continue
+                        for r in reminders:
+                            if isinstance(r, dict) and r.get("job_id"):
+                                self._insert(str(owner_id), r)
+                                imported += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)",
+                    ("json_migrated", json.dumps({"at": time.time(), "source": str(json_path), "count": imported})),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return imported
+
+    def export_json(self, out_path: Path) -> int:
+        """导出成旧格式的 JSON（原子替换），用于备份或回滚；返回导出条数。"""
+        out_path = Path(out_path)
+        data: Dict[str, List[Dict[str, Any]]] = {}
+        n = 0
+        for owner_id, reminder in self.iter_all():
+            data.setdefault(owner_id, []).append(reminder)
+            n += 1
+        tmp = out_path.with_name(out_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, out_path)
+        return n
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
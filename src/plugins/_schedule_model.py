@@ -0,0 +1,65 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+def weeks_to_mask(weeks: Iterable[Any]) -> int:
+    """周数列表转位图（第 n 周对应 1 << n），非法值忽略。"""
+    mask = 0
+    for w in weeks or ():
+        try:
+            w = int(w)
+        except (TypeError, ValueError):
+            continue
+        if w >= 1:
+            mask |= 1 << w
+    return mask
+
+
+def mask_to_weeks(mask: int) -> List[int]:
+    weeks: List[int] = []
+    while mask:
+        low = mask & -mask
+        weeks.append(low.bit_length() - 1)
+        mask ^= low
+    return weeks
+
+
+class ScheduleIndex:
+    """课表数据解析后的只读模型：开学日期、课程列表，以及 周 -> 星期 -> 按节次排好序的课程 索引。
+
+    数据一变就整体重建（课表只有几十门课，重建很便宜），格式化好的回复缓存在 replies 里随模型一起失效。
+    """
+
+    def __init__(self, data: Dict[str, Any], default_start: datetime):
+        date_str = data.get("semester_start_date", default_start.strftime("%Y-%m-%d"))
+        try:
+            self.semester_start = datetime.strptime(date_str, "%Y-%m-%d")
+        except (TypeError, ValueError):
+            self.semester_start = default_start
+        self.courses: List[Dict[str, Any]] = [c for c in data.get("courses", []) if isinstance(c, dict)]
+        self.week_masks: List[int] = [weeks_to_mask(c.get("weeks", [])) for c in self.courses]
+        self.replies: Dict[Tuple[Any, ...], str] = {}
+        # 课表内容的版本号，用作渲染图片的缓存 key
+        self.version = hashlib.sha1(
+            json.dumps(data, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:12]
+
+        by_week: Dict[int, Dict[int, List[Dict[str, Any]]]] = {}
+        for course, mask in zip(self.courses, self.week_masks):
+            day = course.get("day")
+            for week in mask_to_weeks(mask):
+                by_week.setdefault(week, {}).setdefault(day, []).append(course)
+        for days in by_week.values():
+            for courses in days.values():
+                courses.sort(key=lambda c: c.get("start_section", 0))
+        self._by_week = by_week
+
+    def week(self, week: int) -> Dict[int, List[Dict[str, Any]]]:
+        """某一周每天的课程（只含有课的天），按星期排序。"""
+        days = self._by_week.get(week, {})
+        return {d: days[d] for d in sorted(days, key=lambda d: d or 0)}
+
+    def day(self, week: int, weekday: int) -> List[Dict[str, Any]]:
+        return self._by_week.get(week, {}).get(weekday, [])
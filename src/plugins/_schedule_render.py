@@ -0,0 +1,306 @@
+"""周课表图片渲染。
+
+渲染本身（render_week_image）只依赖 Pillow 和标准库，由 TimetableRenderer 以独立子进程
+（python 本文件，stdin 传 JSON）执行，不占用事件循环，也不依赖插件的模块导入方式。
+"""
+import asyncio
+import json
+import os
+import sys
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# 与 quote.py 相同的中文字体查找顺序
+FONT_PATHS = [
+    "/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc",
+    "C:/Windows/Fonts/msyh.ttc",  # Windows 微软雅黑
+    "C:/Windows/Fonts/simhei.ttf",  # Windows 黑体
+]
+
+WEEKDAY_NAMES = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+
+# 课程色块配色（按课程名哈希取色）
+COURSE_COLORS = [
+    (232, 243, 255), (255, 240, 228), (231, 248, 236), (250, 234, 245),
+    (255, 248, 220), (235, 236, 255), (226, 246, 246), (246, 238, 226),
+]
+BG_COLOR = (250, 250, 250)
+GRID_COLOR = (225, 225, 225)
+HEADER_BG = (240, 242, 245)
+TEXT_COLOR = (40, 40, 40)
+SUB_TEXT_COLOR = (110, 110, 110)
+TITLE_COLOR = (20, 20, 20)
+
+COL_WIDTH = 150
+TIME_COL_WIDTH = 96
+ROW_HEIGHT = 64
+HEADER_HEIGHT = 60
+TITLE_HEIGHT = 56
+PADDING = 16
+
+
+def _get_font(size: int):
+    from PIL import ImageFont
+
+    for font_path in FONT_PATHS:
+        if os.path.exists(font_path):
+            try:
+                return ImageFont.truetype(font_path, size)
+            except Exception:
+                continue
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except Exception:
+        return ImageFont.load_default()
+
+
+def _wrap(draw, text: str, font, width: int, max_lines: int) -> List[str]:
+    lines: List[str] = []
+    line = ""
+    for ch in text:
+        if draw.textlength(line + ch, font=font) <= width:
+            line += ch
+            continue
+        lines.append(line)
+        line = ch
+        if len(lines) == max_lines:
+            break
+    if line and len(lines) < max_lines:
+        lines.append(line)
+    if len(lines) == max_lines and "".join(lines) != text and lines[-1]:
+        lines[-1] = lines[-1][:-1] + "…"
+    return lines
+
+
+def _assign_lanes(courses: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], int, int]]:
+    """同一天时间重叠的课并排显示：返回 (课程, 所在列, 该组列数)。"""
+    ordered = sorted(courses, key=lambda c: (c.get("start_section", 0), c.get("end_section", 0)))
+    placed: List[Tuple[Dict[str, Any], int, int]] = []
+    group: List[Tuple[Dict[str, Any], int]] = []
+    lane_ends: List[int] = []
+    group_end = 0
+
+    def close_group():
+        lanes = max((lane for _, lane in group), default=0) + 1
+        placed.extend((c, lane, lanes) for c, lane in group)
+
+    for c in ordered:
+        start, end = int(c.get("start_section", 1)), int(c.get("end_section", 1))
+        if group and start > group_end:
+            close_group()
+            group, lane_ends, group_end = [], [], 0
+        for lane, lane_end in enumerate(lane_ends):
+            if start > lane_end:
+                lane_ends[lane] = end
+                break
+        else:
+            lane = len(lane_ends)
+            lane_ends.append(end)
+        group.append((c, lane))
+        group_end = max(group_end, end)
+    if group:
+        close_group()
+    return placed
+
+
+def render_week_image(payload: Dict[str, Any], out_path: str) -> str:
+    """按 payload 画一周课表并原子写到 out_path。
+
+    payload: {"title": str, "dates": [7 个 "MM-DD"], "section_times": {节次: "HH:MM-HH:MM"},
+              "days": {星期(1-7): [课程 dict, ...]}}
+    """
+    from PIL import Image, ImageDraw
+
+    section_times = {int(k): v for k, v in payload.get("section_times", {}).items()}
+    sections = sorted(section_times) or list(range(1, 13))
+    days = {int(k): v for k, v in payload.get("days", {}).items()}
+    # 周末没课时只画周一到周五
+    day_count = 7 if days.get(6) or days.get(7) else 5
+    dates = payload.get("dates") or [""] * 7
+
+    width = PADDING * 2 + TIME_COL_WIDTH + COL_WIDTH * day_count
+    height = PADDING * 2 + TITLE_HEIGHT + HEADER_HEIGHT + ROW_HEIGHT * len(sections)
+    img = Image.new("RGB", (width, height), BG_COLOR)
+    draw = ImageDraw.Draw(img)
+
+    title_font = _get_font(26)
+    header_font = _get_font(20)
+    small_font = _get_font(14)
+    name_font = _get_font(17)
+
+    draw.text((PADDING, PADDING + 10), payload.get("title", ""), font=title_font, fill=TITLE_COLOR)
+
+    grid_left = PADDING
+    grid_top = PADDING + TITLE_HEIGHT
+    body_top = grid_top + HEADER_HEIGHT
+    grid_right = grid_left + TIME_COL_WIDTH + COL_WIDTH * day_count
+    grid_bottom = body_top + ROW_HEIGHT * len(sections)
+
+    draw.rectangle((grid_left, grid_top, grid_right, body_top), fill=HEADER_BG)
+    for d in range(day_count):
+        x = grid_left + TIME_COL_WIDTH + COL_WIDTH * d
+        draw.text((x + COL_WIDTH / 2, grid_top + 20), WEEKDAY_NAMES[d], font=header_font, fill=TEXT_COLOR, anchor="mm")
+        if d < len(dates) and dates[d]:
+            draw.text((x + COL_WIDTH / 2, grid_top + 44), dates[d], font=small_font, fill=SUB_TEXT_COLOR, anchor="mm")
+
+    for i, sec in enumerate(sections):
+        y = body_top + ROW_HEIGHT * i
+        start_t, _, end_t = section_times.get(sec, "").partition("-")
+        draw.text((grid_left + TIME_COL_WIDTH / 2, y + 20), f"第{sec}节", font=header_font, fill=TEXT_COLOR, anchor="mm")
+        if start_t:
+            draw.text((grid_left + TIME_COL_WIDTH / 2, y + 44), f"{start_t}-{end_t}", font=small_font, fill=SUB_TEXT_COLOR, anchor="mm")
+
+    for i in range(len(sections) + 1):
+        y = body_top + ROW_HEIGHT * i
+        draw.line((grid_left, y, grid_right, y), fill=GRID_COLOR, width=1)
+    draw.line((grid_left, grid_top, grid_right, grid_top), fill=GRID_COLOR, width=1)
+    for d in range(day_count + 1):
+        x = grid_left + TIME_COL_WIDTH + COL_WIDTH * d
+        draw.line((x, grid_top, x, grid_bottom), fill=GRID_COLOR, width=1)
+    draw.line((grid_left, grid_top, grid_left, grid_bottom), fill=GRID_COLOR, width=1)
+
+    row_of = {sec: i for i, sec in enumerate(sections)}
+    for day in range(1, day_count + 1):
+        col_x = grid_left + TIME_COL_WIDTH + COL_WIDTH * (day - 1)
+        for course, lane, lanes in _assign_lanes(days.get(day, [])):
+            start, end = int(course.get("start_section", 1)), int(course.get("end_section", 1))
+            if start not in row_of or end not in row_of:
+                continue
+            lane_w = COL_WIDTH / lanes
+            x0 = col_x + lane_w * lane + 3
+            x1 = col_x + lane_w * (lane + 1) - 3
+            y0 = body_top + ROW_HEIGHT * row_of[start] + 3
+            y1 = body_top + ROW_HEIGHT * (row_of[end] + 1) - 3
+            name = str(course.get("name", ""))
+            color = COURSE_COLORS[zlib.crc32(name.encode("utf-8")) % len(COURSE_COLORS)]
+            draw.rounded_rectangle((x0, y0, x1, y1), radius=8, fill=color)
+
+            inner_w = int(x1 - x0 - 12)
+            max_lines = max(1, int((y1 - y0 - 8) // 22))
+            lines = _wrap(draw, name, name_font, inner_w, max(1, max_lines - 1))
+            ty = y0 + 6
+            for line in lines:
+                draw.text((x0 + 6, ty), line, font=name_font, fill=TEXT_COLOR)
+                ty += 22
+            details = []
+            if course.get("location"):
+                details.append(f"@{course['location']}")
+            if course.get("teacher"):
+                details.append(str(course["teacher"]))
+            for detail in details:
+                if ty + 18 > y1:
+                    break
+                for line in _wrap(draw, detail, small_font, inner_w, 1):
+                    draw.text((x0 + 6, ty), line, font=small_font, fill=SUB_TEXT_COLOR)
+                ty += 18
+
+    out = Path(out_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + ".tmp")
+    img.save(tmp, format="PNG", optimize=True)
+    os.replace(tmp, out)
+    return str(out)
+
+
+class TimetableRenderer:
+    """周课表图片的磁盘缓存 + 子进程渲染。
+
+    缓存文件名带课表版本号和周数，课表一改版本号就变，旧图片由 prune 清理。
+    同一张图并发请求只渲染一次，同时最多 max_workers 个渲染子进程。
+    """
+
+    def __init__(self, cache_dir: Path, max_workers: int = 1, timeout: float = 60.0, logger: Any = None):
+        self.cache_dir = Path(cache_dir)
+        self.timeout = float(timeout)
+        self._logger = logger
+        self._sem = asyncio.Semaphore(max(1, int(max_workers)))
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.counters: Dict[str, int] = {"hits": 0, "rendered": 0, "failed": 0}
+
+    def _log(self, level: str, msg: str) -> None:
+        if self._logger is not None:
+            getattr(self._logger, level)(msg)
+
+    def cache_path(self, version: str, week: int) -> Path:
+        return self.cache_dir / f"week_{version}_{int(week)}.png"
+
+    def cached(self, version: str, week: int) -> Optional[Path]:
+        path = self.cache_path(version, week)
+        return path if path.exists() else None
+
+    async def get_or_render(self, version: str, week: int, payload: Dict[str, Any]) -> Optional[Path]:
+        path = self.cache_path(version, week)
+        if path.exists():
+            self.counters["hits"] += 1
+            return path
+        key = path.name
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.get_running_loop().create_task(self._render(payload, path))
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda _f, k=key: self._inflight.pop(k, None))
+        return await asyncio.shield(fut)
+
+    async def _render(self, payload: Dict[str, Any], path: Path) -> Optional[Path]:
+        async with self._sem:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    sys.executable, str(Path(__file__).resolve()), str(path),
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+                try:
+                    _, stderr = await asyncio.wait_for(
+                        proc.communicate(json.dumps(payload, ensure_ascii=False).encode("utf-8")), self.timeout
+                    )
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+                    raise RuntimeError(f"渲染超时（{self.timeout:.0f}s）")
+                if proc.returncode != 0:
+                    raise RuntimeError(stderr.decode("utf-8", "replace").strip()[-300:] or f"exit {proc.returncode}")
+            except Exception as e:
+                self.counters["failed"] += 1
+                self._log("warning", f"课表图片渲染失败 {path.name}: {e}")
+                return None
+        self.counters["rendered"] += 1
+        return path if path.exists() else None
+
+    def prune(self, version: str) -> int:
+        """删掉不是当前版本的缓存图片。"""
+        removed = 0
+        if not self.cache_dir.exists():
+            return 0
+        for p in self.cache_dir.glob("week_*.png"):
+            if not p.name.startswith(f"week_{version}_"):
+                try:
+                    p.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    def summary_line(self) -> str:
+        c = self.counters
+        return f"缓存命中 {c['hits']}，渲染 {c['rendered']}，失败 {c['failed']}"
+
+
+def _main() -> int:
+    if len(sys.argv) != 2:
+        print("usage: _schedule_render.py OUT_PNG < payload.json", file=sys.stderr)
+        return 2
+    payload = json.loads(sys.stdin.buffer.read().decode("utf-8"))
+    render_week_image(payload, sys.argv[1])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main())
@@ -0,0 +1,88 @@
+import hashlib
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from ._json_store import JsonStore
+
+
+def match_set_key(names: Sequence[str]) -> str:
+    """命中文件集合的稳定哈希（与顺序无关，跨进程一致）。"""
+    h = hashlib.blake2b(digest_size=8)
+    for name in sorted(set(names)):
+        h.update(name.encode("utf-8", "surrogatepass"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ShuffleBagManager:
+    """按命中集合维护的“洗牌袋”：袋里每个文件都发过一遍才重新洗牌，且洗牌后第一张不会和上一张相同。
+
+    袋按集合哈希存放，只记录剩余文件在排序后列表里的下标和上一次发送的下标，
+    LRU 方式最多保留 max_bags 个；给了 persist_path 时状态写盘（合并延迟写），重启后继续不重复。
+    """
+
+    def __init__(self, max_bags: int = 512, persist_path: Optional[Path] = None, rng: Optional[random.Random] = None):
+        self.max_bags = max(1, int(max_bags))
+        self._rng = rng or random.Random()
+        self._store = JsonStore(persist_path) if persist_path else None
+        self._bags: Dict[str, Dict[str, object]] = {}
+        if self._store is not None:
+            loaded = self._store.load()
+            if isinstance(loaded, dict):
+                self._bags = {
+                    k: v for k, v in loaded.items()
+                    if isinstance(v, dict) and isinstance(v.get("r"), list)
+                }
+            self._store.data = self._bags
+        self.counters: Dict[str, int] = {"draws": 0, "reshuffles": 0, "evicted": 0}
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._bags) > self.max_bags:
+            # dict 保持插入顺序，最早的就是最久没用的
+            self._bags.pop(next(iter(self._bags)))
+            self.counters["evicted"] += 1
+
+    def draw(self, names: Sequence[str]) -> str:
+        """从命中集合里取下一张。"""
+        ordered: List[str] = sorted(set(names))
+        if not ordered:
+            raise ValueError("empty match set")
+        key = match_set_key(ordered)
+        bag = self._bags.pop(key, None)
+        remaining = bag.get("r") if bag else None
+        last = bag.get("l") if bag else None
+        if not remaining or not all(isinstance(i, int) and 0 <= i < len(ordered) for i in remaining):
+            remaining = list(range(len(ordered)))
+            self._rng.shuffle(remaining)
+            # 下一张（列表末尾）不能和上一次发的一样
+            if len(remaining) > 1 and remaining[-1] == last:
+                remaining[0], remaining[-1] = remaining[-1], remaining[0]
+            self.counters["reshuffles"] += 1
+        idx = remaining.pop()
+        self._bags[key] = {"r": remaining, "l": idx}
+        self.counters["draws"] += 1
+        self._evict()
+        if self._store is not None:
+            self._store.mark_dirty()
+        return ordered[idx]
+
+    def __len__(self) -> int:
+        return len(self._bags)
+
+    def approx_bytes(self) -> int:
+        """袋状态占用内存的粗略估计（dict + 下标列表）。"""
+        total = sys.getsizeof(self._bags)
+        for key, bag in self._bags.items():
+            remaining = bag.get("r") or []
+            total += sys.getsizeof(key) + sys.getsizeof(bag) + sys.getsizeof(remaining) + 28 * len(remaining)
+        return total
+
+    def summary_line(self) -> str:
+        c = self.counters
+        return (
+            f"{len(self._bags)}/{self.max_bags} 个袋，约 {self.approx_bytes() / 1024:.1f} KiB，"
+            f"抽取 {c['draws']}，洗牌 {c['reshuffles']}，淘汰 {c['evicted']}"
+        )
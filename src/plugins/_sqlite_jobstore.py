@@ -0,0 +1,175 @@
+import pickle
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, List, Optional, Set
+
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+
+
+# 提醒、天气等需要跨重启保留的任务都放在这个 job store 里
+PERSISTENT_JOBSTORE = "persistent"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS apscheduler_jobs (
+    id            TEXT PRIMARY KEY,
+    next_run_time REAL,
+    job_state     BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_apscheduler_jobs_next_run ON apscheduler_jobs(next_run_time);
+"""
+
+
+class SQLiteJobStore(BaseJobStore):
+    """只依赖标准库 sqlite3 的 apscheduler 持久化 job store（WAL）。
+
+    行为与 apscheduler 自带的 SQLAlchemyJobStore 一致：job 状态 pickle 后按 id 存一行，
+    按 next_run_time 建索引。job 的参数必须可 pickle，所以不能直接放 Bot 对象，
+    任务触发时再用 resolve_bot(self_id) 取当前在线的 Bot。
+    """
+
+    def __init__(self, db_path: Path, pickle_protocol: int = pickle.HIGHEST_PROTOCOL):
+        super().__init__()
+        self.db_path = Path(db_path)
+        self.pickle_protocol = pickle_protocol
+        self._lock = threading.Lock()
+        # 构造时就打开，调度器启动前也能做 id 对账
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _reconstitute_job(self, job_state: bytes) -> Job:
+        state = pickle.loads(job_state)
+        state["jobstore"] = self
+        job = Job.__new__(Job)
+        job.__setstate__(state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, where: str = "", params: tuple = ()) -> List[Job]:
+        sql = "SELECT id, job_state FROM apscheduler_jobs"
+        if where:
+            sql += f" WHERE {where}"
+        sql += " ORDER BY next_run_time IS NULL, next_run_time"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        jobs: List[Job] = []
+        failed: List[str] = []
+        for job_id, state in rows:
+            try:
+                jobs.append(self._reconstitute_job(state))
+            except Exception:
+                self._logger.exception(f"Unable to restore job {job_id!r} -- removing it")
+                failed.append(job_id)
+        if failed:
+            with self._lock:
+                self._conn.executemany("DELETE FROM apscheduler_jobs WHERE id = ?", [(j,) for j in failed])
+        return jobs
+
+    def lookup_job(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT job_state FROM apscheduler_jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._reconstitute_job(row[0]) if row else None
+
+    def get_due_jobs(self, now):
+        return self._get_jobs("next_run_time <= ?", (datetime_to_utc_timestamp(now),))
+
+    def get_next_run_time(self):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT next_run_time FROM apscheduler_jobs WHERE next_run_time IS NOT NULL"
+                " ORDER BY next_run_time LIMIT 1"
+            ).fetchone()
+        return utc_timestamp_to_datetime(row[0]) if row else None
+
+    def get_all_jobs(self):
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def add_job(self, job):
+        state = pickle.dumps(job.__getstate__(), self.pickle_protocol)
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO apscheduler_jobs (id, next_run_time, job_state) VALUES (?, ?, ?)",
+                    (job.id, datetime_to_utc_timestamp(job.next_run_time), state),
+                )
+        except sqlite3.IntegrityError:
+            raise ConflictingIdError(job.id)
+
+    def update_job(self, job):
+        state = pickle.dumps(job.__getstate__(), self.pickle_protocol)
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE apscheduler_jobs SET next_run_time = ?, job_state = ? WHERE id = ?",
+                (datetime_to_utc_timestamp(job.next_run_time), state, job.id),
+            )
+        if cur.rowcount == 0:
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id):
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM apscheduler_jobs WHERE id = ?", (job_id,))
+        if cur.rowcount == 0:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM apscheduler_jobs")
+
+    def job_ids(self, prefix: str = "") -> Set[str]:
+        """只读 id 列，供启动对账用，不反序列化 job。"""
+        with self._lock:
+            if prefix:
+                rows = self._conn.execute(
+                    "SELECT id FROM apscheduler_jobs WHERE substr(id, 1, ?) = ?", (len(prefix), prefix)
+                ).fetchall()
+            else:
+                rows = self._conn.execute("SELECT id FROM apscheduler_jobs").fetchall()
+        return {r[0] for r in rows}
+
+    def shutdown(self):
+        with self._lock:
+            self._conn.close()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} (path={self.db_path})>"
+
+
+_store: Optional[SQLiteJobStore] = None
+
+
+def ensure_persistent_jobstore(scheduler: Any, db_path: Path) -> Optional[SQLiteJobStore]:
+    """多个插件共用同一个持久化 job store，只注册一次；注册失败返回 None（调用方退回默认内存 store）。"""
+    global _store
+    if _store is not None:
+        return _store
+    store = SQLiteJobStore(db_path)
+    try:
+        scheduler.add_jobstore(store, alias=PERSISTENT_JOBSTORE)
+    except ValueError:
+        # 别的模块已经注册过同名 store（例如插件被重复加载）
+        store.shutdown()
+        existing = scheduler._lookup_jobstore(PERSISTENT_JOBSTORE)
+        _store = existing if isinstance(existing, SQLiteJobStore) else None
+        return _store
+    _store = store
+    return _store
+
+
+def resolve_bot(self_id: Any) -> Any:
+    """任务触发时取在线的 Bot：优先原来的账号，掉线换号时退回任意一个在线 Bot。"""
+    from nonebot import get_bots
+
+    bots = get_bots()
+    bot = bots.get(str(self_id)) if self_id else None
+    if bot is None and bots:
+        bot = next(iter(bots.values()))
+    return bot
@@ -1,21 +1,45 @@
+import asyncio
 import json
+import os
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
 from zoneinfo import ZoneInfo
-from nonebot import on_command
+from nonebot import on_command, require
 from nonebot.matcher import Matcher
 from nonebot.adapters.onebot.v11 import MessageEvent, Message
 from nonebot.params import CommandArg
 from nonebot.log import logger
 
 from ._data_paths import resolve_data_dir
+from ._json_store import JsonStore
+from ._countdown_index import DeadlineIndex
 
 plugin_dir = Path(__file__).parent
 data_dir = resolve_data_dir()
 
 data_file = data_dir / "countdown_data.json"
+countdown_store = JsonStore(data_file)
+archive_file = data_dir / "countdown_archive.jsonl"
+
+# 截止时间过去多少天后把事件移到归档文件，以及清理任务的执行间隔（分钟）
+try:
+    COUNTDOWN_ARCHIVE_AFTER_DAYS = float(os.getenv("COUNTDOWN_ARCHIVE_AFTER_DAYS", "7"))
+except ValueError:
+    COUNTDOWN_ARCHIVE_AFTER_DAYS = 7.0
+try:
+    COUNTDOWN_SWEEP_INTERVAL_MINUTES = int(os.getenv("COUNTDOWN_SWEEP_INTERVAL_MINUTES", "60"))
+except ValueError:
+    COUNTDOWN_SWEEP_INTERVAL_MINUTES = 60
+
+try:
+    require("nonebot_plugin_apscheduler")
+    from nonebot_plugin_apscheduler import scheduler
+except (ImportError, RuntimeError):
+    logger.warning("插件 nonebot_plugin_apscheduler 未加载，过期倒计时不会自动归档")
+    scheduler = None
 
 
 try:
@@ -27,23 +51,47 @@ except Exception:
 
 CountdownDataType = Dict[str, Dict[str, Dict[str, Any]]]
 countdown_data: CountdownDataType = {}
+deadline_index = DeadlineIndex()
 
 
 def save_data():
-    with open(data_file, "w", encoding="utf-8") as f:
-        json.dump(countdown_data, f, ensure_ascii=False, indent=4)
+    countdown_store.mark_dirty()
 
 
 def load_data():
     global countdown_data
-    if data_file.exists():
-        with open(data_file, "r", encoding="utf-8") as f:
-            try:
-                countdown_data = json.load(f)
-            except json.JSONDecodeError:
-                countdown_data = {}
-    else:
-        countdown_data = {}
+    countdown_data = countdown_store.load()
+    rebuild_index()
+
+
+def _parse_event_time(value: Any) -> Optional[datetime]:
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=TARGET_TZ)
+    return dt
+
+
+def index_event(user_id: str, event_name: str, event_data: Dict[str, Any]) -> None:
+    event_time = _parse_event_time(event_data.get("time"))
+    if event_time is None:
+        return
+    created_at = _parse_event_time(event_data.get("created_at"))
+    # 添加时就已经是过去时间的事件是用来看“已经过去多久”的，不自动归档
+    archivable = created_at is not None and created_at < event_time
+    deadline_index.add(user_id, event_name, event_time.timestamp(), archivable=archivable)
+
+
+def rebuild_index() -> None:
+    deadline_index.clear()
+    for user_id, events in countdown_data.items():
+        if not isinstance(events, dict):
+            continue
+        for event_name, event_data in events.items():
+            if isinstance(event_data, dict):
+                index_event(user_id, event_name, event_data)
 
 
 def init_user_data(user_id: str):
@@ -75,8 +123,10 @@ def parse_datetime(date_str: str) -> datetime:
 
 
 def format_timedelta(td):
-    total_seconds = abs(int(td.total_seconds()))
+    return _format_seconds(abs(int(td.total_seconds())))
+
 
+def _format_seconds(total_seconds: int) -> str:
     days = total_seconds // 86400
     hours = (total_seconds % 86400) // 3600
     minutes = (total_seconds % 3600) // 60
@@ -102,8 +152,70 @@ def format_relative_time(td):
     return f"已过去：{time_text}"
 
 
+def render_event_list(user_id: str) -> str:
+    """按截止时间排序的事件列表（顺序直接取索引，不再每次排序）。"""
+    now_sec = int(time.time())
+    events = countdown_data.get(user_id, {})
+    active_events = []
+    for event_name, ts in deadline_index.ordered(user_id):
+        event_data = events.get(event_name)
+        if event_data is None:
+            continue
+        remaining = int(ts) - now_sec
+        time_text = _format_seconds(abs(remaining))
+        relative = f"剩余：{time_text}" if remaining >= 0 else f"已过去：{time_text}"
+        active_events.append(f"📌 {event_name}\n   截止：{event_data['time']}\n   {relative}")
+
+    if not active_events:
+        return ""
+    return "\n".join(["⏰ 你的所有倒计时事件：\n", "\n\n".join(active_events)])
+
+
+async def archive_expired_events() -> int:
+    """把截止时间已过去 COUNTDOWN_ARCHIVE_AFTER_DAYS 天的事件移到归档文件（每行一条 JSON）。"""
+    cutoff = time.time() - COUNTDOWN_ARCHIVE_AFTER_DAYS * 86400
+    expired = deadline_index.pop_expired(cutoff)
+    if not expired:
+        return 0
+    archived_at = datetime.now(TARGET_TZ).isoformat()
+    records: List[Dict[str, Any]] = []
+    for user_id, event_name in expired:
+        event_data = countdown_data.get(user_id, {}).pop(event_name, None)
+        if event_data is None:
+            continue
+        records.append({"user_id": user_id, "name": event_name, **event_data, "archived_at": archived_at})
+    if not records:
+        return 0
+
+    def append_archive():
+        with open(archive_file, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    try:
+        await asyncio.to_thread(append_archive)
+    except OSError as e:
+        # 归档写失败就把事件放回去，下次再试
+        logger.error(f"写入倒计时归档失败: {e}")
+        for record in records:
+            user_id, event_name = record["user_id"], record["name"]
+            event_data = {k: v for k, v in record.items() if k not in ("user_id", "name", "archived_at")}
+            countdown_data.setdefault(user_id, {})[event_name] = event_data
+            index_event(user_id, event_name, event_data)
+        return 0
+    save_data()
+    logger.info(f"已归档 {len(records)} 个过期倒计时事件")
+    return len(records)
+
+
 load_data()
 
+if scheduler:
+    scheduler.add_job(
+        archive_expired_events, "interval", minutes=max(1, COUNTDOWN_SWEEP_INTERVAL_MINUTES),
+        id="countdown_archive_sweep", replace_existing=True,
+    )
+
 
 countdown_matcher = on_command("countdown", aliases={"倒计时"}, priority=5, block=True)
 
@@ -135,23 +247,9 @@ async def handle_countdown(event: MessageEvent, matcher: Matcher, args: Message
                 "也支持中文别名：/倒计时"
             )
         else:
-            parts = ["⏰ 你的所有倒计时事件：\n"]
-            now = datetime.now(TARGET_TZ)
-            active_events = []
-            
-            for event_name, event_data in countdown_data[user_id].items():
-                event_time = datetime.fromisoformat(event_data["time"])
-                if event_time.tzinfo is None:
-                    event_time = event_time.replace(tzinfo=TARGET_TZ)
-                td = event_time - now
-
-                active_events.append(
-                    f"📌 {event_name}\n   截止：{event_data['time']}\n   {format_relative_time(td)}"
-                )
-            
-            if active_events:
-                parts.append("\n\n".join(active_events))
-                await matcher.finish("\n".join(parts))
+            listing = render_event_list(user_id)
+            if listing:
+                await matcher.finish(listing)
             else:
                 await matcher.finish("你还没有添加任何倒计时事件！\n使用 /countdown add <事件名> <截止时间> 来添加吧。")
         return
@@ -190,6 +288,7 @@ async def handle_countdown(event: MessageEvent, matcher: Matcher, args: Message
             "time": event_time.isoformat(),
             "created_at": now.isoformat()
         }
+        index_event(user_id, event_name, countdown_data[user_id][event_name])
         save_data()
         
         td = event_time - now
@@ -213,6 +312,7 @@ async def handle_countdown(event: MessageEvent, matcher: Matcher, args: Message
             return
         
         del countdown_data[user_id][event_name]
+        deadline_index.remove(user_id, event_name)
         save_data()
         
         await matcher.finish(f"🗑️ 已删除事件：{event_name}")
@@ -222,22 +322,10 @@ async def handle_countdown(event: MessageEvent, matcher: Matcher, args: Message
             await matcher.finish("你还没有添加任何倒计时事件！\n使用 /countdown add <事件名> <截止时间> 来添加吧。")
             return
         
-        parts_list = ["⏰ 你的所有倒计时事件：\n"]
-        now = datetime.now(TARGET_TZ)
-        active_events = []
-        
-        for event_name, event_data in countdown_data[user_id].items():
-            event_time = datetime.fromisoformat(event_data["time"])
-            if event_time.tzinfo is None:
-                event_time = event_time.replace(tzinfo=TARGET_TZ)
-            td = event_time - now
-
-            active_events.append(
-                f"📌 {event_name}\n   截止：{event_data['time']}\n   {format_relative_time(td)}"
-            )
-        
-        parts_list.append("\n\n".join(active_events))
-        await matcher.finish("\n".join(parts_list))
+        await matcher.finish(
+            render_event_list(user_id)
+            or "你还没有添加任何倒计时事件！\n使用 /countdown add <事件名> <截止时间> 来添加吧。"
+        )
     
     else:
         event_name = plain_text
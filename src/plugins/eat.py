@@ -1,6 +1,5 @@
 import random
 import os
-import json
 from pathlib import Path
 from nonebot import on_command
 from nonebot.adapters.onebot.v11 import MessageEvent, Bot, Message, MessageSegment
@@ -8,11 +7,13 @@ from nonebot.params import CommandArg
 from nonebot.matcher import Matcher
 
 from ._data_paths import resolve_data_dir
+from ._json_store import JsonStore
 
 plugin_dir = Path(__file__).parent
 data_dir = resolve_data_dir()
 
 data_file = data_dir / "eat_data.json"
+food_store = JsonStore(data_file, default_factory=lambda: {"android": [], "apple": []})
 
 image_folder = plugin_dir / "assets" / "food_images"
 image_folder.mkdir(parents=True, exist_ok=True) 
@@ -25,19 +26,13 @@ last_recommended = {}  # 记录每个列表上次推荐的食物
 original_lists_snapshot = {}  # 记录原始列表的快照，用于检测列表是否被修改
 
 def save_data():
-    with open(data_file, "w", encoding="utf-8") as f:
-        json.dump(food_data, f, ensure_ascii=False, indent=4)
+    food_store.mark_dirty()
 
 def load_data():
     global food_data
-    if data_file.exists():
-        with open(data_file, "r", encoding="utf-8") as f:
-            food_data = json.load(f)
-    else:
-        food_data = {
-            "android": [],
-            "apple": []
-        }
+    existed = data_file.exists()
+    food_data = food_store.load()
+    if not existed:
         save_data()
 
 load_data()
@@ -172,7 +172,9 @@ HELP_DETAILS = {
 - /listpic [--eat] [关键词]
   » 列出指定图库中的图片。
 - /randpic [--eat] [关键词]
-  » 随机发送一张图片 (别名: /随机表情)。""",
+  » 随机发送一张图片 (别名: /随机表情)。
+- /picdups
+  » 列出所有图库中近似重复的图片 (别名: /相似表情)。""",
     
     "check_email": """📧【邮件通知插件】
 检查当前邮件有没有新邮件。
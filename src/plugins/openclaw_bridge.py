@@ -1,19 +1,20 @@
 import asyncio
+import codecs
+import contextvars
 import hashlib
 import json
 import os
 import random
 import re
-import subprocess
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from urllib.parse import unquote
 from ._data_paths import resolve_data_dir
 from typing import Optional, Dict, Tuple, Any
 
-import httpx
 from nonebot import logger, on_message, require, get_driver
-from nonebot.message import handle_event
+from nonebot.message import handle_event, run_postprocessor
 from nonebot.adapters.onebot.v11 import Bot, GroupMessageEvent, MessageEvent, Message, MessageSegment
 
 from ._openclaw_bridge_images import (
@@ -38,6 +39,7 @@ from ._openclaw_bridge_text import (
     parse_tool_call as _parse_tool_call,
     strip_markdown as _strip_markdown,
     strip_native_network_marker as _strip_native_network_marker,
+    ToolCallStreamScanner,
 )
 from ._openclaw_bridge_prompts import (
     build_exec_prompt as _build_exec_prompt,
@@ -50,7 +52,25 @@ from ._openclaw_bridge_registry import (
     is_supported_plugin_command,
     normalize_plugin_command,
     render_plugin_catalog_for_prompt,
+    warm_plugin_catalog,
 )
+from ._openclaw_bridge_sessions import StickySessionManager
+from ._openclaw_bridge_thinking import ThinkingStats, load_thinking_policy
+from ._openclaw_bridge_procs import ProcessSupervisor
+from ._openclaw_bridge_budget import BridgeBudget, BudgetStats
+from ._openclaw_bridge_rewrite import render_plugin_output as _render_plugin_output_locally
+from ._openclaw_bridge_delivery import ReplyDelivery
+from ._openclaw_bridge_http import close_http_client, get_http_client, prewarm_hosts
+from ._openclaw_bridge_warmup import BridgeWarmup
+from ._openclaw_bridge_cache import (
+    READONLY_TOOL_CATEGORIES,
+    BridgeResponseCache,
+    classify_command as _classify_cache_command,
+    hash_files as _hash_files,
+    mutated_category as _mutated_cache_category,
+)
+from ._json_store import find_store
+from ._ops_metrics import register_ops_section
 
 bridge = on_message(priority=20, block=True)
 
@@ -58,6 +78,9 @@ OPENCLAW_AGENT_ID = os.getenv("OPENCLAW_AGENT_ID", "main")
 OPENCLAW_BRIDGE_USE_LOCAL = os.getenv("OPENCLAW_BRIDGE_USE_LOCAL", "false").strip().lower() in {"1", "true", "yes", "on"}
 OPENCLAW_TIMEOUT = int(os.getenv("OPENCLAW_BRIDGE_TIMEOUT", "180"))
 OPENCLAW_THINKING = os.getenv("OPENCLAW_BRIDGE_THINKING", "medium")
+# 按调用类型/消息特征自适应 --thinking 档位；关闭时所有调用都用 OPENCLAW_BRIDGE_THINKING
+OPENCLAW_THINKING_ADAPTIVE = os.getenv("OPENCLAW_THINKING_ADAPTIVE", "true").strip().lower() in {"1", "true", "yes", "on"}
+OPENCLAW_THINKING_POLICY_JSON = os.getenv("OPENCLAW_THINKING_POLICY_JSON", "").strip()
 OPENCLAW_NODE_OPTIONS = os.getenv("OPENCLAW_BRIDGE_NODE_OPTIONS", "").strip()
 try:
     OPENCLAW_NODE_MAX_OLD_SPACE_MB = max(256, int(os.getenv("OPENCLAW_BRIDGE_NODE_MAX_OLD_SPACE_MB", "768")))
@@ -65,6 +88,48 @@ except Exception:
     OPENCLAW_NODE_MAX_OLD_SPACE_MB = 768
 OPENCLAW_TOOL_TRACE = os.getenv("OPENCLAW_TOOL_TRACE", "true").strip().lower() in {"1", "true", "yes", "on"}
 OPENCLAW_FAST_SINGLE_STEP = os.getenv("OPENCLAW_FAST_SINGLE_STEP", "true").strip().lower() in {"1", "true", "yes", "on"}
+# 常见插件（todo/倒计时/课表/天气/吃啥/状态）输出先用本地模板改写，模板覆盖不到再交给 OpenClaw
+OPENCLAW_LOCAL_REWRITE = os.getenv("OPENCLAW_LOCAL_REWRITE", "true").strip().lower() in {"1", "true", "yes", "on"}
+# 短时回复缓存（默认关闭）：仅 ephemeral 模式、仅只读类别（纯闲聊/课表/天气/帮助/吃啥列表）
+OPENCLAW_RESPONSE_CACHE = os.getenv("OPENCLAW_RESPONSE_CACHE", "false").strip().lower() in {"1", "true", "yes", "on"}
+try:
+    OPENCLAW_RESPONSE_CACHE_TTL = max(0, int(os.getenv("OPENCLAW_RESPONSE_CACHE_TTL", "120")))
+except Exception:
+    OPENCLAW_RESPONSE_CACHE_TTL = 120
+OPENCLAW_RESPONSE_CACHE_CATEGORIES = [
+    c.strip()
+    for c in os.getenv("OPENCLAW_RESPONSE_CACHE_CATEGORIES", "chat,schedule,weather,help,eat_list").split(",")
+    if c.strip()
+]
+# 边读 stdout 边识别工具调用，识别到就先执行，不等正文和进程退出
+OPENCLAW_STREAM_TOOL_CALLS = os.getenv("OPENCLAW_STREAM_TOOL_CALLS", "true").strip().lower() in {"1", "true", "yes", "on"}
+# bot 连上后后台预热（OpenClaw/Node 启动、ASR 模型、插件目录、HTTP 握手、图片索引），只跑一次
+OPENCLAW_WARMUP = os.getenv("OPENCLAW_WARMUP", "true").strip().lower() in {"1", "true", "yes", "on"}
+OPENCLAW_WARMUP_HTTP_URLS = [
+    u.strip()
+    for u in os.getenv(
+        "OPENCLAW_WARMUP_HTTP_URLS",
+        "https://multimedia.nt.qq.com.cn,https://geocoding-api.open-meteo.com",
+    ).split(",")
+    if u.strip()
+]
+# 长回复发送：按段落拆块，超过阈值打包成合并转发；限流错误退避重试
+try:
+    OPENCLAW_REPLY_CHUNK_CHARS = max(200, int(os.getenv("OPENCLAW_REPLY_CHUNK_CHARS", "1500")))
+except Exception:
+    OPENCLAW_REPLY_CHUNK_CHARS = 1500
+try:
+    OPENCLAW_REPLY_FORWARD_THRESHOLD = max(0, int(os.getenv("OPENCLAW_REPLY_FORWARD_THRESHOLD", "3000")))
+except Exception:
+    OPENCLAW_REPLY_FORWARD_THRESHOLD = 3000
+try:
+    OPENCLAW_SEND_CONCURRENCY = max(1, int(os.getenv("OPENCLAW_SEND_CONCURRENCY", "4")))
+except Exception:
+    OPENCLAW_SEND_CONCURRENCY = 4
+try:
+    OPENCLAW_SEND_MAX_RETRIES = max(0, int(os.getenv("OPENCLAW_SEND_MAX_RETRIES", "3")))
+except Exception:
+    OPENCLAW_SEND_MAX_RETRIES = 3
 try:
     OPENCLAW_SESSION_SLICE_HOURS = int(os.getenv("OPENCLAW_SESSION_SLICE_HOURS", "6"))
 except Exception:
@@ -72,17 +137,45 @@ except Exception:
 
 OPENCLAW_SESSION_MODE = os.getenv("OPENCLAW_SESSION_MODE", "ephemeral").strip().lower()  # ephemeral | slice | sticky
 
+# sticky 会话的轮换阈值（<=0 表示不按该维度轮换）
+try:
+    OPENCLAW_SESSION_MAX_TURNS = int(os.getenv("OPENCLAW_SESSION_MAX_TURNS", "40"))
+except Exception:
+    OPENCLAW_SESSION_MAX_TURNS = 40
+try:
+    OPENCLAW_SESSION_MAX_BYTES = int(os.getenv("OPENCLAW_SESSION_MAX_BYTES", str(400 * 1024)))
+except Exception:
+    OPENCLAW_SESSION_MAX_BYTES = 400 * 1024
+try:
+    OPENCLAW_SESSION_SUMMARY_CHARS = int(os.getenv("OPENCLAW_SESSION_SUMMARY_CHARS", "800"))
+except Exception:
+    OPENCLAW_SESSION_SUMMARY_CHARS = 800
+
 try:
     _tool_rounds_raw = int(os.getenv("OPENCLAW_TOOL_MAX_ROUNDS", "0"))
 except Exception:
     _tool_rounds_raw = 0
 
-# <=0 视为“不设轮次上限”（实践中用超大值实现）
+# <=0 视为“不设轮次上限”（实践中用超大值实现），实际由 OPENCLAW_BUDGET_* 兜底
 if _tool_rounds_raw <= 0:
     OPENCLAW_TOOL_MAX_ROUNDS = 10 ** 9
 else:
     OPENCLAW_TOOL_MAX_ROUNDS = min(10000, _tool_rounds_raw)
 
+# 单条消息的模型调用预算（0 表示该项不限）：总耗时 / 调用次数 / 累计 prompt 字节
+try:
+    OPENCLAW_BUDGET_SECONDS = max(0.0, float(os.getenv("OPENCLAW_BUDGET_SECONDS", "300")))
+except Exception:
+    OPENCLAW_BUDGET_SECONDS = 300.0
+try:
+    OPENCLAW_BUDGET_MAX_CALLS = max(0, int(os.getenv("OPENCLAW_BUDGET_MAX_CALLS", "12")))
+except Exception:
+    OPENCLAW_BUDGET_MAX_CALLS = 12
+try:
+    OPENCLAW_BUDGET_PROMPT_KB = max(0, int(os.getenv("OPENCLAW_BUDGET_PROMPT_KB", "600")))
+except Exception:
+    OPENCLAW_BUDGET_PROMPT_KB = 600
+
 GEOCODE_API = "https://geocoding-api.open-meteo.com/v1/search"
 FORECAST_API = "https://api.open-meteo.com/v1/forecast"
 
@@ -121,6 +214,7 @@ if OPENCLAW_GROUP_ROLE_BINDINGS_JSON:
 try:
     require("nonebot_plugin_apscheduler")
     from nonebot_plugin_apscheduler import scheduler  # type: ignore
+    from ._sqlite_jobstore import PERSISTENT_JOBSTORE, ensure_persistent_jobstore, resolve_bot
 except Exception:
     scheduler = None
 
@@ -133,8 +227,46 @@ plugin_dir = Path(__file__).parent
 data_dir = resolve_data_dir()
 weather_job_file = data_dir / "openclaw_bridge_weather_jobs.json"
 weather_jobs: Dict[str, Dict] = {}
+# 天气任务和提醒共用 SQLite job store：重启后自动恢复，重连时不重建
+_weather_job_store = ensure_persistent_jobstore(scheduler, data_dir / "scheduler_jobs.sqlite3") if scheduler is not None else None
+WEATHER_JOBSTORE = PERSISTENT_JOBSTORE if _weather_job_store is not None else "default"
+_weather_jobs_restored = False
 eat_data_file = data_dir / "eat_data.json"
 pic_index_file = data_dir / "pic_index.json"
+_sticky_sessions = StickySessionManager(
+    state_file=data_dir / "openclaw_bridge_sessions.json",
+    max_turns=OPENCLAW_SESSION_MAX_TURNS,
+    max_bytes=OPENCLAW_SESSION_MAX_BYTES,
+    summary_chars=OPENCLAW_SESSION_SUMMARY_CHARS,
+)
+try:
+    # 子进程（OpenClaw 及其派生的 Node 进程组、ASR）RSS 上限，0 表示不限制
+    OPENCLAW_PROC_RSS_LIMIT_MB = max(0, int(os.getenv("OPENCLAW_PROC_RSS_LIMIT_MB", "0")))
+except Exception:
+    OPENCLAW_PROC_RSS_LIMIT_MB = 0
+try:
+    OPENCLAW_PROC_KILL_GRACE_SECONDS = max(0.0, float(os.getenv("OPENCLAW_PROC_KILL_GRACE_SECONDS", "3")))
+except Exception:
+    OPENCLAW_PROC_KILL_GRACE_SECONDS = 3.0
+_proc_supervisor = ProcessSupervisor(
+    rss_limit_mb=OPENCLAW_PROC_RSS_LIMIT_MB,
+    kill_grace=OPENCLAW_PROC_KILL_GRACE_SECONDS,
+    logger=logger,
+)
+_thinking_policy = load_thinking_policy(OPENCLAW_THINKING, OPENCLAW_THINKING_POLICY_JSON, adaptive=OPENCLAW_THINKING_ADAPTIVE)
+_thinking_stats = ThinkingStats()
+_response_cache = BridgeResponseCache(
+    ttl_seconds=OPENCLAW_RESPONSE_CACHE_TTL if OPENCLAW_RESPONSE_CACHE else 0,
+    categories=OPENCLAW_RESPONSE_CACHE_CATEGORIES,
+)
+_reply_delivery = ReplyDelivery(
+    chunk_chars=OPENCLAW_REPLY_CHUNK_CHARS,
+    forward_threshold=OPENCLAW_REPLY_FORWARD_THRESHOLD,
+    max_concurrency=OPENCLAW_SEND_CONCURRENCY,
+    max_retries=OPENCLAW_SEND_MAX_RETRIES,
+    logger=logger,
+)
+_budget_stats = BudgetStats(OPENCLAW_BUDGET_SECONDS, OPENCLAW_BUDGET_MAX_CALLS, OPENCLAW_BUDGET_PROMPT_KB * 1024)
 OPENCLAW_IMAGE_MODE = os.getenv("OPENCLAW_IMAGE_MODE", "true").strip().lower() in {"1", "true", "yes", "on"}
 OPENCLAW_IMAGE_MAX_COUNT = max(1, min(6, int(os.getenv("OPENCLAW_IMAGE_MAX_COUNT", "3"))))
 OPENCLAW_IMAGE_MAX_BYTES = max(512 * 1024, int(os.getenv("OPENCLAW_IMAGE_MAX_BYTES", str(12 * 1024 * 1024))))
@@ -159,6 +291,8 @@ except Exception:
     OPENCLAW_AUDIO_TRANSCRIBE_TIMEOUT = 180
 
 _PLUGIN_CAPTURE_LOCK = asyncio.Lock()
+# 正在捕获插件输出的列表；只有 handle_event 派生出的任务能看到，其他群的并发回复照常发出
+_PLUGIN_CAPTURE_SINK: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("plugin_capture_sink", default=None)
 
 _PLUGIN_HELP_CACHE: Dict[str, str] = {}
 
@@ -480,7 +614,7 @@ async def _resolve_record_to_local(bot: Bot, entry: Dict[str, str]) -> Optional[
     return None
 
 
-def _transcribe_audio_to_text(local_path: str) -> Tuple[str, str, float]:
+async def _transcribe_audio_to_text(local_path: str) -> Tuple[str, str, float]:
     script = r'''
 import json
 import sys
@@ -504,21 +638,19 @@ except Exception as e:
     print(json.dumps({"ok": False, "error": str(e)}, ensure_ascii=False))
 '''
 
-    try:
-        proc = subprocess.run(
-            ["/usr/bin/python3", "-c", script, str(local_path), OPENCLAW_AUDIO_MODEL],
-            capture_output=True,
-            text=True,
-            timeout=OPENCLAW_AUDIO_TRANSCRIBE_TIMEOUT,
-            check=False,
-        )
-    except Exception as exc:
-        logger.warning(f"voice asr subprocess failed: {exc}")
+    rc, stdout, stderr, status = await _proc_supervisor.run(
+        "asr",
+        ["/usr/bin/python3", "-c", script, str(local_path), OPENCLAW_AUDIO_MODEL],
+        timeout=OPENCLAW_AUDIO_TRANSCRIBE_TIMEOUT,
+    )
+    if status != "ok":
+        logger.warning(f"voice asr subprocess failed: status={status} rc={rc}")
         return "", "", 0.0
 
-    raw = (proc.stdout or "").strip()
+    raw = stdout.decode("utf-8", errors="ignore").strip()
     if not raw:
-        logger.warning(f"voice asr empty output, stderr={proc.stderr[:300] if proc.stderr else ''}")
+        err = stderr.decode("utf-8", errors="ignore")
+        logger.warning(f"voice asr empty output, stderr={err[:300]}")
         return "", "", 0.0
 
     start = raw.find("{")
@@ -553,20 +685,28 @@ def _build_attachment_context(local_paths: list[str], remote_urls: list[str]) ->
     )
 
 
+def _sticky_base_id(event: GroupMessageEvent) -> str:
+    """返回需要做轮换管理的固定会话基础 id；非固定会话返回空串。"""
+    if OPENCLAW_SESSION_MODE == "sticky":
+        return f"qq-group-{event.group_id}"
+    if OPENCLAW_SESSION_MODE == "slice" and OPENCLAW_SESSION_SLICE_HOURS <= 0:
+        return f"qq-group-{event.group_id}"
+    return ""
+
+
 def _build_session_id(event: GroupMessageEvent) -> str:
     """会话策略：
     - ephemeral: 每条消息独立会话（最快，几乎无历史记忆）
     - slice: 按时间分片（折中）
-    - sticky: 单群固定会话（历史最长）
+    - sticky: 单群固定会话（历史最长，超过阈值后自动轮换并携带摘要）
     """
     mode = OPENCLAW_SESSION_MODE
 
-    if mode == "sticky":
-        return f"qq-group-{event.group_id}"
+    sticky_base = _sticky_base_id(event)
+    if sticky_base:
+        return _sticky_sessions.current_session_id(sticky_base)
 
     if mode == "slice":
-        if OPENCLAW_SESSION_SLICE_HOURS <= 0:
-            return f"qq-group-{event.group_id}"
         now = datetime.now(SH_TZ) if SH_TZ else datetime.utcnow()
         slice_hours = max(1, min(24, OPENCLAW_SESSION_SLICE_HOURS))
         bucket = now.hour // slice_hours
@@ -579,6 +719,14 @@ def _build_session_id(event: GroupMessageEvent) -> str:
     return f"qq-group-{event.group_id}:ep:{now.strftime('%Y%m%d%H%M%S')}:{msg_id}"
 
 
+def _record_sticky_turn(sticky_base: str, user_text: str, reply: str, round_bytes: int) -> None:
+    if not sticky_base:
+        return
+    rotated = _sticky_sessions.record_turn(sticky_base, user_text, reply, round_bytes)
+    if rotated:
+        logger.info(f"openclaw_bridge session rotated base={sticky_base} new={rotated}")
+
+
 def _looks_like_multi_step_request(text: str) -> bool:
     t = _clean_user_text(text)
     if not t:
@@ -662,72 +810,79 @@ async def _fetch_weather_reply(city: str) -> Optional[str]:
         return None
 
     try:
-        async with httpx.AsyncClient(timeout=12.0) as client:
-            geo = await client.get(
+        client = get_http_client()
+        geo = await client.get(
+            GEOCODE_API,
+            params={"name": city, "count": 1, "language": "zh", "format": "json"},
+            timeout=12.0,
+        )
+        g = geo.json()
+        results = g.get("results") or []
+
+        if not results:
+            geo2 = await client.get(
                 GEOCODE_API,
-                params={"name": city, "count": 1, "language": "zh", "format": "json"},
+                params={"name": city, "count": 1, "language": "en", "format": "json"},
+                timeout=12.0,
             )
-            g = geo.json()
-            results = g.get("results") or []
+            g2 = geo2.json()
+            results = g2.get("results") or []
 
-            if not results:
-                geo2 = await client.get(
-                    GEOCODE_API,
-                    params={"name": city, "count": 1, "language": "en", "format": "json"},
-                )
-                g2 = geo2.json()
-                results = g2.get("results") or []
-
-            if not results:
-                return None
-
-            r0 = results[0]
-            lat, lon = r0.get("latitude"), r0.get("longitude")
-            real_name = r0.get("name", city)
-            tz = r0.get("timezone", "Asia/Shanghai")
-
-            fc = await client.get(
-                FORECAST_API,
-                params={
-                    "latitude": lat,
-                    "longitude": lon,
-                    "current": "temperature_2m,relative_humidity_2m,apparent_temperature,precipitation,wind_speed_10m",
-                    "daily": "precipitation_probability_max",
-                    "timezone": tz,
-                    "forecast_days": 1,
-                },
-            )
-            data = fc.json()
-            cur = data.get("current", {})
-            daily = data.get("daily", {})
-
-            temp = cur.get("temperature_2m")
-            app = cur.get("apparent_temperature")
-            rh = cur.get("relative_humidity_2m")
-            pr = cur.get("precipitation")
-            pops = daily.get("precipitation_probability_max") or []
-            pop = pops[0] if isinstance(pops, list) and pops else None
-
-            if temp is None:
-                return None
-
-            parts = [f"爸爸，{real_name}现在 {temp}°C"]
-            if app is not None:
-                parts.append(f"体感 {app}°C")
-            if rh is not None:
-                parts.append(f"湿度 {rh}%")
-            if pr is not None:
-                parts.append(f"降水 {pr}mm")
-            if pop is not None:
-                parts.append(f"今天降雨概率最高约 {pop}%")
-            return "，".join(parts) + "。"
+        if not results:
+            return None
+
+        r0 = results[0]
+        lat, lon = r0.get("latitude"), r0.get("longitude")
+        real_name = r0.get("name", city)
+        tz = r0.get("timezone", "Asia/Shanghai")
+
+        fc = await client.get(
+            FORECAST_API,
+            params={
+                "latitude": lat,
+                "longitude": lon,
+                "current": "temperature_2m,relative_humidity_2m,apparent_temperature,precipitation,wind_speed_10m",
+                "daily": "precipitation_probability_max",
+                "timezone": tz,
+                "forecast_days": 1,
+            },
+            timeout=12.0,
+        )
+        data = fc.json()
+        cur = data.get("current", {})
+        daily = data.get("daily", {})
+
+        temp = cur.get("temperature_2m")
+        app = cur.get("apparent_temperature")
+        rh = cur.get("relative_humidity_2m")
+        pr = cur.get("precipitation")
+        pops = daily.get("precipitation_probability_max") or []
+        pop = pops[0] if isinstance(pops, list) and pops else None
+
+        if temp is None:
+            return None
+
+        parts = [f"爸爸，{real_name}现在 {temp}°C"]
+        if app is not None:
+            parts.append(f"体感 {app}°C")
+        if rh is not None:
+            parts.append(f"湿度 {rh}%")
+        if pr is not None:
+            parts.append(f"降水 {pr}mm")
+        if pop is not None:
+            parts.append(f"今天降雨概率最高约 {pop}%")
+        return "，".join(parts) + "。"
 
     except Exception as exc:
         logger.warning(f"weather fetch failed: {exc}")
         return None
 
 
-async def _scheduled_weather_push(bot: Bot, group_id: int, user_id: int, city: str, job_key: str = ""):
+async def _scheduled_weather_push(bot_self_id: str, group_id: int, user_id: int, city: str, job_key: str = ""):
+    bot = resolve_bot(bot_self_id)
+    if bot is None:
+        logger.warning(f"weather push skipped: no bot online for job {job_key or city}")
+        return
     reply = await _fetch_weather_reply(city)
     if not reply:
         reply = f"爸爸，{city}这次天气没查到，我下一次再继续帮你查。"
@@ -758,8 +913,9 @@ def _upsert_daily_weather_job(bot: Bot, group_id: int, user_id: int, city: str,
             hour=hour,
             minute=minute,
             id=job_id,
-            args=[bot, int(group_id), int(user_id), city],
+            args=[str(bot.self_id), int(group_id), int(user_id), city],
             timezone=SH_TZ,
+            jobstore=WEATHER_JOBSTORE,
             replace_existing=True,
         )
     except Exception as exc:
@@ -794,8 +950,9 @@ def _upsert_once_weather_job(bot: Bot, group_id: int, user_id: int, city: str, r
             "date",
             run_date=run_dt,
             id=job_id,
-            args=[bot, int(group_id), int(user_id), city, key],
+            args=[str(bot.self_id), int(group_id), int(user_id), city, key],
             timezone=SH_TZ,
+            jobstore=WEATHER_JOBSTORE,
             replace_existing=True,
         )
     except Exception as exc:
@@ -816,13 +973,22 @@ def _upsert_once_weather_job(bot: Bot, group_id: int, user_id: int, city: str, r
 
 
 def _restore_weather_jobs(bot: Bot) -> None:
-    if scheduler is None or SH_TZ is None:
+    """进程内只对账一次：job store 里已有的任务跳过，只补建缺失的。"""
+    global _weather_jobs_restored
+    if scheduler is None or SH_TZ is None or _weather_jobs_restored:
         return
+    _weather_jobs_restored = True
 
     now = datetime.now(SH_TZ)
     changed = False
+    if _weather_job_store is not None:
+        scheduled = _weather_job_store.job_ids("ocw_")
+    else:
+        scheduled = {job.id for job in scheduler.get_jobs()}
 
     for key, item in list(weather_jobs.items()):
+        if str(item.get("job_id")) in scheduled:
+            continue
         try:
             kind = str(item.get("kind", "cron"))
             city_raw = str(item.get("city", "")).strip()
@@ -844,13 +1010,14 @@ def _restore_weather_jobs(bot: Bot) -> None:
                     run_date=run_at,
                     id=str(item.get("job_id")),
                     args=[
-                        bot,
+                        str(bot.self_id),
                         int(item.get("group_id")),
                         int(item.get("user_id")),
                         str(item.get("city", "成都")),
                         key,
                     ],
                     timezone=SH_TZ,
+                    jobstore=WEATHER_JOBSTORE,
                     replace_existing=True,
                 )
             else:
@@ -861,12 +1028,13 @@ def _restore_weather_jobs(bot: Bot) -> None:
                     minute=int(item.get("minute", 0)),
                     id=str(item.get("job_id")),
                     args=[
-                        bot,
+                        str(bot.self_id),
                         int(item.get("group_id")),
                         int(item.get("user_id")),
                         str(item.get("city", "成都")),
                     ],
                     timezone=SH_TZ,
+                    jobstore=WEATHER_JOBSTORE,
                     replace_existing=True,
                 )
         except Exception as exc:
@@ -876,14 +1044,35 @@ def _restore_weather_jobs(bot: Bot) -> None:
         _save_weather_jobs()
 
 
+# 按 (mtime_ns, size) 缓存解析结果，文件没变就不重复读；返回值只读，调用方不要原地修改
+_json_dict_cache: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+
+
 def _load_json_dict(path: Path) -> Dict[str, Any]:
-    if not path.exists():
+    try:
+        st = path.stat()
+    except OSError:
+        _json_dict_cache.pop(str(path), None)
         return {}
+    key = str(path)
+    cached = _json_dict_cache.get(key)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
     try:
         obj = json.loads(path.read_text(encoding="utf-8"))
-        return obj if isinstance(obj, dict) else {}
+        data = obj if isinstance(obj, dict) else {}
     except Exception:
         return {}
+    _json_dict_cache[key] = (st.st_mtime_ns, st.st_size, data)
+    return data
+
+
+def _load_eat_data() -> Dict[str, Any]:
+    """吃什么列表：优先读 eat 插件 JsonStore 里的内存数据（写盘有合并延迟），没有加载时退回读文件。"""
+    store = find_store(eat_data_file)
+    if store is not None and isinstance(store.data, dict):
+        return store.data
+    return _load_json_dict(eat_data_file)
 
 
 def _pic_entry_url(entry: Any) -> Optional[str]:
@@ -1030,6 +1219,9 @@ def _build_trace_text(tname: str, targs: Dict[str, Any]) -> str:
     return f"🛠️ 已执行工具：{t}"
 
 
+_rewrite_counters: Dict[str, int] = {"local": 0, "openclaw": 0}
+
+
 def _should_bypass_plugin_rewrite(plugin_command: str) -> bool:
     cmd = _clean_user_text(str(plugin_command or "")).strip().lower()
     return cmd.startswith("/remind") or cmd.startswith("/listreminders") or cmd.startswith("/我的提醒") or cmd.startswith("/cancelremind") or cmd.startswith("/取消提醒")
@@ -1041,19 +1233,36 @@ async def _rewrite_plugin_output(
     plugin_command: str,
     plugin_output_text: str,
     session_id: str,
+    budget: Optional[BridgeBudget] = None,
 ) -> Optional[str]:
     if not plugin_output_text.strip():
         return None
 
+    if OPENCLAW_LOCAL_REWRITE:
+        local = _render_plugin_output_locally(plugin_command, plugin_output_text)
+        if local:
+            _rewrite_counters["local"] += 1
+            logger.info(f"openclaw_bridge local rewrite cmd={plugin_command[:40]!r}")
+            return local
+    _rewrite_counters["openclaw"] += 1
+
     prompt = _build_plugin_rewrite_prompt(
         role_prompt=role_prompt,
         user_text=user_text,
         plugin_command=plugin_command,
         plugin_output_text=plugin_output_text,
     )
+    # 预算用完就直接用插件原文
+    if budget is not None and not budget.try_charge(prompt):
+        return None
     # 用独立 rewrite 会话，避免沿用执行模式上下文导致继续吐工具 JSON
     rewrite_session_id = f"{session_id}:rewrite"
-    out = await _call_openclaw(prompt, rewrite_session_id)
+    out = await _call_openclaw(
+        prompt,
+        rewrite_session_id,
+        call_kind="rewrite",
+        timeout=budget.call_timeout(OPENCLAW_TIMEOUT) if budget is not None else None,
+    )
     out = _strip_markdown(out or "")
     if not out:
         return None
@@ -1098,6 +1307,8 @@ async def _dispatch_plugin_command(
     orig_call_api = getattr(bot, "call_api", None)
 
     async def _fake_send(*args, **kwargs):
+        if _PLUGIN_CAPTURE_SINK.get() is not captured:
+            return await orig_send(*args, **kwargs)
         msg_payload = kwargs.get("message")
         if msg_payload is None:
             if len(args) >= 2:
@@ -1110,6 +1321,8 @@ async def _dispatch_plugin_command(
         return {"message_id": 0}
 
     async def _fake_send_group_msg(*args, **kwargs):
+        if _PLUGIN_CAPTURE_SINK.get() is not captured:
+            return await orig_send_group_msg(*args, **kwargs)
         msg_payload = kwargs.get("message")
         if msg_payload is None and len(args) >= 2:
             msg_payload = args[1]
@@ -1119,6 +1332,8 @@ async def _dispatch_plugin_command(
         return {"message_id": 0}
 
     async def _fake_send_private_msg(*args, **kwargs):
+        if _PLUGIN_CAPTURE_SINK.get() is not captured:
+            return await orig_send_private_msg(*args, **kwargs)
         msg_payload = kwargs.get("message")
         if msg_payload is None and len(args) >= 2:
             msg_payload = args[1]
@@ -1128,6 +1343,8 @@ async def _dispatch_plugin_command(
         return {"message_id": 0}
 
     async def _fake_call_api(api: str, *args, **kwargs):
+        if _PLUGIN_CAPTURE_SINK.get() is not captured:
+            return await orig_call_api(api, *args, **kwargs)
         api_name = str(api)
 
         if api_name in {"send_msg", "send_group_msg", "send_private_msg"}:
@@ -1164,7 +1381,12 @@ async def _dispatch_plugin_command(
             if callable(orig_call_api):
                 setattr(bot, "call_api", _fake_call_api)
 
-            await handle_event(bot, synthetic)
+            # bot 是各群共用的：替换期间别的群的回复不能被当成本次插件输出吞掉
+            sink_token = _PLUGIN_CAPTURE_SINK.set(captured)
+            try:
+                await handle_event(bot, synthetic)
+            finally:
+                _PLUGIN_CAPTURE_SINK.reset(sink_token)
         finally:
             if callable(orig_send):
                 setattr(bot, "send", orig_send)
@@ -1494,7 +1716,7 @@ async def _execute_tool_call(tool_call: Dict[str, Any], bot: Bot, event: GroupMe
         if list_name not in {"android", "apple"}:
             list_name = "android"
 
-        data = _load_json_dict(eat_data_file)
+        data = _load_eat_data()
         arr = data.get(list_name, [])
         if not isinstance(arr, list) or not arr:
             return Message(f"[{list_name}] 列表是空的。"), True
@@ -1512,7 +1734,7 @@ async def _execute_tool_call(tool_call: Dict[str, Any], bot: Bot, event: GroupMe
         list_name = str(args.get("list", "android")).strip().lower()
         if list_name not in {"android", "apple"}:
             list_name = "android"
-        data = _load_json_dict(eat_data_file)
+        data = _load_eat_data()
         arr = data.get(list_name, [])
         if not isinstance(arr, list) or not arr:
             return Message(f"[{list_name}] 列表是空的。"), True
@@ -1547,6 +1769,37 @@ async def _execute_tool_call(tool_call: Dict[str, Any], bot: Bot, event: GroupMe
     return None, False
 
 
+def _tool_cache_category(tool_call: Dict[str, Any]) -> Optional[str]:
+    tool = str(tool_call.get("tool", ""))
+    args = tool_call.get("args", {}) if isinstance(tool_call.get("args", {}), dict) else {}
+    if tool in READONLY_TOOL_CATEGORIES:
+        return READONLY_TOOL_CATEGORIES[tool]
+    if tool == "plugin_command":
+        return _classify_cache_command(_clean_user_text(str(args.get("command", ""))))
+    if tool == "plugin_call":
+        return _classify_cache_command(_build_plugin_call_command(args) or "")
+    return None
+
+
+def _is_bridge_error_reply(text: str) -> bool:
+    t = (text or "").strip()
+    prefixes = ("转 OpenClaw 失败", "启动 OpenClaw", "OpenClaw 没返回", "我这边有点慢", "我这边没拿到结果", "这次处理得有点久")
+    return t.startswith(prefixes)
+
+
+@run_postprocessor
+async def _invalidate_response_cache(event: MessageEvent):
+    # 直接发的命令和 bridge 合成的命令事件都会经过这里；放在 matcher 执行完之后，
+    # 否则失效到数据真正改完之间的查询会把旧结果重新写进缓存
+    if not _response_cache.enabled:
+        return
+    category = _mutated_cache_category(_clean_user_text(event.get_plaintext()))
+    if category:
+        dropped = _response_cache.invalidate_category(category)
+        if dropped:
+            logger.info(f"openclaw_bridge response cache invalidated category={category} dropped={dropped}")
+
+
 def _build_role_prompt(sender_role: str, sender_name: str) -> str:
     if sender_role == "dad":
         who = "当前发言人是爸爸，可称呼\"爸爸\"，但不必每句都叫。"
@@ -1562,7 +1815,114 @@ def _build_role_prompt(sender_role: str, sender_name: str) -> str:
     )
 
 
-async def _call_openclaw(prompt: str, session_id: str) -> Optional[str]:
+_STREAMABLE_TOOLS = frozenset(
+    {
+        "plugin_call",
+        "plugin_batch",
+        "plugin_command",
+        "weather_now",
+        "weather_schedule_daily",
+        "weather_schedule_once",
+        "eat_random",
+        "eat_list",
+        "pic_send",
+    }
+)
+_openclaw_teardown_tasks: Dict[str, asyncio.Task] = {}
+
+
+async def _read_openclaw_stdout(proc: asyncio.subprocess.Process, scanner: Optional[ToolCallStreamScanner]) -> Tuple[bytes, bool]:
+    """分块读取 stdout；扫描器识别到完整工具调用时提前返回 (已读内容, True)。"""
+    chunks: list[bytes] = []
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    while True:
+        chunk = await proc.stdout.read(4096)
+        if not chunk:
+            return b"".join(chunks), False
+        chunks.append(chunk)
+        if scanner is not None and scanner.feed(decoder.decode(chunk)):
+            return b"".join(chunks), True
+
+
+async def _drain_openclaw_in_background(
+    proc: asyncio.subprocess.Process,
+    stderr_task: asyncio.Task,
+    session_id: str,
+    timeout: float,
+) -> None:
+    """工具调用已提前返回后，读完剩余输出并等进程正常退出（保留会话历史），超时才强杀。"""
+    try:
+        async def _drain() -> None:
+            while await proc.stdout.read(65536):
+                pass
+            await proc.wait()
+
+        await asyncio.wait_for(_drain(), timeout=timeout)
+        stderr = await stderr_task
+        if proc.returncode != 0:
+            err = stderr.decode("utf-8", errors="ignore").strip()
+            logger.warning(f"openclaw exited rc={proc.returncode} after early tool call session={session_id}: {err[:200]}")
+    except asyncio.TimeoutError:
+        logger.warning(f"openclaw teardown timeout after early tool call session={session_id}, killing")
+        _proc_supervisor.count_kill("timeout")
+        stderr_task.cancel()
+        await _proc_supervisor.terminate(proc, "timeout")
+    except Exception as e:
+        logger.warning(f"openclaw background drain failed session={session_id}: {e}")
+
+
+def _forget_openclaw_teardown(session_id: str, task: asyncio.Task) -> None:
+    if _openclaw_teardown_tasks.get(session_id) is task:
+        _openclaw_teardown_tasks.pop(session_id, None)
+
+
+async def _wait_openclaw_teardown(session_id: str) -> None:
+    task = _openclaw_teardown_tasks.get(session_id)
+    if task is None or task.done():
+        return
+    try:
+        await asyncio.wait_for(asyncio.shield(task), timeout=OPENCLAW_TIMEOUT)
+    except Exception:
+        pass
+
+
+async def _call_openclaw(
+    prompt: str,
+    session_id: str,
+    call_kind: str = "exec",
+    thinking: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> Optional[str]:
+    level = thinking or _thinking_policy.choose(call_kind)
+    started = time.monotonic()
+    out, outcome = await _run_openclaw(prompt, session_id, level, timeout=timeout or OPENCLAW_TIMEOUT)
+    elapsed_ms = int((time.monotonic() - started) * 1000)
+    if outcome == "ok" and _parse_tool_call(out or ""):
+        outcome = "tool"
+
+    _thinking_stats.record(level, call_kind, elapsed_ms, outcome)
+    logger.info(
+        f"openclaw call kind={call_kind} thinking={level} elapsed_ms={elapsed_ms} outcome={outcome} session={session_id}"
+    )
+    if _thinking_stats.total % 50 == 0:
+        logger.info(f"openclaw thinking stats: {_thinking_stats.summary_line()}")
+    return out
+
+
+def _openclaw_env() -> Dict[str, str]:
+    env = os.environ.copy()
+    desired_node_opt = f"--max-old-space-size={OPENCLAW_NODE_MAX_OLD_SPACE_MB}"
+    if OPENCLAW_NODE_OPTIONS:
+        env["NODE_OPTIONS"] = OPENCLAW_NODE_OPTIONS
+    else:
+        current_opts = str(env.get("NODE_OPTIONS", "") or "").strip()
+        if desired_node_opt not in current_opts:
+            env["NODE_OPTIONS"] = f"{current_opts} {desired_node_opt}".strip()
+    return env
+
+
+async def _run_openclaw(prompt: str, session_id: str, thinking: str, timeout: float = OPENCLAW_TIMEOUT) -> Tuple[str, str]:
+    """执行一次 openclaw agent，返回 (文本, 结果分类 ok/timeout/error/empty)。"""
     cmd = [
         "openclaw",
         "agent",
@@ -1573,38 +1933,59 @@ async def _call_openclaw(prompt: str, session_id: str) -> Optional[str]:
         "--message",
         prompt,
         "--thinking",
-        OPENCLAW_THINKING,
+        thinking,
         "--json",
     ]
 
-    env = os.environ.copy()
-    desired_node_opt = f"--max-old-space-size={OPENCLAW_NODE_MAX_OLD_SPACE_MB}"
-    if OPENCLAW_NODE_OPTIONS:
-        env["NODE_OPTIONS"] = OPENCLAW_NODE_OPTIONS
-    else:
-        current_opts = str(env.get("NODE_OPTIONS", "") or "").strip()
-        if desired_node_opt not in current_opts:
-            env["NODE_OPTIONS"] = f"{current_opts} {desired_node_opt}".strip()
+    env = _openclaw_env()
 
     if OPENCLAW_BRIDGE_USE_LOCAL:
         cmd.insert(2, "--local")
 
+    # 同一会话上一轮的进程可能还在收尾（写会话历史），先等它结束
+    await _wait_openclaw_teardown(session_id)
+
     try:
-        proc = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            env=env,
-        )
+        proc = await _proc_supervisor.spawn("openclaw", *cmd, env=env)
     except Exception as e:
         logger.exception(f"openclaw subprocess start failed: {e}")
-        return "启动 OpenClaw 命令失败，请检查环境。"
+        return "启动 OpenClaw 命令失败，请检查环境。", "error"
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = started + timeout
+    stderr_task = asyncio.create_task(proc.stderr.read())
+    scanner = ToolCallStreamScanner(tools=_STREAMABLE_TOOLS) if OPENCLAW_STREAM_TOOL_CALLS else None
 
     try:
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=OPENCLAW_TIMEOUT)
+        stdout, early = await asyncio.wait_for(_read_openclaw_stdout(proc, scanner), timeout=timeout)
+        if early and scanner is not None:
+            task = asyncio.create_task(
+                # 收尾不受单条消息预算限制，保证会话历史能写完
+                _drain_openclaw_in_background(proc, stderr_task, session_id, max(1.0, started + OPENCLAW_TIMEOUT - loop.time()))
+            )
+            _openclaw_teardown_tasks[session_id] = task
+            task.add_done_callback(lambda t, sid=session_id: _forget_openclaw_teardown(sid, t))
+            logger.info(
+                f"openclaw tool call detected early session={session_id} tool={scanner.result.get('tool') if scanner.result else ''} "
+                f"stdout_bytes={len(stdout)}"
+            )
+            return scanner.raw_json, "ok"
+        await asyncio.wait_for(proc.wait(), timeout=max(1.0, deadline - loop.time()))
+        stderr = await stderr_task
     except asyncio.TimeoutError:
-        proc.kill()
-        return "我这边有点慢，超时了，等下再试一次。"
+        _proc_supervisor.count_kill("timeout")
+        stderr_task.cancel()
+        await _proc_supervisor.terminate(proc, "timeout")
+        return "我这边有点慢，超时了，等下再试一次。", "timeout"
+    except asyncio.CancelledError:
+        _proc_supervisor.count_kill("cancel")
+        stderr_task.cancel()
+        await _proc_supervisor.terminate(proc, "cancel")
+        raise
+
+    if _proc_supervisor.kill_reason(proc) == "rss":
+        return f"转 OpenClaw 失败：进程内存超过上限（{OPENCLAW_PROC_RSS_LIMIT_MB}MB），已终止。", "error"
 
     if proc.returncode != 0:
         err = stderr.decode("utf-8", errors="ignore").strip()
@@ -1614,12 +1995,12 @@ async def _call_openclaw(prompt: str, session_id: str) -> Optional[str]:
             return (
                 f"转 OpenClaw 失败：进程内存不足（Node OOM）。"
                 f"已启用 NODE_OPTIONS=--max-old-space-size={OPENCLAW_NODE_MAX_OLD_SPACE_MB}，请重试。"
-            )
-        return f"转 OpenClaw 失败：{err[:180]}" if err else "转 OpenClaw 失败了，稍后再试。"
+            ), "error"
+        return (f"转 OpenClaw 失败：{err[:180]}" if err else "转 OpenClaw 失败了，稍后再试。"), "error"
 
     out = stdout.decode("utf-8", errors="ignore").strip()
     if not out:
-        return "OpenClaw 没返回内容。"
+        return "OpenClaw 没返回内容。", "empty"
 
     json_text = out
     start = json_text.find("{")
@@ -1638,9 +2019,11 @@ async def _call_openclaw(prompt: str, session_id: str) -> Optional[str]:
 
         texts = [item.get("text", "") for item in payloads if isinstance(item, dict) and item.get("text")]
         answer = "\n".join(texts).strip()
-        return answer or "OpenClaw 没返回文本内容。"
+        if not answer:
+            return "OpenClaw 没返回文本内容。", "empty"
+        return answer, "ok"
     except Exception:
-        return out[:500]
+        return out[:500], "ok"
 
 
 @bridge.handle()
@@ -1674,6 +2057,9 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
     plugin_catalog = render_plugin_catalog_for_prompt()
 
     session_id = _build_session_id(event)
+    sticky_base = _sticky_base_id(event)
+    history_summary = _sticky_sessions.pending_summary(sticky_base) if sticky_base else ""
+    session_bytes = 0
 
     attachment_context = ""
     attachment_parts: list[str] = []
@@ -1707,7 +2093,7 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
             _cleanup_old_bridge_audio(current_paths=audio_paths)
 
             if audio_paths:
-                audio_text, audio_lang, audio_prob = _transcribe_audio_to_text(audio_paths[0])
+                audio_text, audio_lang, audio_prob = await _transcribe_audio_to_text(audio_paths[0])
                 if audio_text:
                     logger.info(
                         "openclaw_bridge asr ok gid=%s uid=%s lang=%s prob=%.3f text=%r",
@@ -1763,16 +2149,65 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
         await bridge.finish()
         return
 
-    current_prompt = _build_exec_prompt(role_prompt, user_text, attachment_context=attachment_context, plugin_catalog=plugin_catalog)
+    # 有历史的会话（sticky/slice）回答依赖上下文，不走缓存
+    cache_key = ""
+    if _response_cache.enabled and OPENCLAW_SESSION_MODE == "ephemeral" and not sticky_base:
+        attachment_hashes = await asyncio.to_thread(_hash_files, image_paths) if image_paths else []
+        cache_key = _response_cache.make_key(user_text, attachment_hashes, sender_role, event.group_id)
+        cached_reply = _response_cache.get(cache_key)
+        if cached_reply:
+            logger.info(f"openclaw_bridge response cache hit gid={event.group_id} preview={cached_reply[:40]!r}")
+            try:
+                await _reply_delivery.deliver(bot, event, cached_reply, _render_reply_message)
+            except Exception as e:
+                logger.exception(f"openclaw_bridge send failed: {e}")
+            await bridge.finish()
+            return
+
+    current_prompt = _build_exec_prompt(
+        role_prompt,
+        user_text,
+        attachment_context=attachment_context,
+        plugin_catalog=plugin_catalog,
+        history_summary=history_summary,
+    )
     reply = ""
     last_tool_text = ""
     last_tool_name = ""
     last_tool_args: Dict[str, Any] = {}
     execution_log: list[dict] = []
     native_network_traced = False
+    call_kind = "exec"
+    think_attachments = bool(attachment_context)
+    think_multi_step = _looks_like_multi_step_request(user_text)
+    budget = _budget_stats.open()
+    last_model_text = ""
 
     for round_idx in range(OPENCLAW_TOOL_MAX_ROUNDS):
-        model_reply = await _call_openclaw(current_prompt, session_id)
+        if not budget.try_charge(current_prompt):
+            # 预算用完：退回目前为止最好的结果（最后一次工具结果 > 最后一次模型文本）
+            logger.warning(
+                f"openclaw_bridge budget exhausted gid={event.group_id} reason={budget.exhausted_reason} {budget.describe()}"
+            )
+            reply = last_tool_text or last_model_text
+            if not reply:
+                reply = "这次处理得有点久，我先停在这儿了，稍后再试一次吧。"
+            break
+
+        thinking = _thinking_policy.choose(
+            call_kind,
+            text=user_text,
+            has_attachments=think_attachments,
+            multi_step=think_multi_step,
+        )
+        model_reply = await _call_openclaw(
+            current_prompt,
+            session_id,
+            call_kind=call_kind,
+            thinking=thinking,
+            timeout=budget.call_timeout(OPENCLAW_TIMEOUT),
+        )
+        session_bytes += len(current_prompt.encode("utf-8")) + len((model_reply or "").encode("utf-8"))
         model_reply = _strip_markdown(model_reply or "我这边没拿到结果，稍后再试。")
 
         tool_call = _parse_tool_call(model_reply)
@@ -1782,8 +2217,10 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
                 await bot.send(event, "🌐 已执行联网查询")
                 native_network_traced = True
             model_reply = clean_reply or model_reply
+            last_model_text = model_reply
 
             if execution_log and _looks_like_incomplete_progress_reply(model_reply) and (round_idx < OPENCLAW_TOOL_MAX_ROUNDS - 1):
+                call_kind = "followup"
                 current_prompt = _build_tool_followup_prompt(
                     role_prompt=role_prompt,
                     user_text=user_text,
@@ -1824,6 +2261,7 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
         if tool_msg is None:
             execution_log.append({"tool": tool_call, "result": "(no output)"})
             if round_idx < OPENCLAW_TOOL_MAX_ROUNDS - 1:
+                call_kind = "followup"
                 current_prompt = _build_tool_followup_prompt(
                     role_prompt=role_prompt,
                     user_text=user_text,
@@ -1848,6 +2286,7 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
 
         # 失败时进入下一轮，让 OpenClaw 自主调整参数/换工具
         if _looks_like_tool_error(tool_text) and (round_idx < OPENCLAW_TOOL_MAX_ROUNDS - 1):
+            call_kind = "retry"
             current_prompt = _build_tool_retry_prompt(
                 role_prompt=role_prompt,
                 user_text=user_text,
@@ -1863,6 +2302,7 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
         # 媒体结果直接发送，避免重写破坏
         if _message_has_media(tool_msg):
             await bot.send(event, tool_msg)
+            _record_sticky_turn(sticky_base, user_text, tool_text or "(media)", session_bytes)
             await bridge.finish()
             return
 
@@ -1878,6 +2318,7 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
                     if _should_bypass_plugin_rewrite(plugin_cmd or ""):
                         if tool_msg is not None:
                             await bot.send(event, tool_msg)
+                            _record_sticky_turn(sticky_base, user_text, last_tool_text, session_bytes)
                             await bridge.finish()
                             return
                         reply = last_tool_text
@@ -1888,6 +2329,7 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
                         plugin_command=plugin_cmd or "(unknown)",
                         plugin_output_text=last_tool_text,
                         session_id=session_id,
+                        budget=budget,
                     )
                     reply = rewritten or last_tool_text
                     break
@@ -1895,6 +2337,7 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
                     reply = last_tool_text
                     break
 
+            call_kind = "followup"
             current_prompt = _build_tool_followup_prompt(
                 role_prompt=role_prompt,
                 user_text=user_text,
@@ -1922,6 +2365,7 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
                     plugin_command=plugin_cmd or "(unknown)",
                     plugin_output_text=last_tool_text,
                     session_id=session_id,
+                    budget=budget,
                 )
                 if rewritten:
                     reply = rewritten
@@ -1944,6 +2388,7 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
                 plugin_command=plugin_cmd or "(unknown)",
                 plugin_output_text=last_tool_text,
                 session_id=session_id,
+                budget=budget,
             )
             reply = rewritten or last_tool_text or "我这边没拿到结果，稍后再试。"
         else:
@@ -1962,6 +2407,7 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
                 plugin_command=plugin_cmd or "(unknown)",
                 plugin_output_text=last_tool_text,
                 session_id=session_id,
+                budget=budget,
             )
             reply = rewritten or last_tool_text or "我这边没拿到结果，稍后再试。"
         else:
@@ -1970,7 +2416,15 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
     if _is_placeholder_reply(reply):
         for _ in range(2):
             retry_prompt = _build_no_placeholder_prompt(role_prompt, user_text, reply)
-            retry_reply = await _call_openclaw(retry_prompt, session_id)
+            if not budget.try_charge(retry_prompt):
+                break
+            retry_reply = await _call_openclaw(
+                retry_prompt,
+                session_id,
+                call_kind="placeholder",
+                timeout=budget.call_timeout(OPENCLAW_TIMEOUT),
+            )
+            session_bytes += len(retry_prompt.encode("utf-8")) + len((retry_reply or "").encode("utf-8"))
             retry_reply = _strip_markdown(retry_reply or "")
             if retry_reply and (not _is_placeholder_reply(retry_reply)):
                 reply = retry_reply
@@ -1980,22 +2434,123 @@ async def handle_bridge(bot: Bot, event: MessageEvent):
 
     reply = _rewrite_family_mentions_in_reply(event, user_text, reply)
 
-    logger.info(f"openclaw_bridge reply gid={event.group_id} len={len(reply)} preview={reply[:80]!r}")
+    if cache_key and not budget.exhausted_reason and not _is_bridge_error_reply(reply) and not _is_placeholder_reply(reply):
+        used = [_tool_cache_category(e["tool"]) for e in execution_log if isinstance(e.get("tool"), dict)]
+        categories = _response_cache.cacheable_categories(used)
+        # 回复里点了发言人名字的不缓存，避免别人命中后称呼错人
+        if categories and not (sender_name and sender_name in reply):
+            _response_cache.put(cache_key, reply, categories)
+
+    logger.info(f"openclaw_bridge reply gid={event.group_id} len={len(reply)} warm={_warmup.ready} preview={reply[:80]!r}")
 
     try:
-        await bot.send(event, _render_reply_message(reply))
+        await _reply_delivery.deliver(bot, event, reply, _render_reply_message)
     except Exception as e:
         logger.exception(f"openclaw_bridge send failed: {e}")
 
+    _record_sticky_turn(sticky_base, user_text, reply, session_bytes)
+
     await bridge.finish()
 
 
 _load_weather_jobs()
 
 
+async def _warm_openclaw_cli() -> str:
+    # 让 Node 与 openclaw 的模块进页缓存，首条消息不再付冷启动
+    rc, stdout, _, status = await _proc_supervisor.run("warmup", ["openclaw", "--version"], timeout=60, env=_openclaw_env())
+    if status != "ok" or rc != 0:
+        raise RuntimeError(f"status={status} rc={rc}")
+    return stdout.decode("utf-8", errors="ignore").strip()[:40]
+
+
+async def _warm_asr_model() -> str:
+    # ASR 每次在子进程里跑，这里加载一次模型，把模型文件下载/读进页缓存
+    script = (
+        "import sys\n"
+        "from faster_whisper import WhisperModel\n"
+        "WhisperModel(sys.argv[1], device='cpu', compute_type='int8')\n"
+    )
+    rc, _, stderr, status = await _proc_supervisor.run(
+        "warmup",
+        ["/usr/bin/python3", "-c", script, OPENCLAW_AUDIO_MODEL],
+        timeout=OPENCLAW_AUDIO_TRANSCRIBE_TIMEOUT,
+    )
+    if status != "ok" or rc != 0:
+        raise RuntimeError(f"status={status} rc={rc} {stderr.decode('utf-8', errors='ignore')[-80:]}")
+    return OPENCLAW_AUDIO_MODEL
+
+
+async def _warm_plugin_catalog() -> str:
+    return f"{await asyncio.to_thread(warm_plugin_catalog)} 个命令"
+
+
+async def _warm_http() -> str:
+    get_http_client()
+    ok = await prewarm_hosts(OPENCLAW_WARMUP_HTTP_URLS)
+    return f"{ok}/{len(OPENCLAW_WARMUP_HTTP_URLS)} 个域名"
+
+
+async def _warm_pic_index() -> str:
+    idx = await asyncio.to_thread(_load_json_dict, pic_index_file)
+    return f"{sum(len(v) for v in idx.values() if isinstance(v, dict))} 项"
+
+
+_warmup = BridgeWarmup(logger=logger)
+_warmup.add_step("openclaw", _warm_openclaw_cli)
+if OPENCLAW_AUDIO_MODE:
+    _warmup.add_step("asr", _warm_asr_model)
+_warmup.add_step("plugins", _warm_plugin_catalog)
+_warmup.add_step("http", _warm_http)
+_warmup.add_step("pic_index", _warm_pic_index)
+
+
+def _render_ops_section() -> list[str]:
+    snap = _proc_supervisor.snapshot()
+    labels = ", ".join(f"{k}={v}" for k, v in sorted(snap["by_label"].items())) or "无"
+    limit = f"{snap['rss_limit_mb']}MB" if snap["rss_limit_mb"] else "不限"
+    lines = [
+        f"- 存活子进程: {snap['live']}（{labels}）",
+        f"- 子进程内存: {snap['rss_mb']}MB（上限 {limit}{'' if snap['psutil'] else '，psutil 不可用'}）",
+        f"- 最久运行: {snap['oldest_seconds']}s",
+        f"- 累计启动 {snap['spawned']}，超时杀 {snap['killed_timeout']}，取消杀 {snap['killed_cancel']}，超内存杀 {snap['killed_rss']}",
+    ]
+    budget_snap = _budget_stats.snapshot()
+    exhausted = ", ".join(f"{k}={v}" for k, v in sorted(budget_snap["exhausted"].items())) or "无"
+    lines.append(
+        f"- 调用预算: {OPENCLAW_BUDGET_SECONDS:g}s / {OPENCLAW_BUDGET_MAX_CALLS or '不限'} 次 / {OPENCLAW_BUDGET_PROMPT_KB or '不限'}KB，"
+        f"请求 {budget_snap['requests']}，耗尽 {budget_snap['exhausted_total']}（{exhausted}）"
+    )
+    lines.append(f"- 插件输出改写: 本地模板 {_rewrite_counters['local']}，OpenClaw {_rewrite_counters['openclaw']}")
+    cache_snap = _response_cache.snapshot()
+    if cache_snap["enabled"]:
+        lines.append(
+            f"- 回复缓存: {cache_snap['entries']} 条（TTL {cache_snap['ttl_seconds']}s），"
+            f"命中 {cache_snap['hits']} / 未命中 {cache_snap['misses']}，失效 {cache_snap['invalidations']} 次"
+        )
+    lines.append(f"- 回复发送: {_reply_delivery.summary_line()}")
+    if OPENCLAW_WARMUP:
+        lines.extend(_warmup.summary_lines())
+    stats = _thinking_stats.summary_line()
+    if stats:
+        lines.append(f"- thinking: {stats}")
+    return lines
+
+
+register_ops_section("OpenClaw Bridge", _render_ops_section)
+
+
 driver = get_driver()
 
 
+@driver.on_shutdown
+async def _on_shutdown():
+    await _proc_supervisor.shutdown()
+    await close_http_client()
+
+
 @driver.on_bot_connect
 async def _on_bot_connect(bot: Bot):
     _restore_weather_jobs(bot)
+    if OPENCLAW_WARMUP and _warmup.start():
+        logger.info("openclaw_bridge warmup started")
@@ -16,6 +16,7 @@ from nonebot.adapters.onebot.v11 import Bot, Message, MessageEvent, MessageSegme
 from nonebot.params import CommandArg
 
 from ._data_paths import resolve_data_dir
+from ._ops_metrics import render_ops_sections
 
 try:
     require("nonebot_plugin_apscheduler")
@@ -621,6 +622,10 @@ def _build_status_text() -> str:
     lines.append(f"- mybot 维护模式: {_describe_maintenance('mybot')}")
     lines.append(f"- openclaw 维护模式: {_describe_maintenance('openclaw_gateway')}")
     lines.append("- 说明: 外部 watchdog 会负责拉起进程；计划内重启/停用会通过维护模式静默。")
+    extra = render_ops_sections()
+    if extra:
+        lines.append("")
+        lines.extend(extra)
     return "\n".join(lines)
 
 
@@ -1,16 +1,27 @@
+import asyncio
+import hashlib
 import os
-import re
 import httpx
 import random
 import shutil
+import uuid
+from datetime import datetime, timedelta
 from pathlib import Path
 
-from nonebot import on_command, on_message, logger
+from nonebot import on_command, on_message, logger, require
 from nonebot.exception import FinishedException
 from nonebot.adapters.onebot.v11 import MessageEvent, Bot, Message, MessageSegment
 from nonebot.params import CommandArg
 from nonebot.typing import T_State
 
+from ._data_paths import resolve_data_dir
+from ._ops_metrics import register_ops_section
+from ._pic_catalog import MediaCatalog
+from ._pic_hashes import ContentHashStore
+from ._pic_keyword_index import PicKeywordIndex
+from ._pic_phash import PerceptualIndex, file_inode
+from ._shuffle_bag import ShuffleBagManager
+
 
 plugin_dir = Path(__file__).parent
 assets_dir = plugin_dir / "assets"
@@ -34,6 +45,79 @@ IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 VIDEO_EXTENSIONS = {".mp4", ".mov", ".mkv", ".avi", ".flv", ".webm"}
 SUPPORTED_EXTENSIONS = IMAGE_EXTENSIONS.union(VIDEO_EXTENSIONS)
 
+# /savepic 下载中的临时文件放在素材目录之外（但同一文件系统，方便硬链接）
+incoming_dir = assets_dir / ".incoming"
+
+try:
+    PIC_SAVE_MAX_MB = int(os.getenv("PIC_SAVE_MAX_MB", "50"))
+except ValueError:
+    PIC_SAVE_MAX_MB = 50
+try:
+    PIC_SAVE_TIMEOUT_SECONDS = float(os.getenv("PIC_SAVE_TIMEOUT_SECONDS", "60"))
+except ValueError:
+    PIC_SAVE_TIMEOUT_SECONDS = 60.0
+# 内容重复时：link 自动建硬链接，reject 拒绝保存并提示已有文件，off 不查重
+PIC_SAVE_DEDUP = os.getenv("PIC_SAVE_DEDUP", "link").strip().lower()
+if PIC_SAVE_DEDUP not in {"link", "reject", "off"}:
+    PIC_SAVE_DEDUP = "link"
+# 近似重复检测：dHash 汉明距离阈值（0 关闭）、后台索引间隔（分钟）和并行子进程数
+try:
+    PIC_PHASH_THRESHOLD = int(os.getenv("PIC_PHASH_THRESHOLD", "6"))
+except ValueError:
+    PIC_PHASH_THRESHOLD = 6
+try:
+    PIC_PHASH_INTERVAL_MINUTES = int(os.getenv("PIC_PHASH_INTERVAL_MINUTES", "60"))
+except ValueError:
+    PIC_PHASH_INTERVAL_MINUTES = 60
+try:
+    PIC_PHASH_WORKERS = int(os.getenv("PIC_PHASH_WORKERS", "2"))
+except ValueError:
+    PIC_PHASH_WORKERS = 2
+PICDUPS_MAX_GROUPS = 20
+
+try:
+    require("nonebot_plugin_apscheduler")
+    from nonebot_plugin_apscheduler import scheduler
+except (ImportError, RuntimeError):
+    logger.warning("插件 nonebot_plugin_apscheduler 未加载，表情近似重复索引只在 /picdups 时更新")
+    scheduler = None
+
+# 各命令共用的目录清单，目录变化由 inotify（或 mtime 轮询）感知；内容哈希持久化用于查重
+media_catalog = MediaCatalog(
+    [default_pics_dir] + [assets_dir / folder for folder in SUBFOLDER_MAP.values()],
+    logger=logger,
+    hash_store=ContentHashStore(resolve_data_dir() / "pic_hashes.sqlite3"),
+)
+# 感知哈希（aHash/dHash）+ 缩略图，和内容哈希存在同一个库里
+phash_index = PerceptualIndex(
+    media_catalog.hash_store,
+    resolve_data_dir() / "pic_thumbs",
+    threshold=PIC_PHASH_THRESHOLD,
+    max_workers=PIC_PHASH_WORKERS,
+    logger=logger,
+)
+
+
+async def reindex_phashes() -> None:
+    """后台任务：给新增或改过的图片补算感知哈希和缩略图，重建近似查询索引。"""
+    if PIC_PHASH_THRESHOLD <= 0:
+        return
+    try:
+        media_catalog.refresh_all()
+        computed = await phash_index.reindex(list(media_catalog.iter_entries("image")))
+        if computed:
+            logger.info(f"表情感知哈希索引更新完成，新算 {computed} 张")
+    except Exception as e:
+        logger.error(f"表情感知哈希索引更新失败: {e}")
+
+
+if scheduler and PIC_PHASH_THRESHOLD > 0:
+    scheduler.add_job(
+        reindex_phashes, "interval", minutes=max(1, PIC_PHASH_INTERVAL_MINUTES),
+        next_run_time=datetime.now() + timedelta(seconds=30),
+        id="pic_phash_reindex", replace_existing=True,
+    )
+
 def parse_args_for_dir(raw_args: str) -> tuple[Path, str, str]:
     """解析参数以确定目标目录和剩余参数。"""
     arg_parts = raw_args.split(maxsplit=1)
@@ -90,6 +174,44 @@ def get_safe_path(base_dir: Path, user_filename: str) -> Path:
     return target_path
 
 
+class MediaTooLargeError(Exception):
+    pass
+
+
+def _folder_display_name(directory: Path) -> str:
+    if os.path.abspath(directory) == os.path.abspath(default_pics_dir):
+        return "默认表情"
+    return directory.name
+
+
+def _describe_similar(similar: list[tuple[int, str]], limit: int = 3) -> str:
+    lines = [f"[{_folder_display_name(Path(path).parent)}] {Path(path).name}（距离 {d}）" for d, path in similar[:limit]]
+    if len(similar) > limit:
+        lines.append(f"…… 等 {len(similar)} 张")
+    return "\n".join(lines)
+
+
+async def _download_to_file(url: str, dest: Path) -> tuple[int, str]:
+    """流式下载到 dest，同时计算 sha256；超过 PIC_SAVE_MAX_MB 抛 MediaTooLargeError。"""
+    max_bytes = PIC_SAVE_MAX_MB * 1024 * 1024
+    hasher = hashlib.sha256()
+    size = 0
+    async with httpx.AsyncClient(timeout=PIC_SAVE_TIMEOUT_SECONDS) as client:
+        async with client.stream("GET", url) as response:
+            response.raise_for_status()
+            declared = response.headers.get("content-length")
+            if declared and declared.isdigit() and int(declared) > max_bytes:
+                raise MediaTooLargeError()
+            with open(dest, "wb") as f:
+                async for chunk in response.aiter_bytes(256 * 1024):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise MediaTooLargeError()
+                    hasher.update(chunk)
+                    f.write(chunk)
+    return size, hasher.hexdigest()
+
+
 # --- 1. 保存表情 /savepic ---
 savepic = on_command("savepic", priority=1, block=True)
 
@@ -125,15 +247,72 @@ async def savepic_handle(bot: Bot, event: MessageEvent, args: Message = CommandA
         # 3. 检查文件是否存在
         if save_path.exists():
             await savepic.finish(f"保存失败：名为“{save_path.name}”的文件已在 [{folder_display_name}] 文件夹中存在。")
-            
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(media_url)
-            response.raise_for_status()
-        with open(save_path, "wb") as f:
-            f.write(response.content)
 
+        # 4. 边下载边写临时文件并计算哈希，超过大小上限立即中止
+        incoming_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = incoming_dir / f"{uuid.uuid4().hex}.part"
+        try:
+            size, digest = await _download_to_file(media_url, tmp_path)
+            media_catalog.refresh_all()
+            duplicate = None
+            if PIC_SAVE_DEDUP != "off":
+                duplicate = await asyncio.to_thread(media_catalog.find_duplicate, size, digest)
+
+            if duplicate is not None and PIC_SAVE_DEDUP == "reject":
+                await savepic.finish(
+                    f"已存在内容相同的文件：[{_folder_display_name(duplicate.parent)}] {duplicate.name}，未重复保存。"
+                )
+
+            # 没有内容完全相同的文件时再看有没有近似的（重新编码、缩放、轻微裁剪）
+            features = None
+            similar = []
+            if duplicate is None and PIC_PHASH_THRESHOLD > 0 and file_ext in IMAGE_EXTENSIONS:
+                features = await phash_index.features_for_file(tmp_path, key=save_path)
+                if features is not None:
+                    # 同一 inode 的硬链接只算一张，也不会和正在保存的文件本身比较
+                    similar = phash_index.similar(features, exclude_inode=file_inode(tmp_path))
+
+            linked = False
+            if duplicate is not None:
+                # 内容相同就建硬链接，不再多占一份空间；跨文件系统等失败时退回保存副本
+                try:
+                    os.link(duplicate, save_path)
+                    linked = True
+                except FileExistsError:
+                    raise
+                except OSError as e:
+                    logger.warning(f"创建硬链接失败，改为保存副本: {e}")
+            if not linked:
+                # os.link 不会覆盖已存在的文件，避免并发保存同名文件时互相覆盖
+                os.link(tmp_path, save_path)
+            media_catalog.record_hash(save_path, digest)
+            media_catalog.mark_dirty(save_dir)
+            if features is not None:
+                st = save_path.stat()
+                await asyncio.to_thread(media_catalog.hash_store.put_features, save_path, st.st_size, st.st_mtime, features)
+                phash_index.add(save_path, features)
+        except FileExistsError:
+            await savepic.finish(f"保存失败：名为“{save_path.name}”的文件已在 [{folder_display_name}] 文件夹中存在。")
+        finally:
+            try:
+                tmp_path.unlink()
+            except FileNotFoundError:
+                pass
+
+        if linked:
+            await savepic.finish(
+                f"文件已保存至 [{folder_display_name}] 文件夹: {save_path.name}\n"
+                f"（与 [{_folder_display_name(duplicate.parent)}] {duplicate.name} 内容相同，已用硬链接保存，不占额外空间）"
+            )
+        if similar:
+            await savepic.finish(
+                f"文件已保存至 [{folder_display_name}] 文件夹: {save_path.name}\n"
+                f"注意：图库里已有相似图片，可以考虑删掉重复的：\n{_describe_similar(similar)}"
+            )
         await savepic.finish(f"文件已保存至 [{folder_display_name}] 文件夹: {save_path.name}")
 
+    except MediaTooLargeError:
+        await savepic.finish(f"保存失败：文件超过大小上限 {PIC_SAVE_MAX_MB} MB。")
     except ValueError as e:
         await savepic.finish(str(e))
     except httpx.HTTPError as e:
@@ -157,7 +336,7 @@ async def sendpic_handle(bot: Bot, event: MessageEvent, args: Message = CommandA
     try:
         file_path = get_safe_path(target_dir, filename_arg)
         
-        if file_path.exists() and file_path.is_file():
+        if media_catalog.directory(target_dir).get(file_path.name) is not None:
             msg_segment = None
             try:
                 # 使用 resolve() 获取绝对路径以发送文件
@@ -203,14 +382,20 @@ async def rmpic_handle(bot: Bot, event: MessageEvent, args: Message = CommandArg
                 await rmpic.finish(f"文件夹 [{display_name}] 不存在。")
                 return
 
-            all_files = [f for f in target_dir.iterdir() if f.is_file()]
+            all_files = list(media_catalog.directory(target_dir).names())
             
             if not all_files:
                 await rmpic.finish(f"文件夹 [{display_name}] 已经是空的了。")
                 return
             
-            for file_to_delete in all_files:
-                os.remove(file_to_delete)
+            try:
+                for file_to_delete in all_files:
+                    try:
+                        os.remove(target_dir / file_to_delete)
+                    except FileNotFoundError:
+                        pass
+            finally:
+                media_catalog.mark_dirty(target_dir)
                 
         except OSError as e:
             logger.error(f"清空文件夹 {display_name} 时发生错误: {e}")
@@ -225,9 +410,10 @@ async def rmpic_handle(bot: Bot, event: MessageEvent, args: Message = CommandArg
         # --- 安全修复 ---
         file_path = get_safe_path(target_dir, action_arg)
 
-        if file_path.exists() and file_path.is_file():
+        if media_catalog.directory(target_dir).get(file_path.name) is not None:
             try:
                 os.remove(file_path)
+                media_catalog.mark_dirty(target_dir)
             except OSError as e:
                 logger.error(f"删除文件时发生错误: {e}")
                 await rmpic.finish(f"删除文件时发生错误，请检查后台日志。")
@@ -261,7 +447,7 @@ async def mvpic_handle(bot: Bot, event: MessageEvent, args: Message = CommandArg
         # --- 安全修复 ---
         # 1. 验证旧文件路径
         old_path = get_safe_path(target_dir, old_filename)
-        if not old_path.exists() or not old_path.is_file():
+        if media_catalog.directory(target_dir).get(old_path.name) is None:
             await mvpic.finish(f"在 [{display_name}] 中找不到要重命名的文件: {old_path.name}")
             return
         
@@ -284,6 +470,7 @@ async def mvpic_handle(bot: Bot, event: MessageEvent, args: Message = CommandArg
 
         # 4. 执行移动
         shutil.move(old_path, new_path)
+        media_catalog.mark_dirty(target_dir)
             
         await mvpic.finish(f"在 [{display_name}] 中，已将“{old_path.name}”重命名为“{new_path.name}”。")
 
@@ -303,20 +490,18 @@ async def listpic_handle(bot: Bot, event: MessageEvent, args: Message = CommandA
     raw_args = args.extract_plain_text().strip()
     target_dir, display_name, keyword = parse_args_for_dir(raw_args)
     
-    all_files_names = []
     try:
-        # os.listdir 返回的是文件名列表，不是完整路径，这是安全的
-        all_files_names = [f for f in os.listdir(target_dir) 
-                           if (target_dir / f).is_file()]
+        # 目录清单里只有文件名，不是完整路径，这是安全的
+        catalog = media_catalog.directory(target_dir)
     except Exception as e:
         await listpic.finish(f"读取文件夹 [{display_name}] 时发生错误: {e}")
         return
 
-    if not all_files_names:
+    if not catalog.names():
         await listpic.finish(f"文件夹 [{display_name}] 是空的哦！")
         return
 
-    files = [f for f in all_files_names if keyword in f] if keyword else all_files_names
+    files = catalog.search(keyword)
     
     if not files:
         await listpic.finish(f"在 [{display_name}] 中没有找到包含“{keyword}”的文件。")
@@ -378,25 +563,23 @@ async def randpic_handle(bot: Bot, event: MessageEvent, args: Message = CommandA
     raw_args = args.extract_plain_text().strip()
     target_dir, display_name, keyword = parse_args_for_dir(raw_args)
 
-    all_files_names = []
     try:
-        all_files_names = [f for f in os.listdir(target_dir) 
-                           if (target_dir / f).is_file()]
+        catalog = media_catalog.directory(target_dir)
     except Exception as e:
         await randpic.finish(f"读取文件夹 [{display_name}] 失败: {e}")
         return
         
-    if not all_files_names:
+    if not catalog.names():
         await randpic.finish(f"文件夹 [{display_name}] 是空的！")
         return
 
-    filtered_files = [f for f in all_files_names if keyword in f] if keyword else all_files_names
+    filtered_files = catalog.search(keyword)
     if not filtered_files:
         await randpic.finish(f"在 [{display_name}] 中没找到含“{keyword}”的文件。")
         return
     
     random_pic_name = random.choice(filtered_files)
-    # 路径是安全的，因为它由 safe_dir 和 listdir 返回的安全文件名组成
+    # 路径是安全的，因为它由 safe_dir 和目录清单里的文件名组成
     file_path = target_dir / random_pic_name
     
     msg = None
@@ -417,9 +600,24 @@ async def randpic_handle(bot: Bot, event: MessageEvent, args: Message = CommandA
 
 
 # --- 7. 自动回复表情（关键词触发） ---
-autopic_shuffled_lists = {}
-autopic_original_snapshots = {}
-autopic_last_sent = {}
+# 每个命中集合一个洗牌袋，LRU 限量并写盘，重启后也不会连发同一张
+try:
+    AUTOPIC_MAX_BAGS = int(os.getenv("AUTOPIC_MAX_BAGS", "512"))
+except ValueError:
+    AUTOPIC_MAX_BAGS = 512
+autopic_bags = ShuffleBagManager(
+    max_bags=AUTOPIC_MAX_BAGS,
+    persist_path=resolve_data_dir() / "autopic_shuffle_state.json",
+)
+# 文件名关键词索引，目录清单变化时才重建
+autopic_index = PicKeywordIndex(default_pics_dir)
+autopic_index_version = -1
+register_ops_section("表情库", lambda: [
+    f"- 目录清单: {media_catalog.summary_line()}",
+    f"- 关键词索引: {autopic_index.summary_line()}",
+    f"- 洗牌袋: {autopic_bags.summary_line()}",
+    f"- 近似重复索引: {phash_index.summary_line()}",
+])
 
 autopic = on_message(priority=99, block=False)
 
@@ -435,71 +633,29 @@ async def autopic_handle(bot: Bot, event: MessageEvent):
     if msg_text.startswith("/") or msg_text.startswith("！") or msg_text.startswith("!"):
         return
     
+    global autopic_index_version
     try:
-        all_files = [f for f in os.listdir(default_pics_dir)
-                     if (default_pics_dir / f).is_file()]
+        catalog = media_catalog.directory(default_pics_dir)
     except Exception as e:
         logger.error(f"读取默认文件夹时发生错误: {e}")
         return
     
-    if not all_files:
+    if not catalog.names():
         return
+    if autopic_index_version != catalog.version:
+        autopic_index.rebuild(catalog.names())
+        autopic_index_version = catalog.version
     
-    matched_files = []
-    keywords = msg_text.split()
-    
-    for filename in all_files:
-        name_without_ext = Path(filename).stem
-        
-        if name_without_ext in msg_text:
-            matched_files.append(filename)
-            continue
-        
-        name_parts = re.split(r'[._-]', name_without_ext)
-        name_parts = [part for part in name_parts if part]
-        
-        matched = False
-        for keyword in keywords:
-            if keyword in name_parts:
-                matched = True
-                break
-        
-        if matched:
-            matched_files.append(filename)
-    
+    matched_files = autopic_index.match(msg_text)
     if not matched_files:
         return
     
-    matched_files_set = frozenset(matched_files)
-    set_key = matched_files_set
-    
-    need_reshuffle = False
-    
-    if not autopic_shuffled_lists.get(set_key):
-        need_reshuffle = True
-    elif autopic_original_snapshots.get(set_key) != matched_files_set:
-        need_reshuffle = True
-        logger.debug(f"检测到匹配文件集合被修改，重新洗牌")
-    
-    if need_reshuffle:
-        autopic_shuffled_lists[set_key] = list(matched_files_set)
-        random.shuffle(autopic_shuffled_lists[set_key])
-        autopic_original_snapshots[set_key] = matched_files_set
-        
-        if len(autopic_shuffled_lists[set_key]) > 1 and set_key in autopic_last_sent:
-            last_file = autopic_last_sent[set_key]
-            if autopic_shuffled_lists[set_key][-1] == last_file:
-                autopic_shuffled_lists[set_key][0], autopic_shuffled_lists[set_key][-1] = \
-                    autopic_shuffled_lists[set_key][-1], autopic_shuffled_lists[set_key][0]
-                logger.debug(f"避免连续发送 {last_file}，已重新排列")
-    
-    selected_file = autopic_shuffled_lists[set_key].pop()
-    autopic_last_sent[set_key] = selected_file
+    selected_file = autopic_bags.draw(matched_files)
     
     if len(matched_files) > 1:
         logger.debug(f"关键词 '{msg_text}' 匹配到 {len(matched_files)} 个文件，已选择: {selected_file}")
     
-    # 路径是安全的，因为它由 safe_dir 和 listdir 返回的安全文件名组成
+    # 路径是安全的，因为它由 safe_dir 和目录清单里的文件名组成
     file_path = default_pics_dir / selected_file
     
     try:
@@ -516,4 +672,70 @@ async def autopic_handle(bot: Bot, event: MessageEvent):
         raise
     except Exception as e:
         logger.error(f"自动发送文件失败: {e}")
-        return
\ No newline at end of file
+        return
+
+# --- 8. 近似重复图片报告 /picdups ---
+def _describe_dup_member(path: str, links: list[str]) -> str:
+    line = f"[{_folder_display_name(Path(path).parent)}] {Path(path).name}"
+    if links:
+        # 硬链接共用同一份数据，删掉其中一个不省空间，只作说明
+        line += "（已硬链接：" + "、".join(f"[{_folder_display_name(Path(p).parent)}] {Path(p).name}" for p in links) + "）"
+    return line
+
+
+picdups = on_command("picdups", aliases={"相似表情"}, priority=1, block=True)
+
+@picdups.handle()
+async def picdups_handle(bot: Bot, event: MessageEvent):
+    if PIC_PHASH_THRESHOLD <= 0:
+        await picdups.finish("近似重复检测已关闭（PIC_PHASH_THRESHOLD=0）。")
+        return
+
+    if not phash_index.ready:
+        await picdups.send("正在为图库计算感知哈希，第一次可能需要一会儿……")
+        await reindex_phashes()
+
+    groups = phash_index.duplicate_groups()
+    if not groups:
+        await picdups.finish(f"没有发现近似重复的图片（dHash 距离阈值 {PIC_PHASH_THRESHOLD}）。")
+        return
+
+    header = (
+        f"🔍 发现 {len(groups)} 组近似重复的图片，共 {sum(len(g) for g in groups)} 张"
+        f"（dHash 距离阈值 {PIC_PHASH_THRESHOLD}）"
+    )
+    if len(groups) > PICDUPS_MAX_GROUPS:
+        header += f"，仅显示前 {PICDUPS_MAX_GROUPS} 组"
+    forward_nodes = [{
+        "type": "node",
+        "data": {
+            "uin": str(bot.self_id),
+            "content": header
+        }
+    }]
+    text_lines = []
+    for i, group in enumerate(groups[:PICDUPS_MAX_GROUPS], 1):
+        content = Message(f"第 {i} 组（{len(group)} 张）")
+        text_lines.append(f"第 {i} 组：" + "、".join(_describe_dup_member(p, links) for p, links in group))
+        for path, links in group:
+            content += f"\n{_describe_dup_member(path, links)}\n"
+            # 用缩略图而不是原图，转发消息不至于太大
+            thumb = phash_index.thumb_path(path)
+            if thumb.exists():
+                content += MessageSegment.image(file=thumb.resolve())
+        forward_nodes.append({
+            "type": "node",
+            "data": {
+                "uin": str(bot.self_id),
+                "content": content
+            }
+        })
+
+    try:
+        if event.message_type == "group":
+            await bot.call_api("send_group_forward_msg", group_id=event.group_id, messages=forward_nodes)
+        else:
+            await bot.call_api("send_private_forward_msg", user_id=event.user_id, messages=forward_nodes)
+    except Exception as e:
+        logger.error(f"发送近似重复报告失败: {e}")
+        await picdups.finish(header + "\n" + "\n".join(text_lines))
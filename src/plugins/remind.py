@@ -1,4 +1,4 @@
-import json
+import os
 import re
 import uuid
 from pathlib import Path
@@ -18,6 +18,10 @@ from nonebot.log import logger
 from nonebot.params import ArgPlainText, Matcher, CommandArg
 
 from ._data_paths import resolve_data_dir
+from ._remind_store import ReminderStore, compute_next_fire
+from ._remind_delivery import ReminderAggregator
+from ._remind_snooze import SnoozeContextStore
+from ._ops_metrics import register_ops_section
 
 
 try:
@@ -31,6 +35,7 @@ try:
     require("nonebot_plugin_apscheduler")
     from nonebot_plugin_apscheduler import scheduler
     from apscheduler.jobstores.base import JobLookupError
+    from ._sqlite_jobstore import PERSISTENT_JOBSTORE, ensure_persistent_jobstore, resolve_bot
 except (ImportError, RuntimeError):
     logger.error("插件 nonebot_plugin_apscheduler 未安装或加载，提醒插件将无法正常工作！")
     scheduler = None
@@ -39,8 +44,43 @@ except (ImportError, RuntimeError):
 plugin_dir = Path(__file__).parent
 data_dir = resolve_data_dir()
 data_file = data_dir / "reminders_data.json"
-reminders_data = {}
-active_snooze_contexts = {}
+store = ReminderStore(data_dir / "reminders.sqlite3")
+# 提醒任务存进 SQLite job store，重启后由 apscheduler 自己恢复，重连时不再逐条重建
+job_store = ensure_persistent_jobstore(scheduler, data_dir / "scheduler_jobs.sqlite3") if scheduler else None
+JOBSTORE = PERSISTENT_JOBSTORE if job_store else "default"
+_jobs_reconciled = False
+
+try:
+    # 同一会话在这个窗口内触发的提醒合并成一条消息（秒，0 表示不等待）
+    REMIND_MERGE_WINDOW_SECONDS = max(0.0, float(os.getenv("REMIND_MERGE_WINDOW_SECONDS", "2")))
+except Exception:
+    REMIND_MERGE_WINDOW_SECONDS = 2.0
+try:
+    # 同一个群两条提醒消息之间的最小间隔（秒）
+    REMIND_GROUP_MIN_INTERVAL_SECONDS = max(0.0, float(os.getenv("REMIND_GROUP_MIN_INTERVAL_SECONDS", "1.5")))
+except Exception:
+    REMIND_GROUP_MIN_INTERVAL_SECONDS = 1.5
+try:
+    # /notready 能推迟的时间窗口（秒）与最多保留多少个会话的上下文
+    REMIND_SNOOZE_WINDOW_SECONDS = max(60, int(os.getenv("REMIND_SNOOZE_WINDOW_SECONDS", "600")))
+except Exception:
+    REMIND_SNOOZE_WINDOW_SECONDS = 600
+try:
+    REMIND_SNOOZE_MAX_CONTEXTS = max(16, int(os.getenv("REMIND_SNOOZE_MAX_CONTEXTS", "1024")))
+except Exception:
+    REMIND_SNOOZE_MAX_CONTEXTS = 1024
+# 开启后 snooze 上下文写盘，重启后 /notready 仍然有效
+REMIND_SNOOZE_PERSIST = os.getenv("REMIND_SNOOZE_PERSIST", "false").strip().lower() in {"1", "true", "yes", "on"}
+active_snooze_contexts = SnoozeContextStore(
+    ttl_seconds=REMIND_SNOOZE_WINDOW_SECONDS,
+    max_entries=REMIND_SNOOZE_MAX_CONTEXTS,
+    persist_path=(data_dir / "reminder_snooze_contexts.json") if REMIND_SNOOZE_PERSIST else None,
+)
+reminder_delivery = ReminderAggregator(
+    window_seconds=REMIND_MERGE_WINDOW_SECONDS,
+    group_min_interval=REMIND_GROUP_MIN_INTERVAL_SECONDS,
+    logger=logger,
+)
 
 
 def _extract_target_user_id(args: Message) -> str:
@@ -90,50 +130,55 @@ def _normalize_target_event_text(event_text: str, target_user_id: str, owner_use
 
     return normalized or text
 
-def save_data():
-    with open(data_file, "w", encoding="utf-8") as f:
-        json.dump(reminders_data, f, ensure_ascii=False, indent=4)
-
 def load_data():
-    global reminders_data
-    if data_file.exists():
-        with open(data_file, "r", encoding="utf-8") as f:
-            try:
-                reminders_data = json.load(f)
-            except json.JSONDecodeError:
-                reminders_data = {}
-    else:
-        reminders_data = {}
+    """首次启动时把旧的 reminders_data.json 导入 SQLite，之后只读写数据库。"""
+    try:
+        imported = store.migrate_from_json(data_file)
+    except (ValueError, OSError) as e:
+        # 没打导入标记，修好文件后下次启动会再导入；这次先用数据库里已有的提醒
+        logger.error(f"读取旧提醒文件 {data_file.name} 失败，本次跳过导入: {e}")
+        return
+    if imported:
+        logger.info(f"已从 {data_file.name} 导入 {imported} 条提醒到 SQLite")
+
+
+def export_data():
+    """导出成旧格式 JSON 备份（每天定时执行一次）。"""
+    try:
+        n = store.export_json(data_dir / "reminders_export.json")
+        logger.info(f"提醒数据已导出备份，共 {n} 条")
+    except Exception as e:
+        logger.error(f"导出提醒备份失败: {e}")
 
 
-async def send_reminder(bot: Bot, session_id: str, user_id: int, event_text: str, job_id: str, is_group: bool, mention_all: bool = False):
+def _next_fire_ts(reminder: dict, job=None):
+    """下一次触发时间戳：优先取调度器算好的 next_run_time，调度器未启动时按规则推算。"""
+    next_run = getattr(job, "next_run_time", None) if job is not None else None
+    if next_run is None:
+        next_run = compute_next_fire(reminder, datetime.now(TARGET_TZ))
+    return next_run.timestamp() if next_run else None
+
+
+async def send_reminder(bot_self_id: str, session_id: str, user_id: int, event_text: str, job_id: str, is_group: bool, mention_all: bool = False):
     logger.info(f"执行提醒任务({job_id}): Session({session_id}) -> 用户({user_id}) -> 事件({event_text})")
-    
-    if is_group:
-        if mention_all:
-            msg = MessageSegment.at("all") + Message(f" 该 {event_text} 啦！")
-        else:
-            msg = MessageSegment.at(user_id) + Message(f" 该 {event_text} 啦！")
-        await bot.send_group_msg(group_id=int(session_id), message=msg)
+    bot = resolve_bot(bot_self_id)
+    if bot is None:
+        # 只跳过这一次发送；下面的删除/下一次触发时间/间隔提醒续期照常处理，否则提醒会一直停在过去的时间
+        logger.error(f"提醒任务({job_id})触发时没有在线的 Bot，本次发送跳过")
     else:
-        msg = Message(f"该 {event_text} 啦！")
-        await bot.send_private_msg(user_id=int(session_id), message=msg)
-
+        # 发送交给聚合器：同一会话同一时刻的多条提醒合并成一条消息，按群限速
+        reminder_delivery.submit(bot, session_id, is_group, user_id, event_text, mention_all)
 
-    active_snooze_contexts[session_id] = {
-        "event": event_text,
-        "timestamp": datetime.now().timestamp()
-    }
-    logger.debug(f"为 Session({session_id}) 设置事件'{event_text}'的 snooze 上下文")
+        active_snooze_contexts.set(session_id, event_text)
+        logger.debug(f"为 Session({session_id}) 设置事件'{event_text}'的 snooze 上下文")
 
-    user_reminders = reminders_data.get(str(user_id), [])
-    reminder_to_check = next((r for r in user_reminders if r.get("job_id") == job_id), None)
+    reminder_to_check = store.get(job_id)
 
-    if reminder_to_check and not reminder_to_check.get("is_daily") and not reminder_to_check.get("interval_days"):
-        reminders_to_keep = [r for r in user_reminders if r.get("job_id") != job_id]
-        reminders_data[str(user_id)] = reminders_to_keep
-        save_data()
+    if reminder_to_check and not reminder_to_check.get("is_daily") and not reminder_to_check.get("interval_days") and not reminder_to_check.get("weekdays"):
+        store.delete(job_id)
         logger.info(f"已移除执行完毕的一次性提醒任务({job_id})")
+    elif reminder_to_check and not reminder_to_check.get("interval_days"):
+        store.set_next_fire_at(job_id, _next_fire_ts(reminder_to_check))
     
     if reminder_to_check and reminder_to_check.get("interval_days"):
         interval_days = reminder_to_check.get("interval_days")
@@ -145,13 +190,14 @@ async def send_reminder(bot: Bot, session_id: str, user_id: int, event_text: str
         )
         
         mention_all = reminder_to_check.get("mention_all", False)
-        job_args = [bot, session_id, user_id, event_text, job_id, is_group, mention_all]
+        job_args = [bot_self_id, session_id, user_id, event_text, job_id, is_group, mention_all]
         
         try:
             scheduler.add_job(
                 send_reminder, "date", run_date=next_time,
-                id=job_id, args=job_args, timezone=TARGET_TZ
+                id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE, replace_existing=True
             )
+            store.set_next_fire_at(job_id, next_time.timestamp())
             logger.info(f"已为间隔提醒({job_id})设置下一次触发时间: {next_time}")
         except (ValueError, TypeError) as e:
             logger.error(f"为间隔提醒设置下一次触发失败: {e}")
@@ -293,27 +339,18 @@ async def handle_remind(bot: Bot, event: MessageEvent, args: Message = CommandAr
     is_group = isinstance(event, GroupMessageEvent)
     session_id = str(event.group_id) if is_group else owner_user_id
 
-    reminders_data.setdefault(target_user_id, [])
-    user_reminders = reminders_data[target_user_id]
-    
-    existing_reminder_index = -1
-    for i, r in enumerate(user_reminders):
-        if r.get("event") == event_text:
-            existing_reminder_index = i
-            break
-            
-    if existing_reminder_index != -1:
-        old_job_id = user_reminders[existing_reminder_index].get("job_id")
-        if old_job_id:
-            try:
-                scheduler.remove_job(old_job_id)
-                logger.info(f"为更新提醒，已移除旧任务({old_job_id})")
-            except JobLookupError:
-                logger.warning(f"尝试移除旧任务({old_job_id})失败: 任务不存在。")
-        del user_reminders[existing_reminder_index]
+    existing_reminder = store.find_by_event(target_user_id, event_text)
+    old_job_id = existing_reminder.get("job_id") if existing_reminder else None
+    if old_job_id:
+        try:
+            scheduler.remove_job(old_job_id)
+            logger.info(f"为更新提醒，已移除旧任务({old_job_id})")
+        except JobLookupError:
+            logger.warning(f"尝试移除旧任务({old_job_id})失败: 任务不存在。")
 
     job_id = f"reminder_{target_user_id}_{uuid.uuid4()}"
-    job_args = [bot, session_id, int(target_user_id), event_text, job_id, is_group]
+    job_args = [str(bot.self_id), session_id, int(target_user_id), event_text, job_id, is_group]
+    job = None
 
     if weekdays:
         if is_daily or interval_days:
@@ -327,9 +364,9 @@ async def handle_remind(bot: Bot, event: MessageEvent, args: Message = CommandAr
         day_of_week_str = ",".join(["mon", "tue", "wed", "thu", "fri", "sat", "sun"][day] for day in weekdays)
         
         try:
-            scheduler.add_job(
+            job = scheduler.add_job(
                 send_reminder, "cron", hour=hour, minute=minute, day_of_week=day_of_week_str,
-                id=job_id, args=job_args, timezone=TARGET_TZ, replace_existing=True
+                id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE, replace_existing=True
             )
         except (ValueError, TypeError) as e:
             logger.error(f"添加周几提醒任务到调度器失败: {e}")
@@ -339,14 +376,14 @@ async def handle_remind(bot: Bot, event: MessageEvent, args: Message = CommandAr
         try:
             if target_date:
                 start_date = datetime.combine(target_date, datetime.min.time()).replace(tzinfo=TARGET_TZ)
-                scheduler.add_job(
+                job = scheduler.add_job(
                     send_reminder, "cron", hour=hour, minute=minute,
-                    id=job_id, args=job_args, timezone=TARGET_TZ, start_date=start_date, replace_existing=True
+                    id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE, start_date=start_date, replace_existing=True
                 )
             else:
-                scheduler.add_job(
+                job = scheduler.add_job(
                     send_reminder, "cron", hour=hour, minute=minute,
-                    id=job_id, args=job_args, timezone=TARGET_TZ, replace_existing=True
+                    id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE, replace_existing=True
                 )
         except (ValueError, TypeError) as e:
             logger.error(f"添加每日提醒任务到调度器失败: {e}")
@@ -365,9 +402,9 @@ async def handle_remind(bot: Bot, event: MessageEvent, args: Message = CommandAr
             first_reminder_time = (now + timedelta(days=interval_days)).replace(hour=hour, minute=minute, second=0, microsecond=0)
         
         try:
-            scheduler.add_job(
+            job = scheduler.add_job(
                 send_reminder, "date", run_date=first_reminder_time,
-                id=job_id, args=job_args, timezone=TARGET_TZ
+                id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE
             )
         except (ValueError, TypeError) as e:
             logger.error(f"添加间隔提醒任务到调度器失败: {e}")
@@ -390,9 +427,9 @@ async def handle_remind(bot: Bot, event: MessageEvent, args: Message = CommandAr
             return
         
         try:
-            scheduler.add_job(
+            job = scheduler.add_job(
                 send_reminder, "date", run_date=reminder_time,
-                id=job_id, args=job_args, timezone=TARGET_TZ
+                id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE
             )
         except (ValueError, TypeError) as e:
             logger.error(f"添加一次性提醒任务到调度器失败: {e}")
@@ -412,8 +449,7 @@ async def handle_remind(bot: Bot, event: MessageEvent, args: Message = CommandAr
     if weekdays:
         new_reminder["weekdays"] = weekdays
     
-    user_reminders.append(new_reminder)
-    save_data()
+    store.put(target_user_id, new_reminder, replaces=old_job_id, next_fire_at=_next_fire_ts(new_reminder, job))
 
     logger.info(f"为目标用户({target_user_id})由发起人({owner_user_id})在 Session({session_id}) 中设置了提醒: {new_reminder}")
 
@@ -436,7 +472,7 @@ async def handle_remind(bot: Bot, event: MessageEvent, args: Message = CommandAr
     else:
         time_desc = f"今天的 {time_str}"
     
-    action_verb = "更新" if existing_reminder_index != -1 else "设置"
+    action_verb = "更新" if existing_reminder else "设置"
     if target_user_id == owner_user_id:
         await remind.finish(f"提醒{action_verb}成功！我会在{time_desc}提醒你【{event_text}】。")
     await remind.finish(MessageSegment.at(int(target_user_id)) + Message(f" 好，我会在{time_desc}提醒你【{event_text}】。"))
@@ -520,27 +556,18 @@ async def handle_remind_all(bot: Bot, event: MessageEvent, args: Message = Comma
     is_group = True
     session_id = str(event.group_id)
 
-    reminders_data.setdefault(user_id, [])
-    user_reminders = reminders_data[user_id]
-    
-    existing_reminder_index = -1
-    for i, r in enumerate(user_reminders):
-        if r.get("event") == event_text:
-            existing_reminder_index = i
-            break
-            
-    if existing_reminder_index != -1:
-        old_job_id = user_reminders[existing_reminder_index].get("job_id")
-        if old_job_id:
-            try:
-                scheduler.remove_job(old_job_id)
-                logger.info(f"为更新提醒，已移除旧任务({old_job_id})")
-            except JobLookupError:
-                logger.warning(f"尝试移除旧任务({old_job_id})失败: 任务不存在。")
-        del user_reminders[existing_reminder_index]
+    existing_reminder = store.find_by_event(user_id, event_text)
+    old_job_id = existing_reminder.get("job_id") if existing_reminder else None
+    if old_job_id:
+        try:
+            scheduler.remove_job(old_job_id)
+            logger.info(f"为更新提醒，已移除旧任务({old_job_id})")
+        except JobLookupError:
+            logger.warning(f"尝试移除旧任务({old_job_id})失败: 任务不存在。")
 
     job_id = f"reminder_{user_id}_{uuid.uuid4()}"
-    job_args = [bot, session_id, event.user_id, event_text, job_id, is_group, True]  # mention_all=True
+    job_args = [str(bot.self_id), session_id, event.user_id, event_text, job_id, is_group, True]  # mention_all=True
+    job = None
 
     if weekdays:
         if is_daily or interval_days:
@@ -554,9 +581,9 @@ async def handle_remind_all(bot: Bot, event: MessageEvent, args: Message = Comma
         day_of_week_str = ",".join(["mon", "tue", "wed", "thu", "fri", "sat", "sun"][day] for day in weekdays)
         
         try:
-            scheduler.add_job(
+            job = scheduler.add_job(
                 send_reminder, "cron", hour=hour, minute=minute, day_of_week=day_of_week_str,
-                id=job_id, args=job_args, timezone=TARGET_TZ, replace_existing=True
+                id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE, replace_existing=True
             )
         except (ValueError, TypeError) as e:
             logger.error(f"添加周几提醒任务到调度器失败: {e}")
@@ -566,14 +593,14 @@ async def handle_remind_all(bot: Bot, event: MessageEvent, args: Message = Comma
         try:
             if target_date:
                 start_date = datetime.combine(target_date, datetime.min.time()).replace(tzinfo=TARGET_TZ)
-                scheduler.add_job(
+                job = scheduler.add_job(
                     send_reminder, "cron", hour=hour, minute=minute,
-                    id=job_id, args=job_args, timezone=TARGET_TZ, start_date=start_date, replace_existing=True
+                    id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE, start_date=start_date, replace_existing=True
                 )
             else:
-                scheduler.add_job(
+                job = scheduler.add_job(
                     send_reminder, "cron", hour=hour, minute=minute,
-                    id=job_id, args=job_args, timezone=TARGET_TZ, replace_existing=True
+                    id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE, replace_existing=True
                 )
         except (ValueError, TypeError) as e:
             logger.error(f"添加每日提醒任务到调度器失败: {e}")
@@ -592,9 +619,9 @@ async def handle_remind_all(bot: Bot, event: MessageEvent, args: Message = Comma
             first_reminder_time = (now + timedelta(days=interval_days)).replace(hour=hour, minute=minute, second=0, microsecond=0)
         
         try:
-            scheduler.add_job(
+            job = scheduler.add_job(
                 send_reminder, "date", run_date=first_reminder_time,
-                id=job_id, args=job_args, timezone=TARGET_TZ
+                id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE
             )
         except (ValueError, TypeError) as e:
             logger.error(f"添加间隔提醒任务到调度器失败: {e}")
@@ -617,9 +644,9 @@ async def handle_remind_all(bot: Bot, event: MessageEvent, args: Message = Comma
             return
         
         try:
-            scheduler.add_job(
+            job = scheduler.add_job(
                 send_reminder, "date", run_date=reminder_time,
-                id=job_id, args=job_args, timezone=TARGET_TZ
+                id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE
             )
         except (ValueError, TypeError) as e:
             logger.error(f"添加一次性提醒任务到调度器失败: {e}")
@@ -639,8 +666,7 @@ async def handle_remind_all(bot: Bot, event: MessageEvent, args: Message = Comma
     if weekdays:
         new_reminder["weekdays"] = weekdays
     
-    user_reminders.append(new_reminder)
-    save_data()
+    store.put(user_id, new_reminder, replaces=old_job_id, next_fire_at=_next_fire_ts(new_reminder, job))
 
     logger.info(f"为用户({user_id})在 Session({session_id}) 中设置了艾特全体的提醒: {new_reminder}")
 
@@ -663,7 +689,7 @@ async def handle_remind_all(bot: Bot, event: MessageEvent, args: Message = Comma
     else:
         time_desc = f"今天的 {time_str}"
     
-    action_verb = "更新" if existing_reminder_index != -1 else "设置"
+    action_verb = "更新" if existing_reminder else "设置"
     await remind_all.finish(f"@全体成员 提醒{action_verb}成功！我会在{time_desc}艾特全体成员提醒【{event_text}】。")
 
 
@@ -677,9 +703,7 @@ async def handle_not_ready(bot: Bot, event: MessageEvent, args: Message = Comman
     session_id = str(event.group_id) if is_group else user_id
 
     context = active_snooze_contexts.get(session_id)
-
-    SNOOZE_WINDOW = 600 
-    if not context or (datetime.now().timestamp() - context.get("timestamp", 0)) > SNOOZE_WINDOW:
+    if not context:
         await not_ready.finish("现在没有等待你回复的提醒哦。")
         return
 
@@ -702,88 +726,116 @@ async def handle_not_ready(bot: Bot, event: MessageEvent, args: Message = Comman
         return
         
     snooze_job_id = f"snooze_{session_id}_{uuid.uuid4()}"
-    job_args = [bot, session_id, event.user_id, event_text, snooze_job_id, is_group]
+    job_args = [str(bot.self_id), session_id, event.user_id, event_text, snooze_job_id, is_group]
 
     try:
         scheduler.add_job(
             send_reminder, "date", run_date=snooze_time,
-            id=snooze_job_id, args=job_args, timezone=TARGET_TZ
+            id=snooze_job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE
         )
     except (ValueError, TypeError) as e:
         logger.error(f"添加 snooze 任务失败: {e}")
         await not_ready.finish("哎呀，设置推迟提醒失败了，请稍后再试。")
         return
         
-    del active_snooze_contexts[session_id]
+    active_snooze_contexts.pop(session_id)
     
     logger.info(f"用户({user_id})将事件'{event_text}'的提醒推迟到 {time_str}")
     await not_ready.finish(f"好的，我会在今天 {time_str} 再次提醒你【{event_text}】。")
 
 
+# /listreminders 分页：每页条数，以及一页超过多少条时改用合并转发
+REMIND_LIST_PAGE_SIZE = 20
+REMIND_LIST_FORWARD_MIN = 8
+REMIND_LIST_LINES_PER_NODE = 10
+_WEEKDAY_NAMES = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+
+
+def _describe_reminder_when(r: dict) -> str:
+    time_str = f"{r['hour']:02d}:{r['minute']:02d}"
+    if r.get('weekdays'):
+        weekday_desc = "、".join(_WEEKDAY_NAMES[day] for day in sorted(r['weekdays']))
+        return f"每{weekday_desc} {time_str}"
+    if r.get('is_daily', False):
+        if r.get('date'):
+            date_obj = datetime.strptime(r['date'], "%Y-%m-%d")
+            return f"从{date_obj.strftime('%m月%d日')}起每天 {time_str}"
+        return f"每天 {time_str}"
+    if r.get('interval_days'):
+        interval = r.get('interval_days')
+        if r.get('date'):
+            date_obj = datetime.strptime(r['date'], "%Y-%m-%d")
+            return f"从{date_obj.strftime('%m月%d日')}起每{interval}天 {time_str}"
+        return f"每{interval}天 {time_str}"
+    if r.get('date'):
+        date_obj = datetime.strptime(r['date'], "%Y-%m-%d")
+        return f"{date_obj.strftime('%m月%d日')} {time_str}"
+    return f"今天 {time_str}"
+
+
+def _format_reminder_line(r: dict, next_fire_at) -> str:
+    location = f"群聊({r['session_id']})中" if r.get('is_group') else "私聊中"
+    line = f"- {_describe_reminder_when(r)}：{r['event']} ({location})"
+    recurring = r.get('weekdays') or r.get('is_daily') or r.get('interval_days')
+    if recurring and next_fire_at:
+        line += f"，下次 {datetime.fromtimestamp(next_fire_at, TARGET_TZ).strftime('%m-%d %H:%M')}"
+    return line
+
+
 @list_reminders.handle()
-async def handle_list_reminders(event: MessageEvent, args: Message = CommandArg()):
+async def handle_list_reminders(bot: Bot, event: MessageEvent, args: Message = CommandArg()):
     owner_user_id = str(event.user_id)
     target_user_id = _resolve_target_user_id(event, args)
 
-    user_reminders = reminders_data.get(target_user_id, [])
+    total = store.count_for_owner(target_user_id)
     
-    if not user_reminders:
+    if not total:
         if target_user_id == owner_user_id:
             await list_reminders.finish("你还没有设置任何提醒哦。")
         await list_reminders.finish(MessageSegment.at(int(target_user_id)) + Message(" 目前还没有设置任何提醒哦。"))
         return
 
-    reply_msg = "你当前的提醒有：\n" if target_user_id == owner_user_id else f"[CQ:at,qq={target_user_id}] 当前的提醒有：\n"
-    
-    def sort_key(r):
-        date_str = r.get('date', '')
-        if date_str:
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-            return (0, date_obj, r['hour'], r['minute'])
-        elif r.get('weekdays'):
-            return (4, datetime.max.date(), r['hour'], r['minute'])
-        elif r.get('is_daily', False):
-            return (3, datetime.max.date(), r['hour'], r['minute'])
-        elif r.get('interval_days'):
-            return (2, datetime.now(TARGET_TZ).date(), r['hour'], r['minute'])
-        else:
-            return (1, datetime.now(TARGET_TZ).date(), r['hour'], r['minute'])
-    
-    sorted_reminders = sorted(user_reminders, key=sort_key)
-    weekday_names = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
-    
-    for r in sorted_reminders:
-        time_str = f"{r['hour']:02d}:{r['minute']:02d}"
-        
-        if r.get('weekdays'):
-            weekday_list = [weekday_names[day] for day in sorted(r['weekdays'])]
-            weekday_desc = "、".join(weekday_list)
-            when_str = f"每{weekday_desc} {time_str}"
-        elif r.get('is_daily', False):
-            if r.get('date'):
-                date_obj = datetime.strptime(r['date'], "%Y-%m-%d")
-                when_str = f"从{date_obj.strftime('%m月%d日')}起每天 {time_str}"
-            else:
-                when_str = f"每天 {time_str}"
-        elif r.get('interval_days'):
-            interval = r.get('interval_days')
-            if r.get('date'):
-                date_obj = datetime.strptime(r['date'], "%Y-%m-%d")
-                when_str = f"从{date_obj.strftime('%m月%d日')}起每{interval}天 {time_str}"
+    # 按下一次触发时间有序分页读取，不再全量排序
+    total_pages = (total + REMIND_LIST_PAGE_SIZE - 1) // REMIND_LIST_PAGE_SIZE
+    page_match = re.search(r"\d+", args.extract_plain_text())
+    page = min(max(1, int(page_match.group(0))), total_pages) if page_match else 1
+    rows = store.page_for_owner(target_user_id, (page - 1) * REMIND_LIST_PAGE_SIZE, REMIND_LIST_PAGE_SIZE)
+    lines = [_format_reminder_line(r, next_fire_at) for next_fire_at, r in rows]
+
+    footer = ""
+    if total_pages > 1:
+        footer = f"第 {page}/{total_pages} 页，共 {total} 条"
+        if page < total_pages:
+            footer += f"，发送 /listreminders {page + 1} 查看下一页"
+
+    if len(lines) > REMIND_LIST_FORWARD_MIN:
+        header = "你当前的提醒有：" if target_user_id == owner_user_id else f"{target_user_id} 当前的提醒有："
+        contents = [header]
+        for i in range(0, len(lines), REMIND_LIST_LINES_PER_NODE):
+            contents.append("\n".join(lines[i:i + REMIND_LIST_LINES_PER_NODE]))
+        if footer:
+            contents.append(footer)
+        forward_nodes = [
+            {"type": "node", "data": {"uin": str(bot.self_id), "content": c}}
+            for c in contents
+        ]
+        sent = False
+        try:
+            if isinstance(event, GroupMessageEvent):
+                await bot.call_api("send_group_forward_msg", group_id=event.group_id, messages=forward_nodes)
             else:
-                when_str = f"每{interval}天 {time_str}"
-        elif r.get('date'):
-            date_obj = datetime.strptime(r['date'], "%Y-%m-%d")
-            when_str = f"{date_obj.strftime('%m月%d日')} {time_str}"
-        else:
-            when_str = f"今天 {time_str}"
-        
-        location = f"群聊({r['session_id']})中" if r.get('is_group') else "私聊中"
-        reply_msg += f"- {when_str}：{r['event']} ({location})\n"
-
+                await bot.call_api("send_private_forward_msg", user_id=event.user_id, messages=forward_nodes)
+            sent = True
+        except Exception as e:
+            # 降级：合并转发失败时按普通消息发送本页
+            logger.error(f"发送提醒列表合并转发失败: {e}")
+        if sent:
+            await list_reminders.finish()
+
+    body = "\n".join(lines + ([footer] if footer else []))
     if target_user_id == owner_user_id:
-        await list_reminders.finish(reply_msg.strip())
-    await list_reminders.finish(MessageSegment.at(int(target_user_id)) + Message(" 的提醒如下：\n" + "\n".join(reply_msg.strip().split("\n")[1:])))
+        await list_reminders.finish("你当前的提醒有：\n" + body)
+    await list_reminders.finish(MessageSegment.at(int(target_user_id)) + Message(" 的提醒如下：\n" + body))
 
 
 @cancel_reminder.handle()
@@ -804,8 +856,7 @@ async def process_cancel_reminder(event: MessageEvent, args: Message = CommandAr
 
     event_to_cancel = _normalize_target_event_text(event_text.strip(), target_user_id, owner_user_id)
 
-    user_reminders = reminders_data.get(target_user_id, [])
-    reminder_to_remove = next((r for r in user_reminders if r.get("event") == event_to_cancel), None)
+    reminder_to_remove = store.find_by_event(target_user_id, event_to_cancel)
             
     if not reminder_to_remove:
         if target_user_id == owner_user_id:
@@ -824,13 +875,7 @@ async def process_cancel_reminder(event: MessageEvent, args: Message = CommandAr
             logger.exception(f"移除任务({job_id})时发生错误: {e}")
             # 这里不抛出异常，继续执行删除操作
 
-    user_reminders.remove(reminder_to_remove)
-    reminders_data[target_user_id] = user_reminders
-
-    if not reminders_data[target_user_id]:
-        del reminders_data[target_user_id]
-            
-    save_data()
+    store.delete(reminder_to_remove["job_id"])
     
     logger.info(f"发起人({owner_user_id})为目标用户({target_user_id})取消了提醒: {event_to_cancel}")
     if target_user_id == owner_user_id:
@@ -838,97 +883,142 @@ async def process_cancel_reminder(event: MessageEvent, args: Message = CommandAr
     await cancel_reminder.finish(MessageSegment.at(int(target_user_id)) + Message(f" 的提醒【{event_to_cancel}】我已经取消了。"))
 
 
+def _scheduled_job_ids() -> set:
+    if job_store is not None:
+        return job_store.job_ids()
+    return {job.id for job in scheduler.get_jobs()}
+
+
 def reschedule_jobs(bot: Bot):
+    """进程内只对账一次：只给数据库里有、调度器里没有的提醒补建任务，并清掉孤儿任务。
+
+    任务本身持久化在 SQLite job store 里并在触发时再取 Bot，
+    所以 NapCat 重连不需要重建任何任务，重连开销与提醒数量无关。
+    """
+    global _jobs_reconciled
     if not scheduler or not TARGET_TZ:
         logger.error("调度器未准备就绪，无法重载提醒任务。")
         return
-    
-    logger.info("--- 正在从数据文件重载提醒任务 ---")
+    if _jobs_reconciled:
+        return
+    _jobs_reconciled = True
+
+    logger.info("--- 正在对账提醒任务 ---")
     now = datetime.now(TARGET_TZ)
     reminders_to_remove = []
+    scheduled = _scheduled_job_ids()
+    known_job_ids = set()
+    restored = 0
+
+    for user_id, reminder in store.iter_all():
+        known_job_ids.add(reminder.get("job_id"))
+        if reminder.get("job_id") in scheduled:
+            continue
+        try:
+            job_id = reminder.get("job_id")
+            event_text = reminder.get("event")
+            hour = reminder.get("hour")
+            minute = reminder.get("minute")
+            is_daily = reminder.get("is_daily", False)
+            interval_days = reminder.get("interval_days")
+            session_id = reminder.get("session_id")
+            is_group = reminder.get("is_group", False)
+            date_str = reminder.get("date")
+            
+            if not all([job_id, event_text, isinstance(hour, int), isinstance(minute, int), session_id is not None]):
+                logger.warning(f"跳过格式错误的提醒: {reminder}")
+                continue
 
-    for user_id, reminders in reminders_data.copy().items():
-        for reminder in reminders:
-            try:
-                job_id = reminder.get("job_id")
-                event_text = reminder.get("event")
-                hour = reminder.get("hour")
-                minute = reminder.get("minute")
-                is_daily = reminder.get("is_daily", False)
-                interval_days = reminder.get("interval_days")
-                session_id = reminder.get("session_id")
-                is_group = reminder.get("is_group", False)
-                date_str = reminder.get("date")
-                
-                if not all([job_id, event_text, isinstance(hour, int), isinstance(minute, int), session_id is not None]):
-                    logger.warning(f"跳过格式错误的提醒: {reminder}")
-                    continue
-
-                user_id_int = int(user_id)
-                mention_all = reminder.get("mention_all", False)
-                job_args = [bot, session_id, user_id_int, event_text, job_id, is_group, mention_all]
-                
-                weekdays = reminder.get("weekdays")
-                if weekdays:
-                    day_of_week_str = ",".join(["mon", "tue", "wed", "thu", "fri", "sat", "sun"][day] for day in weekdays)
-                    scheduler.add_job(
-                        send_reminder, "cron", hour=hour, minute=minute, day_of_week=day_of_week_str,
-                        id=job_id, args=job_args, timezone=TARGET_TZ, replace_existing=True
-                    )
-                elif is_daily:
-                    if date_str:
-                        target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                        start_date = datetime.combine(target_date, datetime.min.time()).replace(tzinfo=TARGET_TZ)
-                        scheduler.add_job(
-                            send_reminder, "cron", hour=hour, minute=minute,
-                            id=job_id, args=job_args, timezone=TARGET_TZ, start_date=start_date, replace_existing=True
-                        )
-                    else:
-                        scheduler.add_job(
-                            send_reminder, "cron", hour=hour, minute=minute,
-                            id=job_id, args=job_args, timezone=TARGET_TZ, replace_existing=True
-                        )
-                elif interval_days:
-                    reminder_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                    if reminder_time < now:
-                        reminder_time = (now + timedelta(days=interval_days)).replace(hour=hour, minute=minute, second=0, microsecond=0)
-                    
-                    scheduler.add_job(
-                        send_reminder, "date", run_date=reminder_time,
-                        id=job_id, args=job_args, timezone=TARGET_TZ, replace_existing=True
+            user_id_int = int(user_id)
+            mention_all = reminder.get("mention_all", False)
+            job_args = [str(bot.self_id), session_id, user_id_int, event_text, job_id, is_group, mention_all]
+            
+            weekdays = reminder.get("weekdays")
+            if weekdays:
+                day_of_week_str = ",".join(["mon", "tue", "wed", "thu", "fri", "sat", "sun"][day] for day in weekdays)
+                job = scheduler.add_job(
+                    send_reminder, "cron", hour=hour, minute=minute, day_of_week=day_of_week_str,
+                    id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE, replace_existing=True
+                )
+            elif is_daily:
+                if date_str:
+                    target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+                    start_date = datetime.combine(target_date, datetime.min.time()).replace(tzinfo=TARGET_TZ)
+                    job = scheduler.add_job(
+                        send_reminder, "cron", hour=hour, minute=minute,
+                        id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE, start_date=start_date, replace_existing=True
                     )
                 else:
-                    if date_str:
-                        target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                        reminder_time = datetime.combine(target_date, datetime.min.time()).replace(
-                            hour=hour, minute=minute, second=0, microsecond=0, tzinfo=TARGET_TZ
-                        )
-                    else:
-                        reminder_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                    
-                    if reminder_time < now:
-                        logger.info(f"一次性提醒 {job_id} ('{event_text}') 已过期，将其移除。")
-                        reminders_to_remove.append((user_id, job_id))
-                        continue
-                    
-                    scheduler.add_job(
-                        send_reminder, "date", run_date=reminder_time,
-                        id=job_id, args=job_args, timezone=TARGET_TZ, replace_existing=True
+                    job = scheduler.add_job(
+                        send_reminder, "cron", hour=hour, minute=minute,
+                        id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE, replace_existing=True
+                    )
+            elif interval_days:
+                reminder_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                if reminder_time < now:
+                    reminder_time = (now + timedelta(days=interval_days)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+                
+                job = scheduler.add_job(
+                    send_reminder, "date", run_date=reminder_time,
+                    id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE, replace_existing=True
+                )
+            else:
+                if date_str:
+                    target_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+                    reminder_time = datetime.combine(target_date, datetime.min.time()).replace(
+                        hour=hour, minute=minute, second=0, microsecond=0, tzinfo=TARGET_TZ
                     )
-            except (ValueError, TypeError, KeyError):
-                logger.exception(f"重载提醒任务失败: {reminder}")
+                else:
+                    reminder_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                
+                if reminder_time < now:
+                    logger.info(f"一次性提醒 {job_id} ('{event_text}') 已过期，将其移除。")
+                    reminders_to_remove.append((user_id, job_id))
+                    continue
+                
+                job = scheduler.add_job(
+                    send_reminder, "date", run_date=reminder_time,
+                    id=job_id, args=job_args, timezone=TARGET_TZ, jobstore=JOBSTORE, replace_existing=True
+                )
+            store.set_next_fire_at(job_id, _next_fire_ts(reminder, job))
+            restored += 1
+        except (ValueError, TypeError, KeyError):
+            logger.exception(f"重载提醒任务失败: {reminder}")
     
     if reminders_to_remove:
-        for user_id, job_id in reminders_to_remove:
-            user_reminders = reminders_data.get(user_id, [])
-            reminders_data[user_id] = [r for r in user_reminders if r.get("job_id") != job_id]
-            if not reminders_data[user_id]:
-                del reminders_data[user_id]
-        save_data()
+        store.delete_many(job_id for _, job_id in reminders_to_remove)
         logger.info(f"清理了 {len(reminders_to_remove)} 个过期的一次性提醒。")
 
-    logger.info("--- 提醒任务重载完毕 ---")
+    # 已在调度器里的任务，若索引里的下一次触发时间缺失或过期（例如刚从 JSON 迁移），按调度器刷新
+    refreshed = 0
+    for _, reminder in store.stale_next_fire(now.timestamp()):
+        job_id = reminder.get("job_id")
+        if job_id in scheduled:
+            store.set_next_fire_at(job_id, _next_fire_ts(reminder, scheduler.get_job(job_id, jobstore=JOBSTORE)))
+            refreshed += 1
+    if refreshed:
+        logger.info(f"刷新了 {refreshed} 条提醒的下一次触发时间")
+
+    # 数据库里已经没有的 reminder_ 任务（例如导出/回滚后残留）一并移除；snooze_ 任务没有对应记录，保留
+    orphans = [j for j in scheduled if j.startswith("reminder_") and j not in known_job_ids]
+    for job_id in orphans:
+        try:
+            scheduler.remove_job(job_id, jobstore=JOBSTORE)
+        except JobLookupError:
+            pass
+
+    logger.info(f"--- 提醒任务对账完毕：已存在 {len(scheduled)}，补建 {restored}，孤儿 {len(orphans)} ---")
+
+
+def _render_ops_section() -> list:
+    return [
+        f"- 提醒数: {store.count()}",
+        f"- 提醒投递: {reminder_delivery.summary_line()}",
+        f"- 推迟上下文: {active_snooze_contexts.summary_line()}",
+    ]
+
 
+register_ops_section("提醒", _render_ops_section)
 
 
 driver = get_driver()
@@ -937,3 +1027,5 @@ async def on_bot_connect(bot: Bot):
     logger.info(f"Bot {bot.self_id} 已连接，开始加载提醒数据...")
     load_data()
     reschedule_jobs(bot)
+    if scheduler:
+        scheduler.add_job(export_data, "cron", hour=4, minute=0, id="reminder_store_export", replace_existing=True, timezone=TARGET_TZ)
@@ -1,55 +1,93 @@
-from nonebot import on_command
-from nonebot.adapters.onebot.v11 import MessageEvent, Message
+from nonebot import on_command, require
+from nonebot.adapters.onebot.v11 import MessageEvent, Message, MessageSegment
+from nonebot.log import logger
 from nonebot.plugin import PluginMetadata
 from nonebot.params import CommandArg
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 from pathlib import Path
+import os
 import pytz
-import json
 import re
 
+from ._json_store import JsonStore
+from ._schedule_model import ScheduleIndex
+from ._schedule_render import TimetableRenderer
+
+try:
+    require("nonebot_plugin_apscheduler")
+    from nonebot_plugin_apscheduler import scheduler
+except (ImportError, RuntimeError):
+    logger.warning("插件 nonebot_plugin_apscheduler 未加载，课表图片不会在周日预渲染")
+    scheduler = None
+
+try:
+    import PIL  # noqa: F401
+    _PIL_AVAILABLE = True
+except ImportError:
+    _PIL_AVAILABLE = False
+
 DATA_DIR = Path("data")
 SCHEDULE_FILE = DATA_DIR / "schedule_data.json"
+SCHEDULE_IMAGE_DIR = DATA_DIR / "schedule_images"
+
+SCHEDULE_TIMETABLE_IMAGE = os.getenv("SCHEDULE_TIMETABLE_IMAGE", "true").strip().lower() in {"1", "true", "yes", "on"}
+try:
+    SCHEDULE_PRERENDER_HOUR = int(os.getenv("SCHEDULE_PRERENDER_HOUR", "21"))
+except ValueError:
+    SCHEDULE_PRERENDER_HOUR = 21
 
 DEFAULT_DATA = {
     "semester_start_date": "2025-09-01",
     "courses": []
 }
 
+def _default_schedule_data() -> Dict:
+    return {**DEFAULT_DATA, "courses": []}
+
+schedule_store = JsonStore(SCHEDULE_FILE, default_factory=_default_schedule_data)
+_schedule_loaded = False
+_schedule_index: Optional[ScheduleIndex] = None
+
 def load_schedule_data() -> Dict:
-    if not SCHEDULE_FILE.exists():
-        DATA_DIR.mkdir(exist_ok=True)
-        save_schedule_data(DEFAULT_DATA)
-        return DEFAULT_DATA.copy()
-    
-    try:
-        with open(SCHEDULE_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError, OSError):
-        return DEFAULT_DATA.copy()
+    """返回内存中的课表数据（首次调用或文件被外部修改时从磁盘读入），修改后调用 save_schedule_data 写回。"""
+    global _schedule_loaded, _schedule_index
+    if _schedule_loaded and schedule_store.changed_on_disk():
+        _schedule_loaded = False
+    if not _schedule_loaded:
+        existed = SCHEDULE_FILE.exists()
+        data = schedule_store.load()
+        if not isinstance(data, dict):
+            data = _default_schedule_data()
+            schedule_store.data = data
+        _schedule_loaded = True
+        _schedule_index = None
+        if not existed:
+            schedule_store.mark_dirty()
+    return schedule_store.data
 
 def save_schedule_data(data: Dict) -> bool:
-    try:
-        DATA_DIR.mkdir(exist_ok=True)
-        with open(SCHEDULE_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return True
-    except (IOError, OSError):
-        return False
+    """改动立即生效并排队写盘；课表文件最近一次写盘失败（还在自动重试）时返回 False。"""
+    global _schedule_index
+    schedule_store.replace(data)
+    _schedule_index = None
+    return schedule_store.last_error is None
 
-def get_semester_start_date() -> datetime:
-    data = load_schedule_data()
-    date_str = data.get("semester_start_date", "2025-09-01")
-    try:
-        return datetime.strptime(date_str, "%Y-%m-%d")
-    except ValueError:
-        return datetime(2025, 9, 1)
+def _save_failed_msg(action: str) -> str:
+    return f"⚠️ {action}，但课表文件写盘失败（{schedule_store.last_error}），正在自动重试，重启前请检查磁盘"
 
-def get_my_schedule() -> List[Dict]:
+def get_schedule_index() -> ScheduleIndex:
+    global _schedule_index
     data = load_schedule_data()
-    return data.get("courses", [])
+    if _schedule_index is None:
+        _schedule_index = ScheduleIndex(data, datetime(2025, 9, 1))
+    return _schedule_index
 
+def get_semester_start_date() -> datetime:
+    return get_schedule_index().semester_start
+
+def get_my_schedule() -> List[Dict]:
+    return get_schedule_index().courses
 
 SECTION_TIMES = {
     1: "08:30-09:15", 2: "09:20-10:05",
@@ -77,6 +115,46 @@ def get_current_time_info() -> tuple[datetime, int]:
     current_week = days_diff // 7 + 1 if days_diff >= 0 else 1
     return now_in_china, current_week
 
+timetable_renderer = (
+    TimetableRenderer(SCHEDULE_IMAGE_DIR, logger=logger)
+    if SCHEDULE_TIMETABLE_IMAGE and _PIL_AVAILABLE else None
+)
+
+def build_week_payload(index: ScheduleIndex, week: int) -> Dict:
+    monday = index.semester_start + timedelta(weeks=week - 1)
+    return {
+        "title": f"第{week}周课表（{monday.strftime('%m.%d')} - {(monday + timedelta(days=6)).strftime('%m.%d')}）",
+        "dates": [(monday + timedelta(days=i)).strftime("%m-%d") for i in range(7)],
+        "section_times": SECTION_TIMES,
+        "days": index.week(week),
+    }
+
+async def get_week_image(week: int) -> Optional[Path]:
+    """本周课表图片：优先读缓存，没有就在子进程里渲染；不可用或失败返回 None，由调用方回退文字。"""
+    if timetable_renderer is None:
+        return None
+    index = get_schedule_index()
+    if not index.week(week):
+        return None
+    return await timetable_renderer.get_or_render(index.version, week, build_week_payload(index, week))
+
+async def prerender_week_images():
+    """周日晚上预渲染本周和下周的课表图片，并清理旧版本课表的缓存。"""
+    if timetable_renderer is None:
+        return
+    _, week = get_current_time_info()
+    index = get_schedule_index()
+    removed = timetable_renderer.prune(index.version)
+    for w in (week, week + 1):
+        await get_week_image(w)
+    logger.info(f"课表图片预渲染完成（第{week}、{week + 1}周），清理旧缓存 {removed} 张")
+
+if scheduler and timetable_renderer is not None:
+    scheduler.add_job(
+        prerender_week_images, "cron", day_of_week="sun", hour=SCHEDULE_PRERENDER_HOUR, minute=0,
+        id="schedule_prerender_week_images", replace_existing=True, timezone="Asia/Shanghai",
+    )
+
 @schedule_day.handle()
 async def _(event: MessageEvent, args: Message = CommandArg()):
     text = args.extract_plain_text().strip()
@@ -120,48 +198,41 @@ async def _(event: MessageEvent, args: Message = CommandArg()):
 @week_schedule.handle()
 async def _(event: MessageEvent):
     _, week = get_current_time_info()
-    my_schedule = get_my_schedule()
-    
-    courses_this_week = [
-        c for c in my_schedule if week in c.get("weeks", [])
-    ]
-    
-    if not courses_this_week:
-        await week_schedule.finish(f"你本周（第{week}周）没有课哦~")
-        return
-
-    reply = f"📅 本周（第{week}周）课表如下：\n"
-    
-    sorted_courses = sorted(courses_this_week, key=lambda c: (c.get('day', 0), c.get('start_section', 0)))
-
-    current_day = -1
-    for course in sorted_courses:
-        day_num = course.get("day")
-        if day_num != current_day:
-            reply += f"\n--- 星期{WEEKDAY_MAP[day_num-1]} ---\n"
-            current_day = day_num
-        
-        reply += format_course_info(course)
+    image_path = await get_week_image(week)
+    if image_path is not None:
+        await week_schedule.finish(MessageSegment.image(file=image_path.resolve()))
+
+    index = get_schedule_index()
+    key = ("week", week)
+    reply = index.replies.get(key)
+    if reply is None:
+        days = index.week(week)
+        if not days:
+            reply = f"你本周（第{week}周）没有课哦~"
+        else:
+            reply = f"📅 本周（第{week}周）课表如下：\n"
+            for day_num, courses in days.items():
+                reply += f"\n--- 星期{WEEKDAY_MAP[day_num-1]} ---\n"
+                reply += "".join(format_course_info(course) for course in courses)
+        index.replies[key] = reply
 
     await week_schedule.finish(reply)
 
 async def query_schedule_for_day(weekday: int, day_str: str, current_week: int) -> str:
-    my_schedule = get_my_schedule()
-    
-    courses_on_day = [
-        c for c in my_schedule 
-        if c.get("day") == weekday and current_week in c.get("weeks", [])
-    ]
-    
-    if not courses_on_day:
-        return f"你{day_str}（第{current_week}周）没有课哦，好好休息一下吧！"
+    index = get_schedule_index()
+    key = ("day", current_week, weekday, day_str)
+    reply = index.replies.get(key)
+    if reply is not None:
+        return reply
 
-    sorted_courses = sorted(courses_on_day, key=lambda c: c.get("start_section", 0))
+    courses_on_day = index.day(current_week, weekday)
+    if not courses_on_day:
+        reply = f"你{day_str}（第{current_week}周）没有课哦，好好休息一下吧！"
+    else:
+        reply = f"📅 {day_str}（第{current_week}周）的课表：\n--------------------\n"
+        reply += "".join(format_course_info(course) for course in courses_on_day)
 
-    reply = f"📅 {day_str}（第{current_week}周）的课表：\n--------------------\n"
-    for course in sorted_courses:
-        reply += format_course_info(course)
-    
+    index.replies[key] = reply
     return reply
 
 def format_course_info(course: Dict) -> str:
@@ -329,7 +400,7 @@ async def _(event: MessageEvent, args: Message = CommandArg()):
                 msg += f"\n... 还有 {len(errors) - 10} 条错误未显示"
         await add_course.finish(msg)
     elif added_courses:
-        await add_course.finish("❌ 保存失败，请稍后重试")
+        await add_course.finish(_save_failed_msg(f"已导入 {len(added_courses)} 门课程"))
     else:
         await add_course.finish("❌ 导入失败：\n" + "\n".join(errors[:10]))
 
@@ -354,7 +425,7 @@ async def _(event: MessageEvent, args: Message = CommandArg()):
     if save_schedule_data(data):
         await delete_course.finish(f"✅ 已删除 {deleted_count} 门课程：{course_name}")
     else:
-        await delete_course.finish("❌ 删除失败，请稍后重试")
+        await delete_course.finish(_save_failed_msg(f"已删除 {deleted_count} 门课程：{course_name}"))
 
 @clear_schedule.handle()
 async def _(event: MessageEvent):
@@ -368,7 +439,7 @@ async def _(event: MessageEvent):
     if save_schedule_data(data):
         await clear_schedule.finish(f"✅ 已清空 {course_count} 门课程")
     else:
-        await clear_schedule.finish("❌ 清空失败，请稍后重试")
+        await clear_schedule.finish(_save_failed_msg(f"已清空 {course_count} 门课程"))
 
 @set_start_date.handle()
 async def _(event: MessageEvent, args: Message = CommandArg()):
@@ -394,4 +465,4 @@ async def _(event: MessageEvent, args: Message = CommandArg()):
     if save_schedule_data(data):
         await set_start_date.finish(f"✅ 开学日期已设置为：{date_str}")
     else:
-        await set_start_date.finish("❌ 保存失败，请稍后重试")
\ No newline at end of file
+        await set_start_date.finish(_save_failed_msg(f"开学日期已设置为：{date_str}"))
\ No newline at end of file
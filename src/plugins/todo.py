@@ -1,4 +1,3 @@
-import json
 from pathlib import Path
 from typing import Dict, List, Literal, TypedDict, cast
 
@@ -8,11 +7,13 @@ from nonebot.adapters.onebot.v11 import MessageEvent, Message
 from nonebot.params import CommandArg
 
 from ._data_paths import resolve_data_dir
+from ._json_store import JsonStore
 
 plugin_dir = Path(__file__).parent
 data_dir = resolve_data_dir()
 
 data_file = data_dir / "todo_data.json"
+todo_store = JsonStore(data_file)
 
 
 class TodoItem(TypedDict):
@@ -35,19 +36,11 @@ def create_empty_user_data() -> UserTodoData:
 
 
 def save_data():
-    with open(data_file, "w", encoding="utf-8") as f:
-        json.dump(todo_data, f, ensure_ascii=False, indent=4)
+    todo_store.mark_dirty()
 
 def load_data():
     global todo_data
-    if data_file.exists():
-        with open(data_file, "r", encoding="utf-8") as f:
-            try:
-                todo_data = json.load(f)
-            except json.JSONDecodeError:
-                todo_data = {}
-    else:
-        todo_data = {}
+    todo_data = todo_store.load()
 
 def init_user_data(user_id: str):
     """初始化用户数据结构，并处理旧格式数据迁移"""